@@ -0,0 +1,180 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+# --- Configuration ---
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_FUZZY_THRESHOLD = 0.8
+
+# Words that carry no meaning for a census question ("How many ..." vs "What is the number of ...").
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "at", "for", "to", "by", "with", "from", "and", "is", "are",
+    "was", "were", "be", "do", "does", "did", "what", "which", "who", "how", "many", "much", "number",
+    "count", "show", "list", "give", "tell", "me", "find", "get", "please", "there", "that", "live",
+    "living", "lives", "people", "persons", "population", "all", "their", "its",
+}
+# Words that select a different slice of the data; a fuzzy hit must mention the same ones.
+ENTITY_TERMS = {
+    "gender": {
+        "male": "male", "males": "male", "man": "male", "men": "male", "boy": "male", "boys": "male",
+        "female": "female", "females": "female", "woman": "female", "women": "female", "girl": "female", "girls": "female",
+    },
+    "tru": {
+        "rural": "rural", "village": "rural", "villages": "rural",
+        "urban": "urban", "city": "urban", "cities": "urban", "town": "urban", "towns": "urban",
+    },
+}
+
+
+def normalize_question(question: str) -> str:
+    """Lower-cases the question, drops punctuation and collapses whitespace."""
+    s = question.lower().replace("&", " and ")
+    s = re.sub(r"[^a-z0-9\s]", " ", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def _stem(token: str) -> str:
+    """Very small suffix stripper so 'muslims' and 'muslim' compare equal."""
+    for suffix in ("ies", "es", "s"):
+        if len(token) > 4 and token.endswith(suffix):
+            return token[: -len(suffix)] + ("y" if suffix == "ies" else "")
+    return token
+
+
+def question_tokens(normalized: str) -> frozenset:
+    """Content tokens used for the fuzzy (token overlap) match."""
+    return frozenset(_stem(t) for t in normalized.split() if t not in STOPWORDS)
+
+
+def question_entities(question: str, entity_extractor: Callable[[str], Iterable] | None = None) -> frozenset:
+    """
+    (type, value) pairs a question filters on: numbers, gender and rural/urban words, plus the
+    (entity_type, name, ...) matches of `entity_extractor` (states, religions, languages, ...).
+    """
+    normalized = normalize_question(question)
+    entities = {("number", t) for t in normalized.split() if t.isdigit()}
+    for entity_type, terms in ENTITY_TERMS.items():
+        entities |= {(entity_type, terms[t]) for t in normalized.split() if t in terms}
+    if entity_extractor is not None:
+        entities |= {(match[0], match[1]) for match in entity_extractor(question)}
+    return frozenset(entities)
+
+
+@dataclass
+class CacheEntry:
+    """A cached generation result."""
+    sql_query: str
+    tokens: frozenset
+    entities: frozenset
+    created_at: float
+
+
+class GenerationCache:
+    """
+    LRU + TTL cache for generated SQL, keyed on (kind, schema version, normalized question).
+
+    Lookups try an exact key first, then the most similar cached question of the same
+    kind and schema version (Jaccard overlap of content tokens). Numbers, gender, rural/urban
+    and the entities found by `entity_extractor` (e.g. `LookupIndex.extract`) must match
+    exactly for a fuzzy hit, so "top 5" never answers "top 10" nor Kerala answer Bihar.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 fuzzy_threshold: float = DEFAULT_FUZZY_THRESHOLD,
+                 entity_extractor: Callable[[str], Iterable] | None = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.fuzzy_threshold = fuzzy_threshold
+        self.entity_extractor = entity_extractor
+        self._entries: OrderedDict[tuple, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, entry: CacheEntry, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry.created_at > self.ttl_seconds
+
+    def get(self, question: str, kind: str, schema_version: int) -> tuple[str | None, str]:
+        """Returns (sql_query, "hit" | "fuzzy" | "miss")."""
+        normalized = normalize_question(question)
+        key = (kind, schema_version, normalized)
+        now = time.time()
+        entities = question_entities(question, self.entity_extractor) if self.fuzzy_threshold < 1 else None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry, now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.sql_query, "hit"
+                del self._entries[key]
+                self.expirations += 1
+
+            if self.fuzzy_threshold < 1:
+                best_key, best_score = self._best_fuzzy_match(kind, schema_version, normalized, entities, now)
+                if best_key is not None and best_score >= self.fuzzy_threshold:
+                    self._entries.move_to_end(best_key)
+                    self.fuzzy_hits += 1
+                    return self._entries[best_key].sql_query, "fuzzy"
+
+            self.misses += 1
+            return None, "miss"
+
+    def _best_fuzzy_match(self, kind: str, schema_version: int, normalized: str, entities: frozenset, now: float):
+        tokens = question_tokens(normalized)
+        if not tokens:
+            return None, 0.0
+        best_key, best_score = None, 0.0
+        for key, entry in self._entries.items():
+            if key[0] != kind or key[1] != schema_version or self._expired(entry, now):
+                continue
+            if entry.entities != entities:
+                continue
+            union = len(tokens | entry.tokens)
+            score = len(tokens & entry.tokens) / union if union else 0.0
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
+
+    def put(self, question: str, kind: str, schema_version: int, sql_query: str):
+        """Stores a generated query, evicting the least recently used entry when full."""
+        normalized = normalize_question(question)
+        key = (kind, schema_version, normalized)
+        entry = CacheEntry(
+            sql_query=sql_query,
+            tokens=question_tokens(normalized),
+            entities=question_entities(question, self.entity_extractor),
+            created_at=time.time(),
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Removes every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for the admin endpoint."""
+        lookups = self.hits + self.fuzzy_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": (self.hits + self.fuzzy_hits) / lookups if lookups else 0.0,
+        }
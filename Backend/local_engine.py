@@ -0,0 +1,176 @@
+import asyncio
+import atexit
+import glob
+import os
+import tempfile
+from sqlalchemy import create_engine, event
+
+# --- Configuration ---
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Pre-Process", "unified_outputs")
+LOCAL_SCHEMA = "main" # DuckDB's default schema (Postgres uses "public")
+# Staged file stem -> table, where they differ (same mapping as the loader)
+TABLE_FOR_FILE = {"crops": "crop_stats"}
+# Area-level facts are stored as <table>_by_area with a state-level <table> view, as in Postgres.
+AREA_TABLE_SUFFIX = "_by_area"
+# Postgres semantics the generated SQL relies on: 7 / 2 = 3, and NULLs sort as the largest value.
+SESSION_SETTINGS = [
+    "SET integer_division = true",
+    "SET default_null_order = 'nulls_last_on_asc_first_on_desc'",
+]
+
+
+def _duckdb():
+    try:
+        import duckdb
+        import duckdb_engine # noqa: F401 (registers the duckdb:// SQLAlchemy dialect)
+    except ImportError as e:
+        raise ImportError("The 'duckdb' database backend requires `pip install duckdb duckdb-engine`.") from e
+    return duckdb
+
+
+def staged_tables(data_dir: str) -> dict[str, str]:
+    """Table -> staged file in `data_dir`; Parquet is preferred over CSV for the same table."""
+    tables = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.csv"))) + sorted(glob.glob(os.path.join(data_dir, "*.parquet"))):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        tables[TABLE_FOR_FILE.get(stem, stem)] = path
+    return tables
+
+
+def build_database(db_path: str, data_dir: str = DEFAULT_DATA_DIR) -> list[str]:
+    """(Re)creates the DuckDB file at `db_path` from the staged tables; returns the tables loaded."""
+    duckdb = _duckdb()
+    tables = staged_tables(data_dir)
+    if not tables:
+        raise FileNotFoundError(f"No staged tables in {data_dir}. Run Pre-Process/run_pipeline.py first.")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    conn = duckdb.connect(db_path)
+    try:
+        for table_name, path in tables.items():
+            reader = "read_parquet" if path.endswith(".parquet") else "read_csv_auto"
+            source = f"{reader}('{path.replace(chr(39), chr(39) * 2)}')"
+            columns = [row[0] for row in conn.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()]
+            if "district_code" in columns:
+                conn.execute(f"CREATE TABLE {table_name}{AREA_TABLE_SUFFIX} AS SELECT * FROM {source}")
+                conn.execute(
+                    f"CREATE VIEW {table_name} AS SELECT * FROM {table_name}{AREA_TABLE_SUFFIX} WHERE district_code = 0"
+                )
+            else:
+                conn.execute(f"CREATE TABLE {table_name} AS SELECT * FROM {source}")
+    finally:
+        conn.close()
+    return list(tables)
+
+
+def create_local_engine(data_dir: str = DEFAULT_DATA_DIR, db_path: str | None = None):
+    """
+    Loads the unified outputs into an embedded DuckDB database and returns a read-only
+    SQLAlchemy engine over it. Without `db_path`, a per-process file in the temp directory
+    is used (so several workers never contend for one file).
+    """
+    if db_path is None:
+        db_path = os.path.join(tempfile.gettempdir(), f"censql_local_{os.getpid()}.duckdb")
+        atexit.register(lambda: os.path.exists(db_path) and os.remove(db_path))
+    loaded = build_database(db_path, data_dir)
+    print(f"Local DuckDB database built at {db_path}: {len(loaded)} tables from {os.path.abspath(data_dir)}.")
+
+    engine = create_engine(f"duckdb:///{db_path}", connect_args={"read_only": True})
+
+    @event.listens_for(engine, "connect")
+    def _postgres_compat(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        for statement in SESSION_SETTINGS:
+            cursor.execute(statement)
+        cursor.close()
+
+    return engine
+
+
+class _BufferedResult:
+    """Fully fetched result, so no cursor is touched outside the worker thread."""
+
+    def __init__(self, result):
+        self.rowcount = result.rowcount
+        self._keys = list(result.keys()) if result.returns_rows else []
+        self._rows = result.fetchall() if result.returns_rows else []
+
+    def keys(self):
+        return self._keys
+
+    def fetchall(self):
+        return self._rows
+
+
+class _StreamedResult:
+    """Result read in chunks of `chunk_size` rows, each fetched in a worker thread."""
+
+    def __init__(self, result, chunk_size: int):
+        self._result = result
+        self._chunk_size = chunk_size
+
+    def keys(self):
+        return list(self._result.keys())
+
+    async def partitions(self):
+        while True:
+            rows = await asyncio.to_thread(self._result.fetchmany, self._chunk_size)
+            if not rows:
+                break
+            yield rows
+
+
+class _Transaction:
+    def __init__(self, connection):
+        self._connection = connection
+
+    async def __aenter__(self):
+        self._transaction = await asyncio.to_thread(self._connection.begin)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await asyncio.to_thread(self._transaction.rollback if exc_type else self._transaction.commit)
+        return False
+
+
+class _LocalAsyncConnection:
+    def __init__(self, engine):
+        self._engine = engine
+        self._connection = None
+
+    async def __aenter__(self):
+        self._connection = await asyncio.to_thread(self._engine.connect)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await asyncio.to_thread(self._connection.close)
+        return False
+
+    def begin(self):
+        return _Transaction(self._connection)
+
+    async def execute(self, statement):
+        return await asyncio.to_thread(lambda: _BufferedResult(self._connection.execute(statement)))
+
+    async def stream(self, statement, execution_options=None):
+        chunk_size = (execution_options or {}).get("yield_per", 1000)
+        result = await asyncio.to_thread(self._connection.execute, statement)
+        return _StreamedResult(result, chunk_size)
+
+
+class LocalAsyncEngine:
+    """
+    The subset of SQLAlchemy's AsyncEngine the API uses (`connect`, `begin`, `execute`,
+    `stream`, `dispose`) over a sync in-process engine. Queries run in worker threads, so
+    the event loop is never blocked, and cost no network round trip.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def connect(self):
+        return _LocalAsyncConnection(self.engine)
+
+    async def dispose(self):
+        await asyncio.to_thread(self.engine.dispose)
@@ -0,0 +1,150 @@
+import csv
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, List, Sequence
+
+# --- Configuration ---
+LOG_BACKENDS = ("csv", "sqlite", "parquet")
+DEFAULT_BUFFER_SIZE = 10000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 1.0 # seconds
+SQLITE_FILE = "logs.sqlite3"
+
+
+class BufferedLogWriter:
+    """
+    Non-blocking, batched log writer.
+
+    `log()` only appends to an in-memory ring buffer; a background thread drains it every
+    `flush_interval` seconds (or as soon as `batch_size` rows are pending) and writes the
+    whole batch at once. If the buffer fills up faster than it is drained the oldest rows
+    are dropped and counted in `dropped`.
+
+    Backends, all safe with several uvicorn workers:
+      - "csv":     `<name>.<pid>.csv`, one file per worker process so appends never interleave
+                   (`per_worker=False` writes a single `<name>.csv`: one worker only); rotated
+                   to `<name>[.<pid>].<timestamp>.csv` past `max_bytes`
+      - "sqlite":  one table per log in a shared WAL-mode database
+      - "parquet": one part file per flushed batch under `<name>/`
+    """
+
+    def __init__(self, name: str, columns: Sequence[str], backend: str = "csv", directory: str = ".",
+                 buffer_size: int = DEFAULT_BUFFER_SIZE, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, max_bytes: int = 0, per_worker: bool = True):
+        if backend not in LOG_BACKENDS:
+            raise ValueError(f"Unknown log backend '{backend}'. Expected one of {LOG_BACKENDS}.")
+        self.name = name
+        self.columns = list(columns)
+        self.backend = backend
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.per_worker = per_worker
+        self._buffer: deque = deque(maxlen=buffer_size)
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name=f"log-{name}", daemon=True)
+        self._thread.start()
+
+    # --- Public API ---
+    def log(self, row: Sequence[Any]):
+        """Queues one row; never blocks on I/O."""
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(list(row))
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Writes every pending row."""
+        with self._write_lock:
+            while self._buffer:
+                batch = self._drain()
+                try:
+                    getattr(self, f"_write_{self.backend}")(batch)
+                    self.written += len(batch)
+                    self.batches += 1
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Error writing {len(batch)} rows to {self.name} log: {e}")
+
+    def close(self):
+        """Stops the background thread and flushes what is left."""
+        self._stopped = True
+        self._wakeup.set()
+        self._thread.join(timeout=10)
+        self.flush()
+
+    def stats(self) -> dict:
+        """Counters for the admin endpoint."""
+        return {
+            "backend": self.backend,
+            "pending": len(self._buffer),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+    # --- Internals ---
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _drain(self) -> List[list]:
+        batch = []
+        while self._buffer and len(batch) < self.batch_size:
+            batch.append(self._buffer.popleft())
+        return batch
+
+    def _csv_path(self) -> str:
+        suffix = f".{os.getpid()}" if self.per_worker else ""
+        return os.path.join(self.directory, f"{self.name}{suffix}.csv")
+
+    def _write_csv(self, batch: List[list]):
+        path = self._csv_path()
+        if self.max_bytes and os.path.isfile(path) and os.path.getsize(path) >= self.max_bytes:
+            root, ext = os.path.splitext(path)
+            os.replace(path, f"{root}.{time.strftime('%Y%m%d-%H%M%S')}{ext}")
+        file_exists = os.path.isfile(path)
+        with open(path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if not file_exists:
+                writer.writerow(self.columns)
+            writer.writerows(batch)
+
+    def _write_sqlite(self, batch: List[list]):
+        # Connections are cheap and thread-bound, so open one per batch.
+        conn = sqlite3.connect(os.path.join(self.directory, SQLITE_FILE), timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            column_defs = ", ".join(f'"{c}"' for c in self.columns)
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{self.name}" (logged_at REAL, pid INTEGER, {column_defs})')
+            placeholders = ", ".join("?" for _ in range(len(self.columns) + 2))
+            now, pid = time.time(), os.getpid()
+            with conn:
+                conn.executemany(f'INSERT INTO "{self.name}" VALUES ({placeholders})',
+                                 [[now, pid, *row] for row in batch])
+        finally:
+            conn.close()
+
+    def _write_parquet(self, batch: List[list]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        out_dir = os.path.join(self.directory, self.name)
+        os.makedirs(out_dir, exist_ok=True)
+        table = pa.Table.from_pylist([dict(zip(self.columns, row)) for row in batch])
+        pq.write_table(table, os.path.join(out_dir, f"part-{os.getpid()}-{time.time_ns()}.parquet"),
+                       compression="zstd")
@@ -0,0 +1,362 @@
+import difflib
+import re
+import threading
+from typing import NamedTuple
+from sqlalchemy import text
+
+try:
+    import sqlglot
+    from sqlglot import exp
+    from sqlglot.optimizer.scope import traverse_scope
+except ImportError: # Fall back to the statement-wide regex alias map below
+    sqlglot = None
+
+# --- Configuration ---
+# Entity type -> (lookup table, id column, name column)
+LOOKUP_TABLES = {
+    "state": ("regions", "state", "area_name"),
+    "religion": ("religions", "id", "religion_name"),
+    "language": ("languages", "id", "name"),
+    "tru": ("tru", "id", "name"),
+    "age_group": ("age_groups", "id", "name"),
+}
+FUZZY_CUTOFF = 0.85
+FUZZY_TYPES = ("state", "religion") # small, distinctive name lists; languages are too noisy
+MIN_FUZZY_LENGTH = 5
+
+# `[alias.]name_column = | LIKE | ILIKE 'value'` and `[alias.]name_column IN ('a', 'b')`
+PREDICATE_RE = re.compile(
+    r"(?<![\w.])(?:(?P<qualifier>\w+)\.)?(?P<column>area_name|religion_name|name)\s*"
+    r"(?:(?P<op>=|I?LIKE)\s*'(?P<value>(?:[^']|'')*)'|(?P<in>IN)\s*\((?P<values>\s*'(?:[^']|'')*'(?:\s*,\s*'(?:[^']|'')*')*\s*)\))",
+    re.IGNORECASE,
+)
+TABLE_REF_RE = re.compile(r"\b(?:FROM|JOIN)\s+(?P<table>\w+)(?:\s+(?:AS\s+)?(?P<alias>\w+))?", re.IGNORECASE)
+# CTEs and subqueries open nested SELECT scopes that the regex alias map can't tell apart
+NESTED_SCOPE_RE = re.compile(r"\bWITH\b|\(\s*SELECT\b", re.IGNORECASE)
+SQL_KEYWORDS = {
+    "WHERE", "JOIN", "INNER", "LEFT", "RIGHT", "FULL", "CROSS", "NATURAL", "ON", "USING", "GROUP", "ORDER",
+    "LIMIT", "OFFSET", "HAVING", "UNION", "EXCEPT", "INTERSECT", "WINDOW", "FETCH", "FOR", "LATERAL", "AS",
+}
+
+# Spellings used in questions (and by the LLM) that differ from the lookup tables
+ALIASES = {
+    "state": {
+        "orissa": "Odisha", "j and k": "Jammu & Kashmir", "j k": "Jammu & Kashmir", "jk": "Jammu & Kashmir",
+        "kashmir": "Jammu & Kashmir", "delhi": "NCT of Delhi", "new delhi": "NCT of Delhi",
+        "pondicherry": "Puducherry", "pondichery": "Puducherry", "uttaranchal": "Uttarakhand",
+        "chhatisgarh": "Chhattisgarh", "chattisgarh": "Chhattisgarh", "andaman and nicobar": "Andaman & Nicobar Islands",
+        "andaman": "Andaman & Nicobar Islands", "all india": "India",
+        "laccadives": "Lakshadweep",
+    },
+    "religion": {
+        "islam": "Muslim", "islamic": "Muslim", "hinduism": "Hindu", "christianity": "Christian",
+        "sikhism": "Sikh", "buddhism": "Buddhist", "jainism": "Jain",
+    },
+    "language": {"oriya": "Odia", "bangla": "Bengali", "hindustani": "Hindi"},
+    "tru": {"village": "Rural", "villager": "Rural", "villages": "Rural", "villagers": "Rural",
+            "city": "Urban", "cities": "Urban", "town": "Urban", "towns": "Urban"},
+}
+
+
+def normalize_name(name: str) -> str:
+    """Case-folds, spells '&' as 'and' and collapses punctuation/whitespace."""
+    s = str(name).lower().replace("&", " and ")
+    return re.sub(r"[^a-z0-9+]+", " ", s).strip()
+
+
+def _surface_pattern(key: str) -> str:
+    """Regex for a normalized name that also accepts '&' for 'and' and any punctuation between words."""
+    pattern = ""
+    for i, word in enumerate(key.split()):
+        if word == "and" and i:
+            pattern += r"\s*(?:&|\band\b)\s*"
+            continue
+        if i and not pattern.endswith(r"\s*"):
+            pattern += r"[\s\-.&]*" if len(word) == 1 else r"[\s\-.]+"
+        pattern += re.escape(word)
+    return pattern
+
+
+class LookupMatch(NamedTuple):
+    """A resolved mention: same leading fields as the router's (slot_type, value, start, end)."""
+    entity_type: str
+    name: str
+    start: int
+    end: int
+    ids: tuple
+    score: float
+
+
+class LookupIndex:
+    """
+    In-process index of the census lookup tables for entity resolution.
+
+    Built once from regions, religions, languages, tru and age_groups. Maps normalized names
+    and aliases ("Orissa", "J&K", "Islam", "villagers") to the canonical name and integer
+    id(s), with difflib fuzzy matching for misspellings. `rewrite_sql` uses it to turn
+    name predicates such as `r.area_name ILIKE 'kerala'` into `r.state = 32`, which Postgres
+    serves from the primary key and propagates through the join to the fact table.
+    """
+
+    def __init__(self):
+        self._names: dict[str, dict[str, tuple[str, tuple]]] = {t: {} for t in LOOKUP_TABLES}
+        self._surface_re = None
+        self._surface: dict[str, tuple[str, str]] = {}
+        self._lock = threading.Lock()
+        self.rewrites = 0
+        self.fuzzy_matches = 0
+
+    # --- Loading ---
+    def load(self, engine):
+        """Reads every lookup table; missing tables are skipped."""
+        rows = {}
+        with engine.connect() as conn:
+            for entity_type, (table, id_col, name_col) in LOOKUP_TABLES.items():
+                try:
+                    rows[entity_type] = [(r[0], r[1]) for r in conn.execute(text(f"SELECT {id_col}, {name_col} FROM {table}"))]
+                except Exception as e:
+                    conn.rollback()
+                    print(f"Could not load lookup table {table}: {e}")
+                    rows[entity_type] = []
+        self.load_rows(rows)
+
+    def load_rows(self, rows: dict[str, list[tuple]]):
+        """Builds the index from {entity_type: [(id, name), ...]}."""
+        names = {t: {} for t in LOOKUP_TABLES}
+        for entity_type, pairs in rows.items():
+            grouped: dict[str, tuple[str, list]] = {}
+            for row_id, name in pairs:
+                if name is None or not str(name).strip():
+                    continue
+                key = normalize_name(name)
+                canonical, ids = grouped.setdefault(key, (str(name).strip(), []))
+                ids.append(int(row_id))
+            names[entity_type] = {k: (canonical, tuple(sorted(set(ids)))) for k, (canonical, ids) in grouped.items()}
+
+        surface = {}
+        for entity_type, by_key in names.items():
+            for key, (canonical, _) in by_key.items():
+                surface.setdefault(key, (entity_type, canonical))
+            for alias, target in ALIASES.get(entity_type, {}).items():
+                target_key = normalize_name(target)
+                if target_key in by_key:
+                    surface.setdefault(normalize_name(alias), (entity_type, by_key[target_key][0]))
+        pattern = None
+        if surface:
+            alternation = "|".join(_surface_pattern(k) for k in sorted(surface, key=len, reverse=True))
+            pattern = re.compile(rf"(?<![\w&])({alternation})(?:es|s)?(?![\w&])", re.IGNORECASE)
+        with self._lock:
+            self._names = names
+            self._surface = surface
+            self._surface_re = pattern
+        print(f"Lookup index loaded: " + ", ".join(f"{len(v)} {k}" for k, v in names.items()))
+
+    # --- Resolution ---
+    def vocabulary(self) -> dict[str, list[str]]:
+        """Canonical names per entity type."""
+        return {t: [canonical for canonical, _ in by_key.values()] for t, by_key in self._names.items()}
+
+    def aliases(self) -> dict[str, tuple[str, str]]:
+        """Alias surface form -> (entity_type, canonical name), for aliases whose target exists."""
+        return {alias: value for alias, value in self._surface.items()
+                if alias not in self._names.get(value[0], {})}
+
+    def resolve(self, entity_type: str, name: str, fuzzy: bool = True) -> LookupMatch | None:
+        """Resolves a single name of a known type to its canonical name and id(s)."""
+        by_key = self._names.get(entity_type, {})
+        key = normalize_name(name)
+        candidates = [key, key[:-2] if key.endswith("es") else None, key[:-1] if key.endswith("s") else None]
+        for candidate in filter(None, candidates):
+            if candidate in by_key:
+                canonical, ids = by_key[candidate]
+                return LookupMatch(entity_type, canonical, 0, len(name), ids, 1.0)
+            alias = self._surface.get(candidate)
+            if alias and alias[0] == entity_type:
+                canonical, ids = by_key[normalize_name(alias[1])]
+                return LookupMatch(entity_type, canonical, 0, len(name), ids, 1.0)
+        if fuzzy and len(key) >= MIN_FUZZY_LENGTH:
+            close = difflib.get_close_matches(key, by_key.keys(), n=1, cutoff=FUZZY_CUTOFF)
+            if close:
+                canonical, ids = by_key[close[0]]
+                self.fuzzy_matches += 1
+                return LookupMatch(entity_type, canonical, 0, len(name), ids,
+                                   difflib.SequenceMatcher(None, key, close[0]).ratio())
+        return None
+
+    def extract(self, question: str, fuzzy: bool = True) -> list[LookupMatch]:
+        """Finds every entity mention in a question: exact names and aliases, then fuzzy single words."""
+        if self._surface_re is None:
+            return []
+        matches = []
+        for m in self._surface_re.finditer(question):
+            entity_type, canonical = self._surface.get(normalize_name(m.group(1)), (None, None))
+            if entity_type is None:
+                continue
+            ids = self._names[entity_type][normalize_name(canonical)][1]
+            matches.append(LookupMatch(entity_type, canonical, m.start(), m.end(), ids, 1.0))
+
+        if fuzzy:
+            taken = [(m.start, m.end) for m in matches]
+            for m in re.finditer(r"[A-Za-z]{%d,}" % MIN_FUZZY_LENGTH, question):
+                if any(start < m.end() and m.start() < end for start, end in taken):
+                    continue
+                word = m.group(0).lower()
+                for entity_type in FUZZY_TYPES:
+                    close = difflib.get_close_matches(word, self._names[entity_type].keys(), n=1, cutoff=FUZZY_CUTOFF)
+                    if close:
+                        canonical, ids = self._names[entity_type][close[0]]
+                        score = difflib.SequenceMatcher(None, word, close[0]).ratio()
+                        self.fuzzy_matches += 1
+                        matches.append(LookupMatch(entity_type, canonical, m.start(), m.end(), ids, score))
+                        break
+        return sorted(matches, key=lambda match: match.start)
+
+    def hints(self, question: str) -> str:
+        """Prompt line listing the ids of the entities a question mentions (empty if none)."""
+        parts = []
+        for match in self.extract(question):
+            table, id_col, name_col = LOOKUP_TABLES[match.entity_type]
+            ids = ", ".join(str(i) for i in match.ids)
+            part = f"{table}.{name_col} '{match.name}' = {table}.{id_col} {ids}"
+            if part not in parts:
+                parts.append(part)
+        return f"Known values: {'; '.join(parts)}" if parts else ""
+
+    # --- SQL rewriting ---
+    def rewrite_sql(self, sql: str) -> str:
+        """
+        Replaces name predicates on lookup tables with id predicates.
+
+        `r.area_name = 'Kerala'`, `ILIKE 'orissa'` and `IN ('Hindu', 'Islam')` become
+        `r.state = 32`, `r.state = 21` and `r.id IN (2, 3)`. Predicates whose values don't
+        resolve exactly (or use LIKE wildcards) are left untouched.
+        """
+        if self._surface_re is None:
+            return sql
+        lookups = {table: entity_type for entity_type, (table, _, _) in LOOKUP_TABLES.items()}
+        bindings = self._scoped_bindings(sql, lookups)
+        tables = self._referenced_tables(sql) if bindings is None else {}
+        nested = bindings is None and NESTED_SCOPE_RE.search(sql) is not None
+        rewritten = 0
+
+        def target(m: re.Match) -> tuple[str, str] | None:
+            qualifier, column = m.group("qualifier"), m.group("column").lower()
+            if bindings is not None:
+                candidates = dict([bindings[m.start("column")]]) if bindings.get(m.start("column")) else {}
+            elif qualifier:
+                candidates = {qualifier: tables.get(qualifier.lower())}
+            elif nested:
+                # Without scopes, an unqualified column may belong to a CTE or subquery.
+                return None
+            else:
+                # An unqualified column is only safe when one referenced lookup table has it.
+                candidates = {}
+                for alias, table in tables.items():
+                    if alias == table:
+                        candidates.setdefault(table, table)
+                    else:
+                        candidates[table] = alias
+                candidates = {alias: table for table, alias in candidates.items()}
+            candidates = {alias: lookups[table] for alias, table in candidates.items()
+                          if table in lookups and LOOKUP_TABLES[lookups[table]][2] == column}
+            return next(iter(candidates.items())) if len(candidates) == 1 else None
+
+        def ids_for(entity_type: str, values: list[str]) -> list[int] | None:
+            ids = []
+            for value in values:
+                match = self.resolve(entity_type, value.replace("''", "'"), fuzzy=False)
+                if match is None:
+                    return None
+                ids.extend(i for i in match.ids if i not in ids)
+            return ids
+
+        def replace(m: re.Match) -> str:
+            nonlocal rewritten
+            operator = (m.group("op") or m.group("in")).upper()
+            resolved = target(m)
+            if resolved is None:
+                return m.group(0)
+            alias, entity_type = resolved
+            if operator == "IN":
+                values = re.findall(r"'((?:[^']|'')*)'", m.group("values"))
+            else:
+                values = [m.group("value")]
+                if operator in ("LIKE", "ILIKE") and re.search(r"[%_]", values[0]):
+                    return m.group(0)
+            ids = ids_for(entity_type, values)
+            if not ids:
+                return m.group(0)
+            rewritten += 1
+            id_col = f"{alias}.{LOOKUP_TABLES[entity_type][1]}"
+            if len(ids) == 1:
+                return f"{id_col} = {ids[0]}"
+            return f"{id_col} IN ({', '.join(str(i) for i in ids)})"
+
+        result = PREDICATE_RE.sub(replace, sql)
+        if rewritten:
+            self.rewrites += rewritten
+        return result
+
+    @staticmethod
+    def _scoped_bindings(sql: str, lookups: dict[str, str]) -> dict[int, tuple[str, str] | None] | None:
+        """
+        Resolves every lookup name column (area_name, religion_name, name) in its own SELECT
+        scope: offset of the column name in `sql` -> (alias, table) it reads, or None if it
+        isn't a lookup table's column there (a CTE, a subquery, or ambiguous). Returns None
+        if sqlglot is unavailable or can't parse the statement.
+        """
+        if sqlglot is None:
+            return None
+        name_columns = {name_col for _, _, name_col in LOOKUP_TABLES.values()}
+        try:
+            statements = [e for e in sqlglot.parse(sql, read="postgres") if e is not None]
+            scopes = {id(scope.expression): scope for statement in statements for scope in traverse_scope(statement)}
+        except Exception:
+            return None
+
+        bindings = {}
+        for statement in statements:
+            for column in statement.find_all(exp.Column):
+                start = column.this.meta.get("start")
+                if column.name.lower() not in name_columns or start is None:
+                    continue
+                select = column.find_ancestor(exp.Select)
+                scope = scopes.get(id(select)) if select is not None else None
+                binding = None
+                if scope is not None and column.table:
+                    # Qualified: the nearest enclosing scope that defines the alias (correlated subqueries).
+                    while scope is not None and column.table not in scope.sources:
+                        scope = scope.parent
+                    source = scope.sources[column.table] if scope is not None else None
+                    if isinstance(source, exp.Table):
+                        binding = (column.table, source.name.lower())
+                elif scope is not None and all(isinstance(s, exp.Table) for s in scope.sources.values()):
+                    # Unqualified: only when every source is a table and exactly one is a lookup table with it.
+                    owners = [(alias, source.name.lower()) for alias, source in scope.sources.items()
+                              if lookups.get(source.name.lower())
+                              and LOOKUP_TABLES[lookups[source.name.lower()]][2] == column.name.lower()]
+                    binding = owners[0] if len(owners) == 1 else None
+                bindings[start] = binding
+        return bindings
+
+    @staticmethod
+    def _referenced_tables(sql: str) -> dict[str, str | None]:
+        """Maps every table name and alias in FROM/JOIN clauses to its table (None if bound to several)."""
+        tables = {}
+        for m in TABLE_REF_RE.finditer(sql):
+            table = m.group("table").lower()
+            tables.setdefault(table, table)
+            alias = m.group("alias")
+            if alias and alias.upper() not in SQL_KEYWORDS:
+                alias = alias.lower()
+                tables[alias] = table if tables.get(alias, table) == table else None
+        return tables
+
+    def stats(self) -> dict:
+        """Counters for the admin endpoint."""
+        return {
+            "names": {t: len(by_key) for t, by_key in self._names.items()},
+            "aliases": len(self.aliases()),
+            "fuzzy_matches": self.fuzzy_matches,
+            "rewrites": self.rewrites,
+        }
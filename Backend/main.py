@@ -1,35 +1,96 @@
 import os
-import csv
+import json
+import asyncio
 import time
-import pandas as pd
+import importlib.util
+from contextlib import asynccontextmanager
+from decimal import Decimal
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy import create_engine, text, inspect
-from langchain_core.prompts import PromptTemplate
-from langchain_groq import ChatGroq
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 from dotenv import load_dotenv
 from typing import List, Dict, Any, Union
 from fastapi.middleware.cors import CORSMiddleware
+from schema_catalog import SchemaCatalog
+from generation_cache import GenerationCache, normalize_question
+from model_client import ModelClient
+from log_writer import BufferedLogWriter
+from query_router import QueryRouter
+from lookup_index import LookupIndex
+from local_engine import DEFAULT_DATA_DIR, LOCAL_SCHEMA, LocalAsyncEngine, create_local_engine
+from rollup_cube import CubeRewriter
+from schema_linker import SchemaLinker
+from query_cache import QueryCache, analyze_sql, is_cacheable, statement_kind
+from result_stream import ResultStreamer, STREAM_FORMATS, NDJSON_MEDIA_TYPE
+from rate_limit import TokenBucket
+from single_flight import SingleFlight
 
 # --- Configuration ---
 load_dotenv()
 
-GENERATION_LOG_FILE = "generation_log.csv"
-LOG_FILE = "metrics_log.csv"
+GENERATION_LOG_NAME = "generation_log"
+METRICS_LOG_NAME = "metrics_log"
+LOG_BACKEND = os.getenv("LOG_BACKEND", "csv").lower() # csv | sqlite | parquet
+LOG_DIR = os.getenv("LOG_DIR", ".")
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0")) # seconds
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", "0")) # rotate CSV logs past this size, 0 = never
+LOG_PER_WORKER = os.getenv("LOG_PER_WORKER", "true").lower() in ("1", "true", "yes") # one CSV per uvicorn worker; false = single CSV (one worker only)
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "2000")) # rows per server-side cursor fetch
+GENERATION_CACHE_SIZE = int(os.getenv("GENERATION_CACHE_SIZE", "1024"))
+GENERATION_CACHE_TTL = float(os.getenv("GENERATION_CACHE_TTL", "21600")) # seconds, 0 = never expire
+GENERATION_CACHE_FUZZY_THRESHOLD = float(os.getenv("GENERATION_CACHE_FUZZY_THRESHOLD", "0.8")) # 1 = exact only
+QUERY_CACHE_MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024))) # 0 disables the cache
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "true").lower() in ("1", "true", "yes")
+TEMPLATE_DIR = os.getenv("TEMPLATE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Template")
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "1000"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+BATCH_RATE_LIMIT_RPM = float(os.getenv("BATCH_RATE_LIMIT_RPM", "30")) # LLM calls per minute, 0 = unlimited
+BATCH_RATE_LIMIT_BURST = float(os.getenv("BATCH_RATE_LIMIT_BURST", "5"))
+BATCH_MAX_RETRIES = int(os.getenv("BATCH_MAX_RETRIES", "3"))
+SCHEMA_PRUNING = os.getenv("SCHEMA_PRUNING", "true").lower() in ("1", "true", "yes") # send only relevant tables/columns
+ENTITY_REWRITE = os.getenv("ENTITY_REWRITE", "true").lower() in ("1", "true", "yes") # name predicates -> lookup ids
+CUBE_REWRITE = os.getenv("CUBE_REWRITE", "true").lower() in ("1", "true", "yes") # aggregates -> rollup cubes
+# Database backend: "postgres" (default, DATABASE_URL) or "duckdb" (embedded, loaded from the unified outputs)
+DB_BACKEND = os.getenv("DB_BACKEND", "postgres").lower()
+LOCAL_DATA_DIR = os.getenv("LOCAL_DATA_DIR") or DEFAULT_DATA_DIR # staged Parquet/CSV tables for "duckdb"
+LOCAL_DB_PATH = os.getenv("LOCAL_DB_PATH") or None # DuckDB file to (re)build; default: per-process temp file
+if DB_BACKEND not in ("postgres", "duckdb"):
+    raise ValueError(f"Unknown DB_BACKEND '{DB_BACKEND}'. Expected 'postgres' or 'duckdb'.")
+
 # Use the DATABASE_URL from environment variables
 DATABASE_URL = os.getenv("DATABASE_URL", "")
-if not DATABASE_URL:
+if DB_BACKEND == "postgres" and not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable not set. Please add it to your .env file.")
 
+# LLM backend: "groq" (default), "local" (OpenAI-compatible server, e.g. llama.cpp) or "stub" (load tests)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq").lower()
+LLM_MODEL = os.getenv("LLM_MODEL") or None
+LOCAL_LLM_URL = os.getenv("LOCAL_LLM_URL") or None
+STUB_LLM_RESPONSE = os.getenv("STUB_LLM_RESPONSE", "SELECT 1;")
+STUB_LLM_DELAY = float(os.getenv("STUB_LLM_DELAY", "0")) # seconds
+
 # Check for Groq API key
-if not os.getenv("GROQ_API_KEY"):
+if LLM_BACKEND == "groq" and not os.getenv("GROQ_API_KEY"):
     raise ValueError("GROQ_API_KEY environment variable not set. Please add it to your .env file.")
 
 # --- FastAPI App Initialization ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Everything is set up at import; on shutdown, closes pooled connections and flushes pending log writes."""
+    yield
+    await async_engine.dispose()
+    generation_logger.close()
+    metrics_logger.close()
+
 app = FastAPI(
     title="Text-to-SQL API",
     description="An API with separate endpoints to generate SELECT queries, generate other SQL commands, and execute any SQL.",
-    version="3.0.0"
+    version="3.0.0",
+    lifespan=lifespan,
 )
 
 # --- CORS Middleware ---
@@ -50,16 +111,151 @@ app.add_middleware(
 )
 
 # --- Database Connection ---
+def _async_engine_args(database_url: str):
+    """Converts a psycopg2-style DATABASE_URL into an asyncpg URL plus connect_args."""
+    url = make_url(database_url)
+    query = dict(url.query)
+    connect_args = {}
+    sslmode = query.pop("sslmode", None)
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = sslmode
+    # PgBouncer in transaction mode (Supabase pooler) cannot use named prepared statements.
+    connect_args["statement_cache_size"] = 0
+    url = url.set(drivername="postgresql+asyncpg", query=query)
+    return url, connect_args
+
 try:
-    engine = create_engine(DATABASE_URL)
-    with engine.connect() as connection:
-      print("Database connection successful.")
+    if DB_BACKEND == "duckdb":
+        # In-process copy of the census tables: no network round trip, works offline. Read-only.
+        engine = create_local_engine(LOCAL_DATA_DIR, LOCAL_DB_PATH)
+        with engine.connect() as connection:
+            print("Local database ready.")
+        async_engine = LocalAsyncEngine(engine)
+    else:
+        # The sync engine is only used for startup checks and schema introspection.
+        engine = create_engine(DATABASE_URL)
+        with engine.connect() as connection:
+          print("Database connection successful.")
+        # Request handling goes through the async engine so queries never block the event loop.
+        async_url, async_connect_args = _async_engine_args(os.getenv("ASYNC_DATABASE_URL") or DATABASE_URL)
+        async_engine = create_async_engine(async_url, connect_args=async_connect_args, pool_pre_ping=True)
 except Exception as e:
     print(f"Failed to connect to the database: {e}")
     print("Please ensure the PostgreSQL server is running and the DATABASE_URL is correct.")
     # Exit if DB connection fails
     exit()
 
+# --- Schema Catalog ---
+# Introspected once at startup; reloaded only after DDL or an admin refresh.
+schema_catalog = SchemaCatalog(engine, schema=LOCAL_SCHEMA) if DB_BACKEND == "duckdb" else SchemaCatalog(engine)
+try:
+    schema_catalog.load()
+except Exception as e:
+    print(f"Error loading schema catalog (will retry on first request): {e}")
+    schema_catalog.invalidate()
+
+# --- Lookup Index ---
+# States, religions, languages, rural/urban and age groups with their ids, loaded once at startup.
+lookup_index = LookupIndex()
+try:
+    lookup_index.load(engine)
+except Exception as e:
+    print(f"Error loading lookup index: {e}")
+
+# --- Generation Cache ---
+# Fuzzy hits must name the same states, religions, languages, etc. as the cached question.
+generation_cache = GenerationCache(
+    max_entries=GENERATION_CACHE_SIZE,
+    ttl_seconds=GENERATION_CACHE_TTL,
+    fuzzy_threshold=GENERATION_CACHE_FUZZY_THRESHOLD,
+    entity_extractor=lookup_index.extract,
+)
+
+# --- Rollup Cubes ---
+# Pre-aggregated (state, tru, dimension) grouping sets built by the loader; aggregates read them when they can.
+cube_rewriter = CubeRewriter()
+if CUBE_REWRITE:
+    try:
+        cube_rewriter.load(engine)
+    except Exception as e:
+        print(f"Error loading rollup cubes: {e}")
+
+# --- Template Router ---
+# Known question shapes are answered from Template/ without calling the LLM.
+query_router = QueryRouter()
+if ROUTER_ENABLED:
+    try:
+        query_router.set_vocabulary(lookup_index.vocabulary(), lookup_index.aliases())
+        query_router.load_templates(TEMPLATE_DIR)
+    except Exception as e:
+        print(f"Error loading query router templates: {e}")
+
+# --- Schema Linker ---
+# Prunes the prompt schema to the tables/columns a question needs (plus their join keys).
+schema_linker = SchemaLinker(schema_catalog, entity_extractor=lookup_index.extract)
+
+# --- Query Result Cache ---
+query_cache = QueryCache(max_bytes=QUERY_CACHE_MAX_BYTES)
+
+# --- Batch Rate Limiter ---
+# Shared by every batch so concurrent batches together stay under the provider's limit.
+batch_rate_limiter = TokenBucket(rate=BATCH_RATE_LIMIT_RPM / 60, capacity=BATCH_RATE_LIMIT_BURST)
+
+# --- Request Coalescing ---
+# Concurrent identical generations / SELECTs share one underlying LLM call / DB round trip.
+generation_flight = SingleFlight("generation")
+execution_flight = SingleFlight("execution")
+
+# --- Prompts ---
+SELECT_PROMPT_TEMPLATE = """
+    You are an expert in converting English questions to **read-only SELECT** queries for a PostgreSQL database.
+    Given the database schema below, write a SQL query that answers the user's question. The query may require joining tables.
+    **Only output a SELECT query.** Do not output any other type of SQL statement.
+    **Important**: For any text-based filtering (e.g., in a WHERE clause), use the `ILIKE` operator for case-insensitive matching. The correct syntax is `column_name ILIKE 'value'`. For example: `WHERE district ILIKE 'pune'`. Do not use `ILIKE column_name = 'value'`.
+    **Areas**: `<name>_stats` tables hold India (state = 0) and state-level rows. For districts or smaller areas, query `<name>_stats_by_area` joined to `region_hierarchy` on `region_id` and filter on `region_hierarchy.name` and `level` (e.g. `level = 'DISTRICT'`); `district_code = 0` rows there are state totals.
+    Carefully select only the columns asked for in the question.
+
+    Schema:
+    {schema}
+
+    Question: {question}
+
+    SQL SELECT Query:
+    """
+
+OTHER_PROMPT_TEMPLATE = """
+    You are an expert in converting English instructions into data modification (DML) or schema modification (DDL) SQL commands for a PostgreSQL database.
+    Given the database schema below, write a single SQL command that performs the requested action.
+    **This is for expert use. The generated query can be INSERT, UPDATE, DELETE, CREATE, ALTER, or DROP.**
+
+    For INSERT statements, you can add multiple records at once if the instruction implies it. For example, the instruction "Add population data for Thane (1.8m male, 1.6m female) and Dombivli (600k male, 550k female) in Maharashtra for 2011" should generate:
+    INSERT INTO population (state, district, year, male, female, total) VALUES
+    ('Maharashtra', 'Thane', 2011, 1800000, 1600000, 3400000),
+    ('Maharashtra', 'Dombivli', 2011, 600000, 550000, 1150000);
+    Remember to calculate the 'total' column yourself by adding male and female.
+
+    **Important**: For any text-based filtering (e.g., in a WHERE clause), use the `ILIKE` operator for case-insensitive matching. The correct syntax is `column_name ILIKE 'value'`. For example: `WHERE district ILIKE 'pune'`. Do not use `ILIKE column_name = 'value'`.
+    Carefully select only the columns asked for in the question. And dont use \\n in the output.
+
+    Schema:
+    {schema}
+
+    Instruction: {question}
+
+    SQL Command:
+    """
+
+# --- LLM Client ---
+# Built once per process so chains and HTTP connections are reused across requests.
+model_client = ModelClient(
+    prompts={"select": SELECT_PROMPT_TEMPLATE, "other": OTHER_PROMPT_TEMPLATE},
+    backend=LLM_BACKEND,
+    model=LLM_MODEL,
+    base_url=LOCAL_LLM_URL,
+    stub_response=STUB_LLM_RESPONSE,
+    stub_delay=STUB_LLM_DELAY,
+)
+
 # --- Pydantic Models ---
 class GenerateSQLRequest(BaseModel):
     question: str = Field(..., description="The natural language instruction to convert to SQL.")
@@ -67,6 +263,13 @@ class GenerateSQLRequest(BaseModel):
 class GenerateSQLResponse(BaseModel):
     question: str
     sql_query: str
+    cache: str = "miss"
+    path: str = "model" # "template" | "model"
+
+class GenerateBatchRequest(BaseModel):
+    questions: List[str] = Field(..., description="The natural language questions to convert to SQL.")
+    kind: str = Field("select", description="'select' or 'other' (DML/DDL).")
+    max_concurrency: int | None = Field(None, description="Concurrent generations (capped by the server setting).")
 
 class ExecuteSQLRequest(BaseModel):
     sql_query: str = Field(..., description="The SQL query to execute.")
@@ -77,61 +280,110 @@ class ExecuteSQLResponse(BaseModel):
     result: Union[List[Dict[str, Any]], Dict[str, int], str]
     latency_ms: float
     status: str
+    cache: str | None = None # "hit" | "miss"; None when the query is not cacheable
+    latency_saved_ms: float | None = None
 
 # --- Logging ---
+# Rows are buffered in memory and written in batches by a background thread,
+# so requests never wait on file I/O.
+_log_options = dict(backend=LOG_BACKEND, directory=LOG_DIR, flush_interval=LOG_FLUSH_INTERVAL,
+                    max_bytes=LOG_MAX_BYTES, per_worker=LOG_PER_WORKER)
+generation_logger = BufferedLogWriter(GENERATION_LOG_NAME, ["question", "generated_sql_query"], **_log_options)
+metrics_logger = BufferedLogWriter(METRICS_LOG_NAME, ["question", "sql_query", "latency_ms", "status"], **_log_options)
+
 def log_generation(question: str, sql_query: str):
-    """Logs the user question and the generated SQL query to a separate CSV file."""
-    file_exists = os.path.isfile(GENERATION_LOG_FILE)
-    with open(GENERATION_LOG_FILE, "a", newline="") as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow(["question", "generated_sql_query"])
-        writer.writerow([question, sql_query])
+    """Logs the user question and the generated SQL query to a separate log."""
+    generation_logger.log([question, sql_query])
 
 def log_metrics(question: str | None, sql_query: str, latency: float, status: str):
-    """Logs the performance and result of a query to a CSV file."""
-    file_exists = os.path.isfile(LOG_FILE)
-    with open(LOG_FILE, "a", newline="") as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow(["question", "sql_query", "latency_ms", "status"])
-        writer.writerow([question or "N/A", sql_query, latency, status])
+    """Logs the performance and result of a query."""
+    metrics_logger.log([question or "N/A", sql_query, latency, status])
 
 # --- Core Logic ---
-def get_schema(engine):
-    """Retrieves the schema for all tables in the public schema for PostgreSQL."""
+async def get_schema():
+    """Returns the cached schema prompt text for all tables in the public schema."""
     try:
-        inspector = inspect(engine)
-        schema_info = []
-        table_names = inspector.get_table_names(schema='public')
-        for table_name in table_names:
-            columns = inspector.get_columns(table_name, schema='public')
-            column_names = ", ".join([col['name'] for col in columns])
-            schema_info.append(f"Table '{table_name}' has columns: {column_names}")
-        return "\n".join(schema_info)
+        if schema_catalog.stale:
+            # Introspection is blocking; keep it off the event loop.
+            return await run_in_threadpool(schema_catalog.get_prompt_text)
+        return schema_catalog.get_prompt_text()
     except Exception as e:
         print(f"Error retrieving schema: {e}")
         return "Could not retrieve schema from the database."
 
-def _generate_query(question: str, prompt_template: str) -> GenerateSQLResponse:
+def is_write_query(sql_query: str) -> bool:
+    """True for statements that don't return rows and must run in a transaction (DDL included)."""
+    return statement_kind(sql_query) != "read"
+
+def rows_to_records(result_proxy) -> List[Dict[str, Any]]:
+    """Converts a result into JSON-friendly records (NUMERIC -> float, as pandas did)."""
+    columns = list(result_proxy.keys())
+    return [
+        {col: float(val) if isinstance(val, Decimal) else val for col, val in zip(columns, row)}
+        for row in result_proxy.fetchall()
+    ]
+
+async def _run_select(sql_query: str, tables: frozenset | None) -> tuple[tuple, List[Dict[str, Any]]]:
+    """
+    Runs a read-only query and returns (cache generation of its tables before it ran, rows
+    as records). Requests sharing the call share the snapshot, so none caches stale rows.
+    """
+    generation = query_cache.generation(tables)
+    async with async_engine.connect() as connection:
+        result_proxy = await connection.execute(text(sql_query))
+        return generation, rows_to_records(result_proxy)
+
+async def _generate_query(question: str, kind: str, rate_limiter: TokenBucket | None = None) -> GenerateSQLResponse:
+    """Generates SQL for a question, sharing the work with identical in-flight requests."""
+    response = await generation_flight.do(
+        (kind, normalize_question(question)),
+        lambda: _generate_query_once(question, kind, rate_limiter),
+    )
+    return GenerateSQLResponse(question=question, sql_query=response.sql_query, cache=response.cache, path=response.path)
+
+async def _generate_query_once(question: str, kind: str, rate_limiter: TokenBucket | None = None) -> GenerateSQLResponse:
     """Helper function to invoke the LLM for SQL generation."""
-    db_schema = get_schema(engine)
+    if kind == "select" and ROUTER_ENABLED:
+        match = query_router.route(question)
+        if match is not None:
+            sql_query = lookup_index.rewrite_sql(match.sql_query) if ENTITY_REWRITE else match.sql_query
+            if CUBE_REWRITE:
+                sql_query = cube_rewriter.rewrite_sql(sql_query)
+            log_generation(question, sql_query)
+            return GenerateSQLResponse(question=question, sql_query=sql_query, cache="miss", path="template")
+
+    db_schema = await get_schema()
     if "Could not retrieve" in db_schema:
          raise HTTPException(status_code=500, detail="Could not retrieve database schema.")
-    
-    prompt = PromptTemplate(
-        input_variables=["schema", "question"],
-        template=prompt_template
-    )
-    
-    llm = ChatGroq(model="llama-3.1-8b-instant", temperature=0)
-    sql_generation_chain = prompt | llm
-    
+
+    schema_version = schema_catalog.version
+    cached_sql, cache_status = generation_cache.get(question, kind, schema_version)
+    if cached_sql is not None:
+        return GenerateSQLResponse(question=question, sql_query=cached_sql, cache=cache_status)
+
+    if SCHEMA_PRUNING:
+        try:
+            db_schema = schema_linker.prune(question, db_schema)
+            hints = lookup_index.hints(question)
+            if hints:
+                db_schema = f"{db_schema}\n{hints}"
+        except Exception as e:
+            print(f"Schema pruning failed, sending the full schema: {e}")
+
+    if rate_limiter is not None:
+        # Only actual LLM calls count against the provider's rate limit.
+        await rate_limiter.acquire()
+
     try:
-        response_content = sql_generation_chain.invoke({"schema": db_schema, "question": question}).content
+        response_content = await model_client.ainvoke(kind, db_schema, question)
         sql_query = response_content.strip().replace("`", "").replace("sql", "") # Clean up LLM output
+        if ENTITY_REWRITE and kind == "select":
+            sql_query = lookup_index.rewrite_sql(sql_query)
+        if CUBE_REWRITE and kind == "select":
+            sql_query = cube_rewriter.rewrite_sql(sql_query)
         # Log the successful generation
         log_generation(question, sql_query)
+        generation_cache.put(question, kind, schema_version, sql_query)
         return GenerateSQLResponse(question=question, sql_query=sql_query)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"LLM Error: {e}")
@@ -145,21 +397,7 @@ async def generate_select_sql(request: GenerateSQLRequest):
     if not request.question.strip():
         raise HTTPException(status_code=400, detail="Question cannot be empty.")
 
-    prompt_template = """
-    You are an expert in converting English questions to **read-only SELECT** queries for a PostgreSQL database.
-    Given the database schema below, write a SQL query that answers the user's question. The query may require joining tables.
-    **Only output a SELECT query.** Do not output any other type of SQL statement.
-    **Important**: For any text-based filtering (e.g., in a WHERE clause), use the `ILIKE` operator for case-insensitive matching. The correct syntax is `column_name ILIKE 'value'`. For example: `WHERE district ILIKE 'pune'`. Do not use `ILIKE column_name = 'value'`.
-    Carefully select only the columns asked for in the question.
-
-    Schema:
-    {schema}
-
-    Question: {question}
-
-    SQL SELECT Query:
-    """
-    return _generate_query(request.question, prompt_template)
+    return await _generate_query(request.question, kind="select")
 
 @app.post("/generate-other-sql", response_model=GenerateSQLResponse)
 async def generate_other_sql(request: GenerateSQLRequest):
@@ -170,28 +408,77 @@ async def generate_other_sql(request: GenerateSQLRequest):
     if not request.question.strip():
         raise HTTPException(status_code=400, detail="Instruction cannot be empty.")
 
-    prompt_template = """
-    You are an expert in converting English instructions into data modification (DML) or schema modification (DDL) SQL commands for a PostgreSQL database.
-    Given the database schema below, write a single SQL command that performs the requested action.
-    **This is for expert use. The generated query can be INSERT, UPDATE, DELETE, CREATE, ALTER, or DROP.**
-
-    For INSERT statements, you can add multiple records at once if the instruction implies it. For example, the instruction "Add population data for Thane (1.8m male, 1.6m female) and Dombivli (600k male, 550k female) in Maharashtra for 2011" should generate:
-    INSERT INTO population (state, district, year, male, female, total) VALUES
-    ('Maharashtra', 'Thane', 2011, 1800000, 1600000, 3400000),
-    ('Maharashtra', 'Dombivli', 2011, 600000, 550000, 1150000);
-    Remember to calculate the 'total' column yourself by adding male and female.
-
-    **Important**: For any text-based filtering (e.g., in a WHERE clause), use the `ILIKE` operator for case-insensitive matching. The correct syntax is `column_name ILIKE 'value'`. For example: `WHERE district ILIKE 'pune'`. Do not use `ILIKE column_name = 'value'`.
-    Carefully select only the columns asked for in the question. And dont use \\n in the output.
+    return await _generate_query(request.question, kind="other")
 
-    Schema:
-    {schema}
-
-    Instruction: {question}
+def _is_rate_limit_error(detail: str) -> bool:
+    detail = detail.lower()
+    return "429" in detail or "rate limit" in detail or "rate_limit" in detail
 
-    SQL Command:
+@app.post("/generate-batch")
+async def generate_batch(request: GenerateBatchRequest):
+    """
+    Generates SQL for many questions at once and streams NDJSON results as they complete.
+    Identical questions are generated once; every line carries the `index` of the question
+    in the request. LLM calls run under a concurrency cap and a shared token-bucket rate
+    limiter, and are retried with backoff when the provider reports a rate limit.
     """
-    return _generate_query(request.question, prompt_template)
+    if request.kind not in ("select", "other"):
+        raise HTTPException(status_code=400, detail="kind must be 'select' or 'other'.")
+    if not request.questions:
+        raise HTTPException(status_code=400, detail="Questions cannot be empty.")
+    if len(request.questions) > BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_QUESTIONS} questions per batch.")
+
+    # Deduplicate: normalized question -> indices in the request
+    groups: Dict[str, List[int]] = {}
+    for index, question in enumerate(request.questions):
+        if question.strip():
+            groups.setdefault(normalize_question(question), []).append(index)
+
+    concurrency = max(1, min(request.max_concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(key: str, question: str):
+        async with semaphore:
+            for attempt in range(BATCH_MAX_RETRIES + 1):
+                try:
+                    return key, await _generate_query(question, request.kind, rate_limiter=batch_rate_limiter), None
+                except HTTPException as e:
+                    if attempt < BATCH_MAX_RETRIES and _is_rate_limit_error(str(e.detail)):
+                        backoff = 2 ** attempt
+                        batch_rate_limiter.penalize(backoff)
+                        await asyncio.sleep(backoff)
+                        continue
+                    return key, None, str(e.detail)
+                except Exception as e:
+                    return key, None, str(e)
+
+    async def generate():
+        start_time = time.time()
+        # Lines for empty questions go out first; they need no work.
+        for index, question in enumerate(request.questions):
+            if not question.strip():
+                yield (json.dumps({"index": index, "question": question, "status": "error",
+                                   "error": "Question cannot be empty."}) + "\n").encode("utf-8")
+
+        tasks = [asyncio.create_task(run_one(key, request.questions[indices[0]])) for key, indices in groups.items()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                key, response, error = await next_done
+                for index in groups[key]:
+                    line = {"index": index, "question": request.questions[index]}
+                    if response is not None:
+                        line.update(status="success", sql_query=response.sql_query, path=response.path, cache=response.cache)
+                    else:
+                        line.update(status="error", error=error)
+                    line["elapsed_ms"] = (time.time() - start_time) * 1000
+                    yield (json.dumps(line) + "\n").encode("utf-8")
+        finally:
+            # Client went away: don't keep spending LLM calls on the rest.
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
 
 @app.post("/execute-sql", response_model=ExecuteSQLResponse)
 async def execute_sql(request: ExecuteSQLRequest):
@@ -202,32 +489,133 @@ async def execute_sql(request: ExecuteSQLRequest):
         raise HTTPException(status_code=400, detail="SQL query cannot be empty.")
 
     start_time = time.time()
+    canonical_sql, tables = analyze_sql(request.sql_query)
+    kind = statement_kind(request.sql_query)
+    write_query = kind != "read"
+    use_cache = query_cache.max_bytes > 0 and not write_query and is_cacheable(canonical_sql)
+
+    cached = query_cache.get(canonical_sql) if use_cache else None
+    if cached is not None:
+        latency = (time.time() - start_time) * 1000
+        log_metrics(request.question, request.sql_query, latency, "success")
+        return ExecuteSQLResponse(
+            sql_query=request.sql_query,
+            result=cached.result,
+            latency_ms=latency,
+            status="success",
+            cache="hit",
+            latency_saved_ms=cached.latency_ms - latency,
+        )
+
     try:
-        with engine.connect() as connection:
-            # For queries that don't return rows (like INSERT, UPDATE, DELETE), use a transaction
-            if any(keyword in request.sql_query.strip().upper() for keyword in ["INSERT", "UPDATE", "DELETE", "CREATE", "ALTER", "DROP"]):
-                 with connection.begin(): # Start transaction
-                    result_proxy = connection.execute(text(request.sql_query))
+        # For queries that don't return rows (like INSERT, UPDATE, DELETE), use a transaction
+        if write_query:
+            async with async_engine.connect() as connection:
+                async with connection.begin(): # Start transaction
+                    result_proxy = await connection.execute(text(request.sql_query))
                     result = {"rows_affected": result_proxy.rowcount}
-            else: # For SELECT queries
-                df = pd.read_sql_query(sql=text(request.sql_query), con=connection)
-                result = df.to_dict(orient='records')
-
-            status = "success"
+            if kind == "ddl":
+                schema_catalog.invalidate()
+                query_cache.clear()
+            else:
+                query_cache.invalidate_tables(tables or None)
+        else: # For SELECT queries; identical concurrent ones share a single round trip
+            generation, result = await execution_flight.do(canonical_sql, lambda: _run_select(request.sql_query, tables))
+
+        status = "success"
     except Exception as e:
         result = str(e)
         status = "error"
         
     latency = (time.time() - start_time) * 1000
     log_metrics(request.question, request.sql_query, latency, status)
+    if use_cache and status == "success":
+        query_cache.put(canonical_sql, tables, result, latency, generation)
     
     return ExecuteSQLResponse(
         sql_query=request.sql_query,
         result=result,
         latency_ms=latency,
-        status=status
+        status=status,
+        cache="miss" if use_cache else None,
     )
 
+@app.post("/execute-sql/stream")
+async def execute_sql_stream(request: ExecuteSQLRequest, format: str = "ndjson"):
+    """
+    Executes a read-only query and streams the rows back as they are fetched.
+    Rows come from a server-side cursor in chunks of `STREAM_CHUNK_SIZE`, so memory stays flat
+    regardless of the result size. `format` is `ndjson` (one JSON object per line) or `arrow`
+    (Apache Arrow IPC stream).
+    """
+    if not request.sql_query.strip():
+        raise HTTPException(status_code=400, detail="SQL query cannot be empty.")
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'. Use one of: {', '.join(STREAM_FORMATS)}.")
+    if format == "arrow" and importlib.util.find_spec("pyarrow") is None:
+        raise HTTPException(status_code=501, detail="Arrow output requires pyarrow to be installed.")
+    if is_write_query(request.sql_query):
+        raise HTTPException(status_code=400, detail="Only read-only queries can be streamed. Use /execute-sql instead.")
+
+    async def generate():
+        start_time = time.time()
+        status = "success"
+        try:
+            async with async_engine.connect() as connection:
+                result = await connection.stream(text(request.sql_query), execution_options={"yield_per": STREAM_CHUNK_SIZE})
+                streamer = ResultStreamer(result.keys(), result.partitions())
+                body = streamer.ndjson() if format == "ndjson" else streamer.arrow()
+                async for chunk in body:
+                    yield chunk
+        except Exception as e:
+            status = "error"
+            # The status line has already been sent; report the failure in-band.
+            if format == "ndjson":
+                yield (json.dumps({"error": str(e)}) + "\n").encode("utf-8")
+        finally:
+            latency = (time.time() - start_time) * 1000
+            log_metrics(request.question, request.sql_query, latency, status)
+
+    return StreamingResponse(generate(), media_type=STREAM_FORMATS[format])
+
+@app.post("/admin/refresh-schema")
+async def refresh_schema():
+    """
+    Forces a reload of the cached database schema used in generation prompts
+    (and of the rollup cubes, which the loader may have rebuilt).
+    """
+    try:
+        await run_in_threadpool(schema_catalog.load)
+        if CUBE_REWRITE:
+            await run_in_threadpool(cube_rewriter.load, engine)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Could not refresh schema: {e}")
+    return schema_catalog.info()
+
+@app.get("/admin/cache-stats")
+async def cache_stats():
+    """
+    Returns hit/miss counters for the SQL generation and query result caches.
+    """
+    return {
+        "generation": generation_cache.stats(),
+        "query": query_cache.stats(),
+        "router": query_router.stats(),
+        "schema_linker": schema_linker.stats(),
+        "lookup_index": lookup_index.stats(),
+        "rollup_cubes": cube_rewriter.stats(),
+        "batch_rate_limiter": batch_rate_limiter.stats(),
+        "single_flight": {"generation": generation_flight.stats(), "execution": execution_flight.stats()},
+        "llm": model_client.info(),
+    }
+
+@app.get("/admin/log-stats")
+async def log_stats():
+    """
+    Returns buffer and write counters for the generation and metrics logs.
+    """
+    return {"generation": generation_logger.stats(), "metrics": metrics_logger.stats()}
+
 @app.get("/", include_in_schema=False)
 async def root():
     return {"message": "Text-to-SQL API is running. Go to /docs for the API documentation."}
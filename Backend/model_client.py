@@ -0,0 +1,84 @@
+import threading
+from langchain_core.prompts import PromptTemplate
+
+# --- Configuration ---
+DEFAULT_GROQ_MODEL = "llama-3.1-8b-instant"
+DEFAULT_LOCAL_URL = "http://localhost:8080/v1" # llama.cpp / vLLM OpenAI-compatible server
+DEFAULT_STUB_RESPONSE = "SELECT 1;"
+DEFAULT_MODELS = {"groq": DEFAULT_GROQ_MODEL, "local": "local-model", "stub": "stub"}
+BACKENDS = tuple(DEFAULT_MODELS)
+
+
+class ModelClient:
+    """
+    Process-wide registry of LLM chains, one per prompt kind (e.g. "select", "other").
+
+    The chat model (and therefore its HTTP connection pool) and every prompt chain are
+    built once and reused for all requests. The backend is pluggable:
+      - "groq":  ChatGroq (default)
+      - "local": any OpenAI-compatible server, e.g. llama.cpp's `server` (needs langchain-openai)
+      - "stub":  canned response with an optional artificial delay, for load tests
+    """
+
+    def __init__(self, prompts: dict[str, str], backend: str = "groq", model: str | None = None,
+                 base_url: str | None = None, stub_response: str = DEFAULT_STUB_RESPONSE,
+                 stub_delay: float = 0.0):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown LLM backend '{backend}'. Expected one of {BACKENDS}.")
+        self.backend = backend
+        self.model = model or DEFAULT_MODELS[backend]
+        self.base_url = base_url
+        self.stub_response = stub_response
+        self.stub_delay = stub_delay
+        self.prompts = prompts
+        self.llm = self._build_llm()
+        self._chains = {}
+        self._lock = threading.Lock()
+        for kind in prompts:
+            self.chain(kind)
+
+    def _build_llm(self):
+        """Creates the single chat model instance shared by every chain."""
+        if self.backend == "groq":
+            from langchain_groq import ChatGroq
+            return ChatGroq(model=self.model, temperature=0)
+
+        if self.backend == "local":
+            try:
+                from langchain_openai import ChatOpenAI
+            except ImportError as e:
+                raise ImportError("The 'local' LLM backend requires `pip install langchain-openai`.") from e
+            return ChatOpenAI(
+                model=self.model,
+                base_url=self.base_url or DEFAULT_LOCAL_URL,
+                api_key="not-needed",
+                temperature=0,
+            )
+
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        return FakeListChatModel(responses=[self.stub_response], sleep=self.stub_delay or None)
+
+    def chain(self, kind: str):
+        """Returns the (cached) prompt | llm chain for a prompt kind."""
+        chain = self._chains.get(kind)
+        if chain is None:
+            with self._lock:
+                chain = self._chains.get(kind)
+                if chain is None:
+                    prompt = PromptTemplate(input_variables=["schema", "question"], template=self.prompts[kind])
+                    chain = prompt | self.llm
+                    self._chains[kind] = chain
+        return chain
+
+    def invoke(self, kind: str, schema: str, question: str) -> str:
+        """Runs the chain for `kind` and returns the raw response text."""
+        return self.chain(kind).invoke({"schema": schema, "question": question}).content
+
+    async def ainvoke(self, kind: str, schema: str, question: str) -> str:
+        """Async variant of `invoke`; does not block the event loop while waiting on the LLM."""
+        response = await self.chain(kind).ainvoke({"schema": schema, "question": question})
+        return response.content
+
+    def info(self) -> dict:
+        """Backend summary for the admin endpoints."""
+        return {"backend": self.backend, "model": self.model, "kinds": sorted(self._chains)}
@@ -0,0 +1,227 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+try:
+    import sqlglot
+    from sqlglot import exp
+except ImportError: # Fall back to the regex canonicalizer below
+    sqlglot = None
+
+# --- Configuration ---
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRY_BYTES = 8 * 1024 * 1024
+
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_VOLATILE = re.compile(r"\b(?:RANDOM|NOW|CLOCK_TIMESTAMP|TIMEOFDAY|NEXTVAL|CURRENT_DATE|CURRENT_TIME|CURRENT_TIMESTAMP|LOCALTIMESTAMP)\b", re.IGNORECASE)
+# Leading keywords of statements that change the schema, and of other statements that don't only read
+DDL_KEYWORDS = ("CREATE", "ALTER", "DROP", "TRUNCATE", "RENAME")
+WRITE_KEYWORDS = ("INSERT", "UPDATE", "DELETE", "MERGE", "COPY", "GRANT", "REVOKE", "REFRESH",
+                  "VACUUM", "CLUSTER", "REINDEX", "CALL", "COMMENT", "SET", "RESET", "LOCK")
+# Data-modifying keywords that make a statement a write wherever they appear (CTEs, EXPLAIN ANALYZE)
+DML_KEYWORDS = ("INSERT", "UPDATE", "DELETE", "MERGE")
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN|INTO|UPDATE|TABLE)\s+(?:ONLY\s+)?(?:IF\s+(?:NOT\s+)?EXISTS\s+)?([A-Za-z_][\w.\"]*)", re.IGNORECASE)
+
+
+def _regex_canonicalize(sql_query: str) -> str:
+    """Collapses whitespace and upper-cases everything outside quoted literals/identifiers."""
+    parts = _QUOTED.split(sql_query.strip().rstrip(";"))
+    return "".join(
+        part if i % 2 else re.sub(r"\s+", " ", part).upper()
+        for i, part in enumerate(parts)
+    ).strip()
+
+
+def _keyword_statement_kind(sql_query: str) -> str:
+    """Fallback for `statement_kind`: whole keywords outside quotes, not substrings."""
+    kinds = set()
+    for statement in _QUOTED.sub(" ", sql_query).upper().split(";"):
+        words = re.findall(r"[A-Za-z_]\w*", statement)
+        if words and words[0] in DDL_KEYWORDS:
+            kinds.add("ddl")
+        elif words and words[0] in WRITE_KEYWORDS or any(word in DML_KEYWORDS for word in words):
+            kinds.add("write")
+    return next((kind for kind in ("ddl", "write") if kind in kinds), "read")
+
+
+def statement_kind(sql_query: str) -> str:
+    """
+    Classifies SQL as "read" (only returns rows), "write" (changes data) or "ddl" (changes
+    the schema). Multi-statement SQL takes the strongest kind; a SELECT with a
+    data-modifying CTE is a write, and SELECT ... INTO creates a table.
+    """
+    if sqlglot is not None:
+        try:
+            expressions = [e for e in sqlglot.parse(sql_query, read="postgres") if e is not None]
+        except Exception:
+            expressions = []
+        if expressions:
+            kinds = set()
+            for e in expressions:
+                if isinstance(e, exp.Command):
+                    kinds.add(_keyword_statement_kind(e.sql(dialect="postgres")))
+                elif isinstance(e, (exp.Create, exp.Drop, exp.Alter, exp.TruncateTable)) or (
+                        isinstance(e, exp.Select) and e.args.get("into")):
+                    kinds.add("ddl")
+                elif not isinstance(e, exp.Query) or e.find(exp.Insert, exp.Update, exp.Delete, exp.Merge):
+                    kinds.add("write")
+                else:
+                    kinds.add("read")
+            return next(kind for kind in ("ddl", "write", "read") if kind in kinds)
+    return _keyword_statement_kind(sql_query)
+
+
+def is_cacheable(canonical_sql: str) -> bool:
+    """False for queries whose result changes between runs (RANDOM(), NOW(), ...)."""
+    return _VOLATILE.search(_QUOTED.sub("''", canonical_sql)) is None
+
+
+def _bare_table_name(name: str) -> str:
+    return name.replace('"', "").split(".")[-1].lower()
+
+
+def analyze_sql(sql_query: str) -> tuple[str, frozenset | None]:
+    """
+    Returns (canonical SQL, referenced table names).
+
+    String literals are preserved exactly, so `ILIKE 'kerala'` and `ILIKE 'Kerala'` are
+    different keys. Tables are None when they cannot be determined reliably.
+    """
+    if sqlglot is not None:
+        try:
+            expressions = [e for e in sqlglot.parse(sql_query, read="postgres") if e is not None]
+            if expressions:
+                canonical = ";\n".join(e.sql(dialect="postgres") for e in expressions)
+                ctes = {cte.alias_or_name.lower() for e in expressions for cte in e.find_all(exp.CTE)}
+                tables = frozenset(
+                    t.name.lower() for e in expressions for t in e.find_all(exp.Table)
+                    if t.name and t.name.lower() not in ctes
+                )
+                return canonical, tables
+        except Exception:
+            pass
+    tables = frozenset(_bare_table_name(m) for m in _TABLE_REF.findall(sql_query))
+    return _regex_canonicalize(sql_query), tables or None
+
+
+@dataclass
+class QueryCacheEntry:
+    """A cached SELECT result."""
+    result: Any
+    tables: frozenset | None
+    size_bytes: int
+    latency_ms: float
+    created_at: float
+
+
+class QueryCache:
+    """
+    Memory-bounded LRU cache of SELECT results keyed on canonicalized SQL.
+
+    Writes executed through the API call `invalidate_tables` with the tables they touch;
+    every cached result that reads one of those tables is dropped. If the touched tables
+    are unknown, the whole cache is cleared. The cache is per process: with several
+    uvicorn workers, a write only invalidates the worker that executed it.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_entry_bytes: int = DEFAULT_MAX_ENTRY_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: OrderedDict[str, QueryCacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.latency_saved_ms = 0.0
+        # Bumped by every invalidation of a table (or of everything), so a result read
+        # before a write can be recognised and not cached after it.
+        self._table_generations: dict[str, int] = {}
+        self._clears = 0
+        self._writes = 0
+
+    def _generation_locked(self, tables: frozenset | None) -> tuple:
+        if tables is None:
+            return (self._writes,)
+        return (self._clears,) + tuple(self._table_generations.get(t, 0) for t in sorted(tables))
+
+    def generation(self, tables: frozenset | None) -> tuple:
+        """Snapshot to take before running a query over `tables`, and pass to `put`."""
+        with self._lock:
+            return self._generation_locked(tables)
+
+    def get(self, canonical_sql: str) -> QueryCacheEntry | None:
+        """Returns the cached entry for a canonical query, if any."""
+        with self._lock:
+            entry = self._entries.get(canonical_sql)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(canonical_sql)
+            self.hits += 1
+            self.latency_saved_ms += entry.latency_ms
+            return entry
+
+    def put(self, canonical_sql: str, tables: frozenset | None, result: Any, latency_ms: float, generation: tuple):
+        """
+        Caches a result unless it is larger than the per-entry budget, or one of its tables
+        was invalidated since `generation` was taken (the rows may predate that write).
+        """
+        size_bytes = len(json.dumps(result, default=str))
+        if size_bytes > self.max_entry_bytes or size_bytes > self.max_bytes:
+            return
+        entry = QueryCacheEntry(result, tables, size_bytes, latency_ms, time.time())
+        with self._lock:
+            if self._generation_locked(tables) != generation:
+                return
+            old = self._entries.pop(canonical_sql, None)
+            if old is not None:
+                self.current_bytes -= old.size_bytes
+            self._entries[canonical_sql] = entry
+            self.current_bytes += size_bytes
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.size_bytes
+                self.evictions += 1
+
+    def invalidate_tables(self, tables: frozenset | None):
+        """Drops every entry that reads any of `tables` (everything if tables is None)."""
+        with self._lock:
+            self._writes += 1
+            if tables is None:
+                self._clears += 1
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                self.current_bytes = 0
+                return
+            for table in tables:
+                self._table_generations[table] = self._table_generations.get(table, 0) + 1
+            stale = [key for key, entry in self._entries.items()
+                     if entry.tables is None or entry.tables & tables]
+            for key in stale:
+                self.current_bytes -= self._entries.pop(key).size_bytes
+            self.invalidations += len(stale)
+
+    def clear(self):
+        """Removes every entry."""
+        self.invalidate_tables(None)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for the admin endpoint."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "latency_saved_ms": round(self.latency_saved_ms, 3),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
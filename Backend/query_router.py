@@ -0,0 +1,275 @@
+import glob
+import os
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from generation_cache import _stem
+
+# --- Configuration ---
+DEFAULT_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Template")
+SLOT_TYPES = ("state", "religion", "language", "tru")
+
+# Only function words are dropped from the question shape; content words must match exactly.
+ROUTER_STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "at", "for", "to", "by", "with", "from", "is", "are", "was",
+    "were", "do", "does", "did", "me", "please", "what", "which", "how", "show", "list", "give",
+    "tell", "find", "get", "there",
+}
+# Lookup values that are also ordinary English words never become slots.
+AMBIGUOUS_VALUES = {"total", "others", "are", "war", "name", "rai", "adi", "chang", "ho", "kol", "mao", "mara"}
+# TRU names are only slots when said explicitly; "Total" is the implicit default in every template.
+TRU_SLOT_VALUES = {"rural", "urban"}
+# Share of a question shape's templates that must agree on its SQL for the shape to be routed
+TEMPLATE_AGREEMENT = 0.75
+# Name column a slot's literal must be compared with (lookup_index.LOOKUP_TABLES)
+SLOT_COLUMNS = {"state": "area_name", "religion": "religion_name", "language": "name", "tru": "name"}
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+
+def load_sql_file(filepath: str) -> list[str]:
+    """Splits a .sql file on ';' and flattens each statement onto one line."""
+    with open(filepath, "r", encoding="utf-8") as f:
+        raw_queries = f.read().split(";")
+    queries = []
+    for q in raw_queries:
+        flattened = re.sub(" +", " ", q.replace("\n", " ").strip())
+        if flattened:
+            queries.append(flattened + ";")
+    return queries
+
+
+def load_question_file(filepath: str) -> list[str]:
+    """Reads questions line by line, skipping blanks."""
+    with open(filepath, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def slot_identifier(value: str) -> str:
+    """Identifier spelling of a lookup value, as templates use it in aliases ('Bhili/Bhilodi' -> 'bhili_bhilodi')."""
+    return re.sub(r"[^a-z0-9]+", "_", value.lower()).strip("_")
+
+
+@dataclass
+class QueryTemplate:
+    """A parameterized question -> SQL pair."""
+    question: str
+    sql_template: str
+    slots: list[str] = field(default_factory=list) # slot type per placeholder, in question order
+    source: str = ""
+
+
+@dataclass
+class RouteMatch:
+    """Result of a successful template lookup."""
+    sql_query: str
+    template: QueryTemplate
+    values: list[str]
+    latency_ms: float
+
+
+class QueryRouter:
+    """
+    Template fast path for NL -> SQL.
+
+    Question/SQL pairs from `Template/*question*.txt` + `*queries*.sql` are turned into
+    templates by replacing lookup values (state, religion, language, rural/urban) that appear
+    both in the question and as SQL string literals with typed slots. An incoming question is
+    reduced to the same shape (entities -> slots, function words dropped, light stemming) and
+    looked up in a dict; on a hit the slots are filled from the question. Anything else falls
+    through to the model path.
+    """
+
+    def __init__(self, vocabulary: dict[str, list[str]] | None = None):
+        self.templates: dict[tuple, QueryTemplate] = {}
+        self._candidates: dict[tuple, list[QueryTemplate]] = {} # every usable pair, per question shape
+        self.conflicts = 0
+        self.hits = 0
+        self.misses = 0
+        self.set_vocabulary(vocabulary or {})
+
+    # --- Vocabulary ---
+    def set_vocabulary(self, vocabulary: dict[str, list[str]], aliases: dict[str, tuple[str, str]] | None = None):
+        """
+        Builds the entity matcher from lookup-table values, e.g. {"state": ["Kerala", ...]}.
+        `aliases` maps extra spellings to (slot_type, canonical value), e.g. {"orissa": ("state", "Odisha")}.
+        """
+        self._surface: dict[str, tuple[str, str]] = {}
+        surface_forms = [(slot_type, value, value) for slot_type in SLOT_TYPES for value in vocabulary.get(slot_type, [])]
+        surface_forms += [(slot_type, alias, value) for alias, (slot_type, value) in (aliases or {}).items()
+                          if slot_type in SLOT_TYPES]
+        for slot_type, surface, value in surface_forms:
+            if not isinstance(surface, str) or not surface.strip():
+                continue
+            key = surface.strip().lower()
+            canonical = value.strip().lower()
+            if key in AMBIGUOUS_VALUES or (slot_type == "tru" and canonical not in TRU_SLOT_VALUES):
+                continue
+            # Earlier slot types win on collisions (a state name is never a language).
+            self._surface.setdefault(key, (slot_type, value.strip()))
+        if self._surface:
+            alternation = "|".join(re.escape(s) for s in sorted(self._surface, key=len, reverse=True))
+            self._entity_re = re.compile(rf"(?<![\w&])({alternation})(?:es|s)?(?![\w&])", re.IGNORECASE)
+        else:
+            self._entity_re = None
+
+    def extract_entities(self, question: str) -> list[tuple[str, str, int, int]]:
+        """Returns (slot_type, canonical value, start, end) for every entity mention."""
+        if self._entity_re is None:
+            return []
+        entities = []
+        for m in self._entity_re.finditer(question):
+            slot_type, value = self._surface[m.group(1).lower()]
+            entities.append((slot_type, value, m.start(), m.end()))
+        return entities
+
+    def question_shape(self, question: str) -> tuple[tuple, list[tuple[str, str]]]:
+        """Reduces a question to its template key plus the (slot_type, value) list it contained."""
+        entities = self.extract_entities(question)
+        parts, last = [], 0
+        for slot_type, _, start, end in entities:
+            parts.append(question[last:start])
+            parts.append(f" __{slot_type}__ ")
+            last = end
+        parts.append(question[last:])
+        shaped = "".join(parts).lower().replace("&", " and ")
+        tokens = re.sub(r"[^a-z0-9_\s]", " ", shaped).split()
+        key = tuple(_stem(t) for t in tokens if t not in ROUTER_STOPWORDS)
+        return key, [(slot_type, value) for slot_type, value, _, _ in entities]
+
+    # --- Templates ---
+    def add_template(self, question: str, sql_query: str, source: str = "") -> bool:
+        """
+        Parameterizes one question/SQL pair. Returns False if it cannot be used safely.
+
+        Each entity becomes a slot in the string literals it is compared with and in
+        identifiers spelled from it (`AS rural_population`, `total_muslim_population`), so
+        result columns are labelled for the value routed in. When several pairs share a
+        question shape, the SQL at least `TEMPLATE_AGREEMENT` of them agree on is used; a
+        split shape is dropped and falls through to the model.
+        """
+        key, entities = self.question_shape(question)
+        if not key:
+            return False
+        sql_template = sql_query.replace("{", "{{").replace("}", "}}")
+        slots, placeholders = [], {}
+        for slot_type, value in entities:
+            if value.lower() in placeholders:
+                slots.append(slot_type)
+                continue
+            placeholder = f"slot_{len(placeholders)}"
+            literal = re.compile(rf"'{re.escape(value)}'", re.IGNORECASE)
+            if not literal.search(sql_template):
+                # The question names an entity the SQL doesn't filter on; don't guess.
+                return False
+            if not self._compared_with(sql_template, literal, SLOT_COLUMNS[slot_type]):
+                # e.g. a religion named where the SQL filters languages: the question is mislabelled.
+                return False
+            sql_template = literal.sub(f"'{{{placeholder}}}'", sql_template)
+            sql_template = self._parameterize_identifiers(sql_template, value, placeholder)
+            if sql_template is None:
+                return False
+            placeholders[value.lower()] = placeholder
+            slots.append(slot_type)
+        if len(placeholders) != len(entities):
+            # Repeated values would make slot filling ambiguous.
+            return False
+
+        candidates = self._candidates.setdefault(key, [])
+        if any(c.sql_template != sql_template for c in candidates):
+            self.conflicts += 1
+        candidates.append(QueryTemplate(question, sql_template, slots, source))
+        sql_votes = Counter(c.sql_template for c in candidates)
+        winner, votes = sql_votes.most_common(1)[0]
+        if votes >= TEMPLATE_AGREEMENT * len(candidates):
+            self.templates[key] = next(c for c in candidates if c.sql_template == winner)
+        else:
+            self.templates.pop(key, None)
+        return self.templates.get(key) is not None and self.templates[key].sql_template == sql_template
+
+    @staticmethod
+    def _compared_with(sql: str, literal: re.Pattern, column: str) -> bool:
+        """True if every occurrence of `literal` is compared with `column` (=, LIKE or an IN list)."""
+        compared = re.compile(
+            rf"(?<![\w]){column}\s*(?:=|I?LIKE|IN\s*\((?:\s*'(?:[^']|'')*'\s*,)*)\s*$", re.IGNORECASE
+        )
+        return all(compared.search(sql[:m.start()]) for m in literal.finditer(sql))
+
+    @staticmethod
+    def _parameterize_identifiers(sql: str, value: str, placeholder: str) -> str | None:
+        """
+        Replaces `value`'s identifier spelling inside output aliases (`AS <alias>`, outside
+        string literals) with `{placeholder_id}`. Returns None if it also appears in any other
+        identifier (a real column or table name), which can't follow the slot.
+        """
+        ident = slot_identifier(value)
+        # '_' separates words inside identifiers, so it counts as a boundary; plurals keep their suffix.
+        pattern = re.compile(rf"(?<![a-z0-9]){re.escape(ident)}(?=(?:e?s)?(?![a-z0-9]))", re.IGNORECASE)
+        parts, literals = _LITERAL.split(sql), _LITERAL.findall(sql)
+        code = " ".join(parts)
+        aliases = {a for a in re.findall(r"\bAS\s+([A-Za-z_]\w*)", code, re.IGNORECASE) if pattern.search(a)}
+        for alias in aliases:
+            renamed = pattern.sub(f"{{{placeholder}_id}}", alias)
+            parts = [re.sub(rf"(?<![\w.]){alias}(?!\w)", renamed, part) for part in parts]
+        if any(pattern.search(re.sub(r"\{[^{}]*\}", " ", part)) for part in parts):
+            return None
+        out = [parts[0]]
+        for lit, part in zip(literals, parts[1:]):
+            out += [lit, part]
+        return "".join(out)
+
+    def load_templates(self, template_dir: str = DEFAULT_TEMPLATE_DIR) -> int:
+        """Loads every `*question*.txt` file that has a matching `*queries*.sql` file."""
+        for questions_file in sorted(glob.glob(os.path.join(template_dir, "*question*.txt"))):
+            name = os.path.basename(questions_file)
+            sql_name = name.replace("questions", "queries").replace("question", "queries")[:-len(".txt")] + ".sql"
+            sql_file = os.path.join(template_dir, sql_name)
+            if not os.path.exists(sql_file):
+                print(f"Skipping templates from {name}: no {sql_name} to pair it with.")
+                continue
+            questions, queries = load_question_file(questions_file), load_sql_file(sql_file)
+            if len(questions) != len(queries):
+                # Pairing is by line, so one missing line misaligns every pair after it.
+                print(f"Skipping templates from {name}: {len(questions)} questions vs {len(queries)} queries "
+                      f"in {sql_name}; the files must pair line for line.")
+                continue
+            for q, s in zip(questions, queries):
+                self.add_template(q, s, source=name)
+        print(f"Query router loaded {len(self.templates)} templates ({self.split_shapes} question shapes "
+              f"dropped because their templates disagree).")
+        return len(self.templates)
+
+    # --- Routing ---
+    def route(self, question: str) -> RouteMatch | None:
+        """Returns the filled-in SQL for a known question shape, or None on a miss."""
+        start_time = time.perf_counter()
+        key, entities = self.question_shape(question)
+        template = self.templates.get(key)
+        if template is None:
+            self.misses += 1
+            return None
+
+        values = []
+        for slot_type, value in entities:
+            if value not in values:
+                values.append(value)
+        escaped = {f"slot_{i}": v.replace("'", "''") for i, v in enumerate(values)}
+        escaped.update({f"slot_{i}_id": slot_identifier(v) for i, v in enumerate(values)})
+        try:
+            sql_query = template.sql_template.format(**escaped)
+        except (KeyError, IndexError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return RouteMatch(sql_query, template, values, (time.perf_counter() - start_time) * 1000)
+
+    @property
+    def split_shapes(self) -> int:
+        """Question shapes whose templates don't agree on one SQL."""
+        return len(self._candidates) - len(self.templates)
+
+    def stats(self) -> dict:
+        """Counters for the admin endpoint."""
+        return {"templates": len(self.templates), "hits": self.hits, "misses": self.misses,
+                "conflicts": self.conflicts, "split_shapes": self.split_shapes}
@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity` (the allowed burst).
+    `acquire()` waits until a token is available, so callers are spread out evenly instead
+    of hitting the upstream rate limit and being rejected.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waited_s = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """Waits until `tokens` are available and consumes them."""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                wait = (tokens - self._tokens) / self.rate
+                self.waited_s += wait
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= tokens
+
+    def penalize(self, seconds: float):
+        """Drains the bucket so nobody calls upstream for `seconds` (e.g. after a 429)."""
+        self._refill()
+        self._tokens = min(self._tokens, -seconds * self.rate)
+
+    def stats(self) -> dict:
+        """Counters for the admin endpoint."""
+        return {"rate_per_s": self.rate, "capacity": self.capacity, "waited_s": round(self.waited_s, 3)}
@@ -0,0 +1,110 @@
+import io
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, AsyncIterator, List, Sequence
+
+# --- Configuration ---
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+STREAM_FORMATS = {"ndjson": NDJSON_MEDIA_TYPE, "arrow": ARROW_MEDIA_TYPE}
+# Rows buffered before the Arrow schema is fixed while some column has only seen NULLs
+ARROW_SCHEMA_LOOKAHEAD_ROWS = 10000
+
+
+def _json_default(value: Any):
+    """JSON encoder for the non-native types Postgres returns."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+class ResultStreamer:
+    """
+    Encodes a chunked query result as NDJSON or an Apache Arrow IPC stream.
+
+    `partitions` yields lists of row tuples of bounded size (one server-side cursor fetch
+    each), so memory stays proportional to the chunk size rather than the result size.
+    """
+
+    def __init__(self, columns: Sequence[str], partitions: AsyncIterator[List[Sequence[Any]]]):
+        self.columns = list(columns)
+        self.partitions = partitions
+        self.row_count = 0
+
+    async def ndjson(self) -> AsyncIterator[bytes]:
+        """Yields one JSON object per row, newline-delimited, one chunk per partition."""
+        async for rows in self.partitions:
+            self.row_count += len(rows)
+            lines = [json.dumps(dict(zip(self.columns, row)), default=_json_default) for row in rows]
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+    async def arrow(self) -> AsyncIterator[bytes]:
+        """
+        Yields an Arrow IPC stream. The schema can't change once written, so partitions are
+        held back (up to `ARROW_SCHEMA_LOOKAHEAD_ROWS`) while a column is still all NULL; the
+        buffered batches' schemas are then unified, and a column that never gets a value is
+        declared as text. Later partitions are cast to that schema.
+        """
+        import pyarrow as pa
+
+        sink = io.BytesIO()
+        writer = None
+        schema = None
+        pending, pending_rows = [], 0
+        async for rows in self.partitions:
+            self.row_count += len(rows)
+            if writer is not None:
+                writer.write_batch(_record_batch(pa, self.columns, rows, schema))
+            else:
+                pending.append(_record_batch(pa, self.columns, rows))
+                pending_rows += len(rows)
+                schema = pa.unify_schemas([b.schema for b in pending], promote_options="permissive")
+                if pending_rows < ARROW_SCHEMA_LOOKAHEAD_ROWS and any(pa.types.is_null(f.type) for f in schema):
+                    continue
+                schema = _resolve_nulls(pa, schema)
+                writer = pa.ipc.new_stream(sink, schema)
+                for batch in pending:
+                    writer.write_batch(_cast_batch(pa, batch, schema))
+                pending = []
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+
+        if writer is None:
+            # Short result that never filled every column (or empty): keep NULL-only columns as null.
+            schema = schema if schema is not None else pa.schema([(col, pa.null()) for col in self.columns])
+            writer = pa.ipc.new_stream(sink, schema)
+            for batch in pending:
+                writer.write_batch(_cast_batch(pa, batch, schema))
+        writer.close()
+        yield sink.getvalue()
+
+
+def _record_batch(pa, columns: Sequence[str], rows: List[Sequence[Any]], schema=None):
+    """Rows -> RecordBatch, inferring types (Decimal as float64) or casting to `schema`."""
+    values = list(zip(*rows)) if rows else [[] for _ in columns]
+    arrays = []
+    for i, column in enumerate(values):
+        if schema is not None and pa.types.is_string(schema.field(i).type):
+            column = [v if v is None or isinstance(v, str) else str(v) for v in column]
+        arrays.append(pa.array([float(v) if isinstance(v, Decimal) else v for v in column]))
+    batch = pa.RecordBatch.from_arrays(arrays, names=list(columns))
+    return _cast_batch(pa, batch, schema) if schema is not None else batch
+
+
+def _cast_batch(pa, batch, schema):
+    if batch.schema.equals(schema):
+        return batch
+    return pa.RecordBatch.from_arrays(
+        [column.cast(field.type) for column, field in zip(batch.columns, schema)], schema=schema
+    )
+
+
+def _resolve_nulls(pa, schema):
+    """Declares still-untyped (all NULL so far) columns as text, which any later value fits."""
+    return pa.schema([pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in schema])
@@ -0,0 +1,171 @@
+import re
+import threading
+from sqlalchemy import text
+
+# --- Configuration ---
+# Fact table -> (cube built by the loader, its grouping keys in GROUPING() order)
+CUBES = {
+    "religion_stats": ("cube_religion_stats", ("state", "tru_id", "religion_id")),
+    "language_stats": ("cube_language_stats", ("state", "tru_id", "language_id")),
+    "occupation_stats": ("cube_occupation_stats", ("state", "tru_id", "age_group_id")),
+    "population_stats": ("cube_population_stats", ("state", "tru_id", "age")),
+}
+GROUPING_COLUMN = "grouping_id"
+
+# Lookup table -> (fact column, lookup column) of the join between them
+LOOKUP_JOINS = {
+    "regions": ("state", "state"),
+    "tru": ("tru_id", "id"),
+    "religions": ("religion_id", "id"),
+    "languages": ("language_id", "id"),
+    "age_groups": ("age_group_id", "id"),
+}
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_FROM = re.compile(r"\bFROM\s+(?P<table>\w+)(?:\s+(?:AS\s+)?(?P<alias>\w+))?", re.IGNORECASE)
+_JOIN = re.compile(
+    r"\b(?:INNER\s+)?JOIN\s+(?P<table>\w+)(?:\s+(?:AS\s+)?(?P<alias>\w+))?\s+ON\s+"
+    r"(?P<left>\w+)\.(?P<left_col>\w+)\s*=\s*(?P<right>\w+)\.(?P<right_col>\w+)",
+    re.IGNORECASE,
+)
+_QUALIFIED = re.compile(r"\b(?P<qualifier>[A-Za-z_]\w*)\.(?P<column>[A-Za-z_]\w*)\b")
+_CLAUSE_END = re.compile(r"\b(?:GROUP\s+BY|HAVING|ORDER\s+BY|LIMIT|OFFSET)\b", re.IGNORECASE)
+# Anything whose result would change if the rows were pre-aggregated
+_UNSAFE = re.compile(
+    r"\b(?:COUNT|AVG|MIN|MAX|STDDEV\w*|VARIANCE|VAR_\w+|ARRAY_AGG|STRING_AGG|JSON_AGG|BOOL_\w+|EVERY|"
+    r"PERCENTILE_\w+|MODE|OVER|DISTINCT|UNION|INTERSECT|EXCEPT|WITH|LATERAL|LEFT|RIGHT|FULL|CROSS|NATURAL|USING)\b"
+    r"|\(\s*SELECT\b",
+    re.IGNORECASE,
+)
+SQL_KEYWORDS = {
+    "WHERE", "JOIN", "INNER", "LEFT", "RIGHT", "FULL", "CROSS", "NATURAL", "ON", "USING", "GROUP", "ORDER",
+    "LIMIT", "OFFSET", "HAVING", "UNION", "EXCEPT", "INTERSECT", "WINDOW", "FETCH", "FOR", "LATERAL", "AS",
+}
+
+
+def _mask_literals(sql: str) -> str:
+    """Blanks the inside of string literals (same length), so keywords in values are never matched."""
+    return _LITERAL.sub(lambda m: "'" + " " * (len(m.group(0)) - 2) + "'", sql)
+
+
+class CubeRewriter:
+    """
+    Points eligible aggregate queries at the loader's rollup cubes.
+
+    Each `cube_<fact>` holds the SUM of the fact's core measures for every proper subset of
+    its keys (state, tru_id, dimension), tagged with `grouping_id` = GROUPING(keys). A query
+    qualifies when it reads one fact table, joins only lookup tables on their keys, and
+    touches the fact's measures only through SUM(alias.measure). If it leaves a key unused
+    (e.g. sums every religion per state), the fact is swapped for its cube filtered on that
+    grouping set: the same SUMs over a few hundred rows instead of the whole fact table.
+    """
+
+    def __init__(self):
+        self._measures: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self.rewrites = 0
+
+    # --- Loading ---
+    def load(self, engine):
+        """Reads the measure columns of every cube; missing or unpopulated cubes are skipped."""
+        measures = {}
+        with engine.connect() as conn:
+            for fact_table, (cube, keys) in CUBES.items():
+                try:
+                    columns = conn.execute(text(f"SELECT * FROM {cube} LIMIT 0")).keys()
+                except Exception as e:
+                    conn.rollback()
+                    print(f"Rollup cube {cube} unavailable: {e}")
+                    continue
+                measures[fact_table] = {c.lower() for c in columns} - set(keys) - {GROUPING_COLUMN}
+        self.load_measures(measures)
+
+    def load_measures(self, measures: dict[str, set[str]]):
+        """Enables the cubes of {fact table: measure columns}."""
+        with self._lock:
+            self._measures = {table: set(columns) for table, columns in measures.items() if table in CUBES}
+        print(f"Rollup cubes loaded: {', '.join(sorted(self._measures)) or 'none'}")
+
+    # --- SQL rewriting ---
+    def rewrite_sql(self, sql: str) -> str:
+        """Returns `sql` reading from a rollup cube, or unchanged if it isn't eligible."""
+        rewritten = self._rewrite(sql)
+        if rewritten is None:
+            return sql
+        self.rewrites += 1
+        return rewritten
+
+    def _rewrite(self, sql: str) -> str | None:
+        masked = _mask_literals(sql)
+        if not self._measures or not re.match(r"\s*SELECT\b", masked, re.IGNORECASE) or _UNSAFE.search(masked):
+            return None
+        froms = list(_FROM.finditer(masked))
+        if len(froms) != 1 or froms[0].group("table").lower() not in self._measures:
+            return None
+        fact_match = froms[0]
+        fact_table = fact_match.group("table").lower()
+        cube, keys = CUBES[fact_table]
+        measures = self._measures[fact_table]
+        alias = fact_match.group("alias")
+        has_alias = alias is not None and alias.upper() not in SQL_KEYWORDS
+        alias = alias.lower() if has_alias else fact_table
+        if not re.search(r"\bSUM\s*\(", masked, re.IGNORECASE):
+            return None
+
+        # Joins: lookup tables only, each on its key.
+        used_keys, lookup_aliases = set(), set()
+        joins = list(_JOIN.finditer(masked))
+        if len(joins) != len(re.findall(r"\bJOIN\b", masked, re.IGNORECASE)):
+            return None
+        for join in joins:
+            table = join.group("table").lower()
+            join_alias = (join.group("alias") or table).lower()
+            if table not in LOOKUP_JOINS or join_alias.upper() in SQL_KEYWORDS:
+                return None
+            fact_col, lookup_col = LOOKUP_JOINS[table]
+            sides = {(join.group("left").lower(), join.group("left_col").lower()),
+                     (join.group("right").lower(), join.group("right_col").lower())}
+            if sides != {(alias, fact_col), (join_alias, lookup_col)} or fact_col not in keys:
+                return None
+            used_keys.add(fact_col)
+            lookup_aliases.add(join_alias)
+
+        # Fact columns: measures only inside SUM(alias.measure), keys anywhere.
+        sums = re.compile(rf"\bSUM\s*\(\s*{re.escape(alias)}\.(\w+)\s*\)", re.IGNORECASE)
+        if any(m.group(1).lower() not in measures for m in sums.finditer(masked)):
+            return None
+        for m in _QUALIFIED.finditer(sums.sub("", masked)):
+            qualifier, column = m.group("qualifier").lower(), m.group("column").lower()
+            if qualifier == alias and column in keys:
+                used_keys.add(column)
+            elif qualifier not in lookup_aliases:
+                return None
+        # Unqualified fact columns are ambiguous: the analysis can't tell which table they belong to.
+        fact_columns = set(keys) | measures
+        unqualified = _QUALIFIED.sub(" ", masked)
+        if any(word.lower() in fact_columns for word in re.findall(r"\b[A-Za-z_]\w*\b", unqualified)):
+            return None
+        if used_keys >= set(keys):
+            return None # needs the full grain: that is the fact table itself
+
+        grouping_id = sum(1 << (len(keys) - 1 - i) for i, key in enumerate(keys) if key not in used_keys)
+        condition = f"{alias}.{GROUPING_COLUMN} = {grouping_id}"
+
+        # Swap the table (aliased as before), then AND the grouping set onto the WHERE clause.
+        replacement = f"FROM {cube} {alias}"
+        end_of_from = fact_match.end() if has_alias else fact_match.end("table")
+        sql = sql[:fact_match.start()] + replacement + sql[end_of_from:]
+        masked = masked[:fact_match.start()] + replacement + masked[end_of_from:]
+        where = re.search(r"\bWHERE\b", masked, re.IGNORECASE)
+        clause_end = _CLAUSE_END.search(masked, where.end() if where else fact_match.start())
+        end = clause_end.start() if clause_end else len(sql.rstrip().rstrip(";").rstrip())
+        if where:
+            head = f"{sql[:where.start()]}WHERE {condition} AND ({sql[where.end():end].strip()})"
+        else:
+            head = f"{sql[:end].rstrip()} WHERE {condition}"
+        rest = sql[end:].strip()
+        return f"{head} {rest}" if rest and rest != ";" else head + rest
+
+    def stats(self) -> dict:
+        """Counters for the admin endpoint."""
+        return {"cubes": sorted(self._measures), "rewrites": self.rewrites}
@@ -0,0 +1,106 @@
+import threading
+import time
+from sqlalchemy import inspect, text
+
+# --- Configuration ---
+SCHEMA_NAME = "public"
+
+
+class SchemaCatalog:
+    """
+    In-memory, versioned copy of the database schema used for prompting.
+
+    The schema is introspected once and the rendered prompt text is kept in memory.
+    Every reload bumps `version`, so callers (e.g. caches) can key on it.
+    """
+
+    def __init__(self, engine, schema: str = SCHEMA_NAME):
+        self.engine = engine
+        self.schema = schema
+        self.version = 0
+        self.loaded_at: float | None = None
+        self._tables: dict[str, list[str]] = {}
+        self._foreign_keys: dict[str, list[tuple[str, str, str]]] = {}
+        self._prompt_text: str | None = None
+        self._lock = threading.Lock()
+
+    def _partition_names(self) -> set[str]:
+        """Partitions of partitioned tables; queries go through their parent, so they aren't listed."""
+        if self.engine.dialect.name != "postgresql":
+            return set()
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT c.relname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE c.relispartition AND n.nspname = :schema"
+            ), {"schema": self.schema})
+            return {row[0] for row in rows}
+
+    def load(self) -> str:
+        """Introspects every table and view in the schema (partitions excluded) and renders the prompt text."""
+        inspector = inspect(self.engine)
+        partitions = self._partition_names()
+        relations = inspector.get_table_names(schema=self.schema) + inspector.get_view_names(schema=self.schema)
+        tables, foreign_keys = {}, {}
+        for table_name in relations:
+            if table_name in partitions:
+                continue
+            columns = inspector.get_columns(table_name, schema=self.schema)
+            tables[table_name] = [col['name'] for col in columns]
+            foreign_keys[table_name] = [
+                (fk['constrained_columns'][0], fk['referred_table'], fk['referred_columns'][0])
+                for fk in inspector.get_foreign_keys(table_name, schema=self.schema)
+                if fk.get('constrained_columns') and fk.get('referred_columns')
+            ]
+
+        prompt_text = "\n".join(
+            f"Table '{table_name}' has columns: {', '.join(columns)}"
+            for table_name, columns in tables.items()
+        )
+        with self._lock:
+            self._tables = tables
+            self._foreign_keys = foreign_keys
+            self._prompt_text = prompt_text
+            self.version += 1
+            self.loaded_at = time.time()
+        print(f"Schema catalog loaded: {len(tables)} tables (version {self.version}).")
+        return prompt_text
+
+    def invalidate(self):
+        """Drops the cached schema; the next read reloads it from the database."""
+        with self._lock:
+            self._prompt_text = None
+
+    @property
+    def stale(self) -> bool:
+        """True if the next read has to reload the schema from the database."""
+        return self._prompt_text is None
+
+    def get_prompt_text(self) -> str:
+        """Returns the rendered schema, reloading it only if it was invalidated."""
+        prompt_text = self._prompt_text
+        if prompt_text is None:
+            prompt_text = self.load()
+        return prompt_text
+
+    @property
+    def tables(self) -> dict[str, list[str]]:
+        """Table name -> column names, as of the last load."""
+        if self.stale:
+            self.load()
+        return self._tables
+
+    @property
+    def foreign_keys(self) -> dict[str, list[tuple[str, str, str]]]:
+        """Table name -> [(column, referred table, referred column)], as of the last load."""
+        if self.stale:
+            self.load()
+        return self._foreign_keys
+
+    def info(self) -> dict:
+        """Summary of the catalog state for the admin endpoints."""
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "stale": self.stale,
+            "tables": len(self._tables),
+        }
@@ -0,0 +1,205 @@
+import re
+import threading
+from collections import defaultdict
+from typing import Callable
+
+# --- Configuration ---
+MAX_FACT_TABLES = 3
+MIN_RELATIVE_SCORE = 0.5 # keep fact tables scoring at least this fraction of the best one
+SMALL_TABLE_COLUMNS = 24 # tables this narrow are always sent whole
+MAX_COLUMNS = 20 # metric columns kept per wide table
+
+# Entity slot type (see QueryRouter) -> lookup table holding its values
+ENTITY_TABLES = {"state": "regions", "religion": "religions", "language": "languages", "tru": "tru"}
+
+# Question word -> column-name tokens it usually corresponds to in the census tables
+SYNONYMS = {
+    "literacy": ["lit", "literate", "literates"], "literate": ["lit", "literates"],
+    "illiterate": ["ill", "illiterate"], "illiteracy": ["ill", "illiterate"],
+    "education": ["literates", "lit", "school", "schooling"], "educated": ["literates", "lit", "schooling"],
+    "women": ["f", "female", "women"], "woman": ["f", "female", "women"], "female": ["f", "female"],
+    "girl": ["f", "female"], "men": ["m", "male", "men"], "man": ["m", "male"], "male": ["m", "male"],
+    "boy": ["m", "male"], "population": ["p", "tot", "total", "person", "persons", "pop"],
+    "people": ["p", "person", "persons"], "speak": ["language"], "speaker": ["language"],
+    "spoken": ["language"], "tongue": ["language"], "religious": ["religion"],
+    "worker": ["work", "worker", "workers"], "working": ["work", "working"], "work": ["work", "worker"],
+    "employed": ["work", "worker"], "unemployed": ["non", "seeking"], "job": ["seeking", "work"],
+    "cultivator": ["cl", "cultivator"], "farmer": ["cl", "cultivator"], "labourer": ["al", "labourers"],
+    "child": ["06", "child", "children"], "children": ["06", "child", "children"], "kid": ["06", "children"],
+    "age": ["age"], "elderly": ["age"], "crop": ["crop", "sown"], "sowing": ["sown", "area"],
+    "sown": ["sown", "area"], "acreage": ["area"], "caste": ["castes", "sc"], "tribe": ["tribes", "st"],
+    "household": ["hh", "household", "households"], "vaccination": ["vaccinated"],
+    "vaccinated": ["vaccinated"], "water": ["drinkingwater"], "drinking": ["drinkingwater"],
+    "toilet": ["sanitation"], "internet": ["internet"], "mortality": ["mortality"], "death": ["deaths", "mortality"],
+}
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "at", "for", "to", "by", "with", "from", "and", "or", "is", "are",
+    "was", "were", "be", "do", "does", "did", "what", "which", "who", "how", "many", "much", "number",
+    "count", "show", "list", "give", "tell", "me", "find", "get", "please", "there", "that", "than",
+    "state", "states", "india", "highest", "lowest", "top", "most", "least", "all", "each", "per",
+}
+
+
+def _stem(token: str) -> str:
+    for suffix in ("ies", "es", "s"):
+        if len(token) > 4 and token.endswith(suffix):
+            return token[: -len(suffix)] + ("y" if suffix == "ies" else "")
+    return token
+
+
+def _name_tokens(name: str) -> list[str]:
+    return [t for t in re.split(r"[^a-z0-9]+", name.lower()) if t]
+
+
+class SchemaLinker:
+    """
+    Picks the tables and columns relevant to a question so the prompt only carries those.
+
+    An inverted index maps tokens of table names, column names and census synonyms to
+    (table, column). Entity mentions (states, religions, languages, rural/urban) found by
+    `entity_extractor` pull in their lookup table and boost the fact tables joined to it.
+    The best fact tables are emitted with their key columns plus the best-matching metric
+    columns, together with the lookup tables they join to and the join keys. If nothing
+    matches, the full schema is returned.
+    """
+
+    def __init__(self, catalog, entity_extractor: Callable[[str], list] | None = None):
+        self.catalog = catalog
+        self.entity_extractor = entity_extractor
+        self._built_version = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.fallbacks = 0
+        self.full_chars = 0
+        self.pruned_chars = 0
+
+    # --- Index ---
+    def _build(self):
+        tables = self.catalog.tables
+        foreign_keys = self.catalog.foreign_keys
+        lookup_tables = {ref for fks in foreign_keys.values() for _, ref, _ in fks}
+        if not lookup_tables:
+            # No FK metadata: fall back to the naming convention used by the loader.
+            lookup_tables = {t for t in ENTITY_TABLES.values() if t in tables} | ({"age_groups"} & set(tables))
+            foreign_keys = {t: self._conventional_fks(t, cols, tables) for t, cols in tables.items()}
+
+        index = defaultdict(list)
+        for table, columns in tables.items():
+            for token in _name_tokens(table):
+                index[_stem(token)].append((table, None, 3.0))
+            key_columns = {col for col, _, _ in foreign_keys.get(table, [])}
+            for column in columns:
+                if column in key_columns:
+                    continue
+                for token in _name_tokens(column):
+                    index[_stem(token)].append((table, column, 1.0))
+
+        referenced_by = defaultdict(set)
+        for table, fks in foreign_keys.items():
+            for _, ref, _ in fks:
+                referenced_by[ref].add(table)
+
+        self._tables = tables
+        self._foreign_keys = foreign_keys
+        self._lookup_tables = lookup_tables
+        self._referenced_by = referenced_by
+        self._index = dict(index)
+        self._built_version = self.catalog.version
+
+    @staticmethod
+    def _conventional_fks(table: str, columns: list[str], tables: dict) -> list[tuple[str, str, str]]:
+        guesses = {"state": ("regions", "state"), "tru_id": ("tru", "id"), "religion_id": ("religions", "id"),
+                   "language_id": ("languages", "id"), "age_group_id": ("age_groups", "id")}
+        return [(col, *guesses[col]) for col in columns
+                if col in guesses and guesses[col][0] in tables and guesses[col][0] != table]
+
+    def _ensure_index(self):
+        if self._built_version != self.catalog.version or self.catalog.stale:
+            with self._lock:
+                if self._built_version != self.catalog.version or self.catalog.stale:
+                    self._build()
+
+    # --- Linking ---
+    def _question_tokens(self, question: str) -> list[str]:
+        tokens = [_stem(t) for t in re.split(r"[^a-z0-9]+", question.lower()) if t and t not in STOPWORDS]
+        expanded = list(tokens)
+        for token in tokens:
+            expanded.extend(_stem(s) for s in SYNONYMS.get(token, []))
+        return expanded
+
+    def link(self, question: str) -> tuple[dict[str, list[str]], list[str]]:
+        """Returns ({table: columns to keep}, ["a.col = b.col", ...]); empty if nothing matched."""
+        self._ensure_index()
+        table_scores = defaultdict(float)
+        column_scores = defaultdict(float)
+
+        for token in self._question_tokens(question):
+            # A token counts once per table (its best posting), so wide tables don't win by size.
+            token_best = {}
+            for table, column, weight in self._index.get(token, ()):
+                token_best[table] = max(token_best.get(table, 0.0), weight)
+                if column is not None:
+                    column_scores[(table, column)] += weight
+            for table, weight in token_best.items():
+                table_scores[table] += weight
+
+        mentioned_lookups = set()
+        if self.entity_extractor is not None:
+            for entity in self.entity_extractor(question):
+                lookup = ENTITY_TABLES.get(entity[0])
+                if lookup in self._tables:
+                    mentioned_lookups.add(lookup)
+                    dependents = self._referenced_by.get(lookup, ())
+                    for table in dependents:
+                        table_scores[table] += 2.0 / len(dependents)
+
+        facts = sorted(((score, t) for t, score in table_scores.items()
+                        if t not in self._lookup_tables and score > 0), reverse=True)
+        if not facts:
+            return {}, []
+        best = facts[0][0]
+        chosen = [t for score, t in facts[:MAX_FACT_TABLES] if score >= best * MIN_RELATIVE_SCORE]
+
+        selected, joins = {}, []
+        for table in chosen:
+            columns = self._tables[table]
+            fks = self._foreign_keys.get(table, [])
+            key_columns = [col for col, _, _ in fks]
+            if len(columns) <= SMALL_TABLE_COLUMNS:
+                selected[table] = list(columns)
+            else:
+                ranked = sorted((c for c in columns if column_scores.get((table, c), 0) > 0 and c not in key_columns),
+                                key=lambda c: -column_scores[(table, c)])
+                selected[table] = key_columns + ranked[:MAX_COLUMNS] if ranked else list(columns)
+            for col, ref_table, ref_col in fks:
+                if ref_table in self._tables:
+                    selected.setdefault(ref_table, list(self._tables[ref_table]))
+                    joins.append(f"{table}.{col} = {ref_table}.{ref_col}")
+        for lookup in mentioned_lookups:
+            selected.setdefault(lookup, list(self._tables[lookup]))
+        return selected, joins
+
+    def prune(self, question: str, full_schema: str) -> str:
+        """Renders the pruned schema prompt text (or `full_schema` if nothing matched)."""
+        self.calls += 1
+        self.full_chars += len(full_schema)
+        selected, joins = self.link(question)
+        if not selected:
+            self.fallbacks += 1
+            self.pruned_chars += len(full_schema)
+            return full_schema
+        lines = [f"Table '{table}' has columns: {', '.join(columns)}" for table, columns in selected.items()]
+        if joins:
+            lines.append(f"Join keys: {', '.join(joins)}")
+        pruned = "\n".join(lines)
+        self.pruned_chars += len(pruned)
+        return pruned
+
+    def stats(self) -> dict:
+        """Counters for the admin endpoint."""
+        return {
+            "calls": self.calls,
+            "fallbacks": self.fallbacks,
+            "avg_full_chars": self.full_chars / self.calls if self.calls else 0,
+            "avg_pruned_chars": self.pruned_chars / self.calls if self.calls else 0,
+        }
@@ -0,0 +1,28 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The backend modules are imported as top-level modules, as uvicorn does from Backend/.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def main_module():
+    """main.py over the embedded DuckDB database and a stub LLM (it reads its configuration at import)."""
+    pytest.importorskip("duckdb")
+    pytest.importorskip("duckdb_engine")
+    os.environ.update({
+        "DB_BACKEND": "duckdb",
+        "LLM_BACKEND": "stub",
+        "LOG_DIR": tempfile.mkdtemp(prefix="censql_logs_"),
+    })
+    import main
+    return main
+
+
+@pytest.fixture(scope="session")
+def client(main_module):
+    from fastapi.testclient import TestClient
+    return TestClient(main_module.app)
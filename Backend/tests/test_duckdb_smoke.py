@@ -0,0 +1,32 @@
+from fastapi.testclient import TestClient
+
+
+def test_execute_sql_reads_the_staged_tables(client):
+    response = client.post("/execute-sql", json={"sql_query": "SELECT COUNT(*) AS n FROM regions"})
+    body = response.json()
+
+    assert response.status_code == 200
+    assert body["status"] == "success", body["result"]
+    assert body["result"][0]["n"] > 0
+
+
+def test_template_route_runs_against_duckdb(client):
+    generated = client.post(
+        "/generate-select-sql", json={"question": "Count the number of Hindi speakers in Uttar Pradesh."}
+    ).json()
+    assert generated["path"] == "template"
+
+    response = client.post("/execute-sql", json={"sql_query": generated["sql_query"]})
+    body = response.json()
+
+    assert body["status"] == "success", body["result"]
+    assert body["result"] and all(value is not None for value in body["result"][0].values())
+
+
+def test_lifespan_shutdown_flushes_the_logs(main_module):
+    with TestClient(main_module.app) as app_client:
+        app_client.post("/execute-sql", json={"sql_query": "SELECT 1 AS one", "question": "one?"})
+
+    stats = main_module.metrics_logger.stats()
+    assert stats["pending"] == 0 and stats["written"] >= 1
+    assert not main_module.metrics_logger._thread.is_alive()
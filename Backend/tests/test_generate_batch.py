@@ -0,0 +1,45 @@
+import asyncio
+import json
+import time
+
+from rate_limit import TokenBucket
+
+
+def test_token_bucket_allows_a_burst_then_spaces_calls():
+    async def acquire_all(bucket, n):
+        start = time.monotonic()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(acquire_all(TokenBucket(rate=20, capacity=3), 3)) < 0.05
+    assert asyncio.run(acquire_all(TokenBucket(rate=20, capacity=3), 5)) >= 0.09 # 2 more tokens at 20/s
+    assert asyncio.run(acquire_all(TokenBucket(rate=0), 100)) < 0.05 # 0 = unlimited
+
+
+def test_penalize_empties_the_bucket():
+    bucket = TokenBucket(rate=10, capacity=5)
+    bucket.penalize(0.1)
+
+    start = time.monotonic()
+    asyncio.run(bucket.acquire())
+    assert time.monotonic() - start >= 0.15 # the 0.1s penalty, then one token at 10/s
+
+
+def test_batch_streams_one_line_per_question(client, main_module):
+    questions = ["Which zodiac sign likes tea?", "which ZODIAC sign likes tea", "", "Which planet likes coffee?"]
+    executions = main_module.generation_flight.executions
+
+    response = client.post("/generate-batch", json={"questions": questions})
+    lines = sorted((json.loads(line) for line in response.text.splitlines()), key=lambda line: line["index"])
+
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    assert lines[2]["status"] == "error"
+    assert all(lines[i]["status"] == "success" and lines[i]["path"] == "model" for i in (0, 1, 3))
+    # The two spellings of the first question share one generation.
+    assert main_module.generation_flight.executions - executions == 2
+
+
+def test_batch_rejects_unknown_kind(client):
+    response = client.post("/generate-batch", json={"questions": ["q"], "kind": "drop"})
+    assert response.status_code == 400
@@ -0,0 +1,49 @@
+import pytest
+
+from generation_cache import GenerationCache
+from lookup_index import LookupIndex
+
+QUESTION = "What is the female literacy rate among scheduled caste Muslims in rural areas of Kerala?"
+SQL = "SELECT 1 -- Kerala"
+
+
+@pytest.fixture
+def cache():
+    index = LookupIndex()
+    index.load_rows({
+        "state": [(32, "Kerala"), (10, "Bihar")],
+        "religion": [(1, "Hindu"), (2, "Muslim")],
+        "tru": [(1, "Total"), (2, "Rural"), (3, "Urban")],
+    })
+    cache = GenerationCache(entity_extractor=index.extract)
+    cache.put(QUESTION, "select", 1, SQL)
+    return cache
+
+
+def test_rephrased_question_is_a_fuzzy_hit(cache):
+    question = "Female literacy rate of scheduled caste Muslims living in rural areas of Kerala"
+    assert cache.get(question, "select", 1) == (SQL, "fuzzy")
+
+
+@pytest.mark.parametrize("old, new", [
+    ("Kerala", "Bihar"),
+    ("Muslims", "Hindus"),
+    ("rural", "urban"),
+    ("female", "male"),
+])
+def test_swapped_entity_is_a_miss(cache, old, new):
+    assert cache.get(QUESTION.replace(old, new), "select", 1) == (None, "miss")
+
+
+def test_numbers_must_match():
+    cache = GenerationCache()
+    cache.put("Top 5 states by literacy rate", "select", 1, "SELECT 5")
+    assert cache.get("Show the top 10 states by literacy rate", "select", 1) == (None, "miss")
+    assert cache.get("Show the top 5 states by literacy rate", "select", 1) == ("SELECT 5", "fuzzy")
+
+
+def test_exact_hit_and_schema_version():
+    cache = GenerationCache(fuzzy_threshold=1)
+    cache.put("How many Hindus?", "select", 1, "SELECT 1")
+    assert cache.get("how many hindus", "select", 1) == ("SELECT 1", "hit")
+    assert cache.get("how many hindus", "select", 2) == (None, "miss")
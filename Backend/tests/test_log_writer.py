@@ -0,0 +1,69 @@
+import csv
+import os
+import sqlite3
+
+import pytest
+
+import log_writer
+from log_writer import BufferedLogWriter
+
+COLUMNS = ["question", "sql_query"]
+
+
+def read_csv(path):
+    with open(path, newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_csv_defaults_to_one_file_per_worker(tmp_path):
+    writer = BufferedLogWriter("generation_log", COLUMNS, directory=str(tmp_path), flush_interval=60)
+    writer.log(["q1", "SELECT 1"])
+    writer.log(["q2", "SELECT 2"])
+    assert writer.stats()["pending"] == 2 # nothing written until a flush
+    writer.close()
+
+    assert os.listdir(tmp_path) == [f"generation_log.{os.getpid()}.csv"]
+    assert read_csv(tmp_path / f"generation_log.{os.getpid()}.csv") == [COLUMNS, ["q1", "SELECT 1"], ["q2", "SELECT 2"]]
+    assert writer.stats()["written"] == 2
+
+
+def test_single_csv_rotates_past_max_bytes(tmp_path):
+    writer = BufferedLogWriter("metrics_log", COLUMNS, directory=str(tmp_path), flush_interval=60,
+                               per_worker=False, max_bytes=1)
+    writer.log(["q1", "SELECT 1"])
+    writer.flush()
+    writer.log(["q2", "SELECT 2"])
+    writer.close()
+
+    files = sorted(os.listdir(tmp_path))
+    assert "metrics_log.csv" in files and len(files) == 2
+    assert read_csv(tmp_path / "metrics_log.csv") == [COLUMNS, ["q2", "SELECT 2"]]
+
+
+def test_sqlite_backend(tmp_path):
+    writer = BufferedLogWriter("metrics_log", COLUMNS, backend="sqlite", directory=str(tmp_path), flush_interval=60)
+    writer.log(["q1", "SELECT 1"])
+    writer.close()
+
+    conn = sqlite3.connect(tmp_path / log_writer.SQLITE_FILE)
+    try:
+        assert conn.execute('SELECT pid, question, sql_query FROM "metrics_log"').fetchall() == [
+            (os.getpid(), "q1", "SELECT 1")
+        ]
+    finally:
+        conn.close()
+
+
+def test_full_buffer_drops_oldest_rows(tmp_path):
+    writer = BufferedLogWriter("log", COLUMNS, directory=str(tmp_path), flush_interval=60, buffer_size=2)
+    for i in range(3):
+        writer.log([f"q{i}", "SELECT 1"])
+    writer.close()
+
+    assert writer.stats()["dropped"] == 1
+    assert [row[0] for row in read_csv(tmp_path / f"log.{os.getpid()}.csv")[1:]] == ["q1", "q2"]
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown log backend"):
+        BufferedLogWriter("log", COLUMNS, backend="json")
@@ -0,0 +1,86 @@
+import pytest
+
+import lookup_index
+from lookup_index import LookupIndex
+
+# Template/health_queries_gopikha.sql: `name` in the outer SELECT is the CTE's column, not tru's.
+CTE_SQL = (
+    "WITH tn_stats AS (SELECT t.name, h.val FROM healthcare_stats h JOIN regions r ON h.state = r.state "
+    "JOIN tru t ON h.tru_id = t.id WHERE r.area_name = 'Tamil Nadu' AND t.name IN ('Urban', 'Rural')) "
+    "SELECT CASE WHEN (SELECT val FROM tn_stats WHERE name='Urban') > (SELECT val FROM tn_stats WHERE name='Rural') "
+    "THEN 'Urban' ELSE 'Rural' END;"
+)
+
+
+@pytest.fixture
+def index():
+    index = LookupIndex()
+    index.load_rows({
+        "state": [(33, "Tamil Nadu"), (32, "Kerala")],
+        "religion": [(1, "Hindu"), (2, "Muslim")],
+        "tru": [(1, "Total"), (2, "Rural"), (3, "Urban")],
+    })
+    return index
+
+
+@pytest.fixture(params=["sqlglot", "regex"])
+def parser(request, monkeypatch):
+    if request.param == "regex":
+        monkeypatch.setattr(lookup_index, "sqlglot", None)
+    return request.param
+
+
+def test_predicates_in_cte_scope_are_rewritten(index, parser):
+    sql = index.rewrite_sql(CTE_SQL)
+    assert "r.state = 33" in sql and "t.id IN (3, 2)" in sql
+
+
+def test_unqualified_cte_column_is_left_alone(index, parser):
+    sql = index.rewrite_sql(CTE_SQL)
+    assert "WHERE name='Urban'" in sql and "WHERE name='Rural'" in sql
+    assert "t.id = 3" not in sql
+
+
+def test_unqualified_column_of_single_lookup_table(index, parser):
+    sql = index.rewrite_sql(
+        "SELECT SUM(rs.tot_p) FROM religion_stats rs JOIN religions rel ON rs.religion_id = rel.id WHERE religion_name = 'Hindu'"
+    )
+    assert sql.endswith("WHERE rel.id = 1")
+
+
+def test_alias_reused_for_another_table_in_subquery(index):
+    sql = ("SELECT r.area_name FROM regions r WHERE r.state IN "
+           "(SELECT r.state FROM religion_stats r WHERE r.religion_id = 1) AND r.area_name = 'Kerala'")
+    assert index.rewrite_sql(sql).endswith("AND r.state = 32")
+
+
+@pytest.mark.parametrize("predicate, rewritten", [
+    ("r.area_name = 'Kerala'", "r.state = 32"),
+    ("r.area_name ILIKE 'kerala'", "r.state = 32"),
+    ("rel.religion_name IN ('Hindu', 'Islam')", "rel.id IN (1, 2)"),
+    ("rel.religion_name = 'Muslims'", "rel.id = 2"),
+])
+def test_name_predicates_become_id_predicates(index, parser, predicate, rewritten):
+    sql = ("SELECT SUM(rs.tot_p) FROM religion_stats rs JOIN regions r ON rs.state = r.state "
+           f"JOIN religions rel ON rs.religion_id = rel.id WHERE {predicate}")
+    assert index.rewrite_sql(sql).endswith(f"WHERE {rewritten}")
+
+
+@pytest.mark.parametrize("predicate", [
+    "r.area_name = 'Atlantis'", # unknown name
+    "r.area_name LIKE 'Ker%'", # wildcard
+    "r.area_name = 'Keralla'", # misspelling: only exact names are rewritten
+])
+def test_unresolved_predicates_are_left_alone(index, parser, predicate):
+    sql = f"SELECT r.state FROM regions r WHERE {predicate}"
+    assert index.rewrite_sql(sql) == sql
+
+
+def test_extract_and_hints(index):
+    matches = index.extract("Hindus in Keralla villages")
+    assert [(m.entity_type, m.name, m.ids) for m in matches] == [
+        ("religion", "Hindu", (1,)), ("state", "Kerala", (32,)), ("tru", "Rural", (2,)),
+    ]
+    assert index.hints("Muslims in Kerala") == (
+        "Known values: religions.religion_name 'Muslim' = religions.id 2; regions.area_name 'Kerala' = regions.state 32"
+    )
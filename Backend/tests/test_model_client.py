@@ -0,0 +1,29 @@
+import asyncio
+import sys
+
+import pytest
+
+from model_client import ModelClient
+
+PROMPTS = {"select": "Schema: {schema}\nQuestion: {question}", "other": "{schema} {question}"}
+
+
+def test_chains_are_built_once_per_kind():
+    client = ModelClient(PROMPTS, backend="stub", stub_response="SELECT 42;")
+
+    assert client.chain("select") is client.chain("select")
+    assert client.chain("select") is not client.chain("other")
+    assert client.info() == {"backend": "stub", "model": "stub", "kinds": ["other", "select"]}
+    assert client.invoke("select", "t(a)", "q") == "SELECT 42;"
+    assert asyncio.run(client.ainvoke("other", "t(a)", "q")) == "SELECT 42;"
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown LLM backend"):
+        ModelClient(PROMPTS, backend="openai")
+
+
+def test_local_backend_names_its_missing_package(monkeypatch):
+    monkeypatch.setitem(sys.modules, "langchain_openai", None)
+    with pytest.raises(ImportError, match="langchain-openai"):
+        ModelClient(PROMPTS, backend="local")
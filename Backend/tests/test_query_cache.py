@@ -0,0 +1,38 @@
+import pytest
+
+from query_cache import QueryCache, statement_kind
+
+
+@pytest.mark.parametrize("sql, kind", [
+    ("SELECT created_at, updated_by FROM t", "read"),
+    ("SELECT 'drop table' AS note", "read"),
+    ("TRUNCATE religion_stats", "ddl"),
+    ("ALTER TABLE a RENAME TO b", "ddl"),
+    ("SELECT * INTO copy_of_t FROM t", "ddl"),
+    ("SELECT 1; DROP TABLE t", "ddl"),
+    ("INSERT INTO t VALUES (1)", "write"),
+    ("WITH d AS (DELETE FROM t RETURNING *) SELECT * FROM d", "write"),
+])
+def test_statement_kind(sql, kind):
+    assert statement_kind(sql) == kind
+
+
+def test_put_skipped_after_write_during_select():
+    cache = QueryCache()
+    tables = frozenset({"religion_stats"})
+    generation = cache.generation(tables) # SELECT starts
+    cache.invalidate_tables(tables) # a write lands while it runs
+    cache.put("SELECT 1", tables, [{"x": 1}], 5.0, generation)
+    assert cache.get("SELECT 1") is None
+
+    cache.put("SELECT 1", tables, [{"x": 2}], 5.0, cache.generation(tables))
+    assert cache.get("SELECT 1").result == [{"x": 2}]
+
+
+def test_write_to_other_table_keeps_put():
+    cache = QueryCache()
+    tables = frozenset({"religion_stats"})
+    generation = cache.generation(tables)
+    cache.invalidate_tables(frozenset({"language_stats"}))
+    cache.put("SELECT 1", tables, [{"x": 1}], 5.0, generation)
+    assert cache.get("SELECT 1") is not None
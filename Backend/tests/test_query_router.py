@@ -0,0 +1,85 @@
+from query_router import QueryRouter
+
+VOCABULARY = {
+    "state": ["Kerala", "Goa", "India"],
+    "religion": ["Muslim", "Christian", "Jain"],
+    "language": ["Marathi", "Urdu", "Bhili/Bhilodi"],
+    "tru": ["Total", "Rural", "Urban"],
+}
+MOST_SPEAKERS_SQL = (
+    "SELECT r.area_name, SUM(l.person) AS marathi_speakers FROM language_stats l "
+    "JOIN regions r ON l.state=r.state JOIN languages lang ON l.language_id=lang.id "
+    "WHERE lang.name='Marathi' GROUP BY r.area_name ORDER BY marathi_speakers DESC LIMIT 1;"
+)
+
+
+def _router():
+    return QueryRouter(VOCABULARY)
+
+
+def test_alias_spelled_from_entity_follows_the_slot():
+    router = _router()
+    assert router.add_template("Where are the most Marathi speakers found?", MOST_SPEAKERS_SQL)
+    sql = router.route("Where are the most Bhili/Bhilodi speakers found?").sql_query
+    assert "lang.name='Bhili/Bhilodi'" in sql
+    assert "AS bhili_bhilodi_speakers" in sql and "ORDER BY bhili_bhilodi_speakers" in sql
+    assert "marathi" not in sql.lower()
+
+
+def test_entity_in_real_column_name_is_rejected():
+    router = _router()
+    sql = "SELECT h.urban_obesity_rate FROM healthcare_stats h JOIN tru t ON h.tru_id=t.id WHERE t.name='Urban';"
+    assert not router.add_template("What is the obesity rate in urban areas?", sql)
+
+
+def test_slot_compared_with_another_entity_column_is_rejected():
+    router = _router()
+    sql = "SELECT ls.person FROM language_stats ls JOIN languages l ON ls.language_id=l.id WHERE l.name='Jain';"
+    assert not router.add_template("How many Jain speakers are there?", sql)
+
+
+def test_shape_whose_templates_disagree_is_dropped():
+    router = _router()
+    count_gap = ("SELECT (rs.m_lit - rs.f_lit) AS gap FROM religion_stats rs JOIN regions r ON rs.state=r.state "
+                 "JOIN religions rel ON rs.religion_id=rel.id WHERE r.area_name='India' AND rel.religion_name='Muslim';")
+    rate_gap = count_gap.replace("(rs.m_lit - rs.f_lit)", "(SUM(rs.m_lit) * 100.0 / SUM(rs.tot_m))").replace("'India'", "'Kerala'")
+    rate_gap = rate_gap.replace("'Muslim'", "'Christian'")
+    router.add_template("What is the literacy gap between Muslim men and women in India?", count_gap)
+    router.add_template("What is the literacy gap between Christian men and women in Kerala?", rate_gap)
+    assert router.route("What is the literacy gap between Jain men and women in Goa?") is None
+    assert router.stats()["split_shapes"] == 1
+
+
+def test_route_fills_every_slot_in_the_template():
+    router = _router()
+    sql = ("SELECT SUM(rs.tot_p) FROM religion_stats rs JOIN regions r ON rs.state=r.state "
+           "JOIN religions rel ON rs.religion_id=rel.id JOIN tru t ON rs.tru_id=t.id "
+           "WHERE r.area_name='Kerala' AND rel.religion_name='Muslim' AND t.name='Rural';")
+    assert router.add_template("How many Muslims live in rural Kerala?", sql)
+
+    match = router.route("how many Christians live in urban Goa")
+    assert match.sql_query == (
+        "SELECT SUM(rs.tot_p) FROM religion_stats rs JOIN regions r ON rs.state=r.state "
+        "JOIN religions rel ON rs.religion_id=rel.id JOIN tru t ON rs.tru_id=t.id "
+        "WHERE r.area_name='Goa' AND rel.religion_name='Christian' AND t.name='Urban';"
+    )
+    assert match.values == ["Christian", "Urban", "Goa"]
+
+
+def test_other_question_shapes_miss():
+    router = _router()
+    router.add_template("Where are the most Marathi speakers found?", MOST_SPEAKERS_SQL)
+    assert router.route("Where are the fewest Urdu speakers found?") is None
+    assert router.route("Where are the most Urdu speakers found in Kerala?") is None
+    assert router.stats()["hits"] == 0 and router.stats()["misses"] == 2
+
+
+def test_load_templates_pairs_files_line_by_line(tmp_path):
+    (tmp_path / "lang_questions.txt").write_text("Where are the most Marathi speakers found?\n")
+    (tmp_path / "lang_queries.sql").write_text(MOST_SPEAKERS_SQL.replace(" WHERE", "\nWHERE") + "\n")
+    (tmp_path / "other_questions.txt").write_text("How many Urdu speakers?\nHow many Marathi speakers?\n")
+    (tmp_path / "other_queries.sql").write_text("SELECT 1;\n")
+
+    router = _router()
+    assert router.load_templates(str(tmp_path)) == 1
+    assert "lang.name='Urdu'" in router.route("Where are the most Urdu speakers found?").sql_query
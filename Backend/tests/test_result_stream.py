@@ -0,0 +1,42 @@
+import asyncio
+from decimal import Decimal
+
+import pyarrow as pa
+
+import result_stream
+from result_stream import ResultStreamer
+
+
+async def _partitions(chunks):
+    for rows in chunks:
+        yield rows
+
+
+def _read_arrow(columns, chunks):
+    async def collect():
+        return b"".join([chunk async for chunk in ResultStreamer(columns, _partitions(chunks)).arrow()])
+    return pa.ipc.open_stream(asyncio.run(collect())).read_all()
+
+
+def test_arrow_types_column_that_starts_all_null():
+    table = _read_arrow(["state", "total"], [[(1, None), (2, None)], [(3, Decimal("4.5"))]])
+    assert table.schema.field("total").type == pa.float64()
+    assert table.column("total").to_pylist() == [None, None, 4.5]
+
+
+def test_arrow_promotes_int_to_float_across_buffered_chunks():
+    table = _read_arrow(["ratio", "name"], [[(1, None)], [(Decimal("0.5"), "Goa")]])
+    assert table.schema.field("ratio").type == pa.float64()
+    assert table.column("ratio").to_pylist() == [1.0, 0.5]
+
+
+def test_arrow_column_null_past_lookahead_becomes_text(monkeypatch):
+    monkeypatch.setattr(result_stream, "ARROW_SCHEMA_LOOKAHEAD_ROWS", 2)
+    table = _read_arrow(["state", "note"], [[(1, None)], [(2, None)], [(3, 7)]])
+    assert table.schema.field("note").type == pa.string()
+    assert table.column("note").to_pylist() == [None, None, "7"]
+
+
+def test_arrow_empty_result_is_schema_only_stream():
+    table = _read_arrow(["state"], [])
+    assert table.num_rows == 0 and table.column_names == ["state"]
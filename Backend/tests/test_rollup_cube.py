@@ -0,0 +1,65 @@
+import pytest
+
+from rollup_cube import CubeRewriter
+
+PER_STATE_SQL = (
+    "SELECT r.area_name, SUM(rs.tot_p) AS people FROM religion_stats rs JOIN regions r ON rs.state = r.state "
+    "JOIN tru t ON rs.tru_id = t.id WHERE t.name = 'Total' GROUP BY r.area_name ORDER BY people DESC;"
+)
+
+
+@pytest.fixture
+def rewriter():
+    rewriter = CubeRewriter()
+    rewriter.load_measures({"religion_stats": {"tot_p", "tot_m", "tot_f"}})
+    return rewriter
+
+
+def test_unused_key_reads_the_cube_grouping_set(rewriter):
+    assert rewriter.rewrite_sql(PER_STATE_SQL) == (
+        "SELECT r.area_name, SUM(rs.tot_p) AS people FROM cube_religion_stats rs JOIN regions r ON rs.state = r.state "
+        "JOIN tru t ON rs.tru_id = t.id WHERE rs.grouping_id = 1 AND (t.name = 'Total') "
+        "GROUP BY r.area_name ORDER BY people DESC;"
+    )
+    assert rewriter.stats()["rewrites"] == 1
+
+
+def test_query_without_where_gets_one(rewriter):
+    sql = "SELECT SUM(religion_stats.tot_m) FROM religion_stats"
+    assert rewriter.rewrite_sql(sql) == "SELECT SUM(religion_stats.tot_m) FROM cube_religion_stats religion_stats WHERE religion_stats.grouping_id = 7"
+
+
+@pytest.mark.parametrize("sql", [
+    # COUNT would count cube rows, not fact rows
+    "SELECT COUNT(rs.tot_p) FROM religion_stats rs JOIN regions r ON rs.state = r.state",
+    # every key used: that is the fact table's own grain
+    "SELECT SUM(rs.tot_p) FROM religion_stats rs WHERE rs.state = 32 AND rs.tru_id = 1 AND rs.religion_id = 2",
+    # a column the cube doesn't carry
+    "SELECT SUM(rs.district_code) FROM religion_stats rs",
+    # no cube for this table
+    "SELECT SUM(h.val) FROM healthcare_stats h",
+])
+def test_ineligible_queries_are_unchanged(rewriter, sql):
+    assert rewriter.rewrite_sql(sql) == sql
+
+
+def test_rewritten_query_returns_the_same_rows(rewriter):
+    duckdb = pytest.importorskip("duckdb")
+    conn = duckdb.connect()
+    conn.execute("CREATE TABLE regions AS SELECT * FROM (VALUES (32, 'Kerala'), (33, 'Tamil Nadu')) v(state, area_name)")
+    conn.execute("CREATE TABLE tru AS SELECT * FROM (VALUES (1, 'Total'), (2, 'Rural')) v(id, name)")
+    conn.execute("""
+        CREATE TABLE religion_stats AS
+        SELECT s.state, t.tru_id, rel.religion_id, s.state * 100 + t.tru_id * 10 + rel.religion_id AS tot_p
+        FROM (VALUES (32), (33)) s(state), (VALUES (1), (2)) t(tru_id), (VALUES (1), (2), (3)) rel(religion_id)
+    """)
+    # Same shape as the loader's cube_query()
+    conn.execute("""
+        CREATE TABLE cube_religion_stats AS
+        SELECT GROUPING(state, tru_id, religion_id) AS grouping_id, state, tru_id, religion_id, SUM(tot_p) AS tot_p
+        FROM religion_stats
+        GROUP BY GROUPING SETS ((state, tru_id), (state, religion_id), (tru_id, religion_id), (state), (tru_id), (religion_id), ())
+    """)
+
+    expected = conn.execute(PER_STATE_SQL).fetchall()
+    assert conn.execute(rewriter.rewrite_sql(PER_STATE_SQL)).fetchall() == expected
@@ -0,0 +1,39 @@
+from sqlalchemy import create_engine, text
+
+import schema_catalog
+from schema_catalog import SchemaCatalog
+
+
+def make_catalog(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'census.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE regions (state INTEGER PRIMARY KEY, area_name TEXT)"))
+        conn.execute(text("CREATE TABLE religion_stats (state INTEGER REFERENCES regions(state), tot_p INTEGER)"))
+    inspections = []
+    inspect = schema_catalog.inspect
+    monkeypatch.setattr(schema_catalog, "inspect", lambda e: inspections.append(e) or inspect(e))
+    return engine, SchemaCatalog(engine, schema="main"), inspections
+
+
+def test_schema_is_introspected_once(tmp_path, monkeypatch):
+    _, catalog, inspections = make_catalog(tmp_path, monkeypatch)
+
+    first = catalog.get_prompt_text()
+    assert catalog.get_prompt_text() is first
+    assert len(inspections) == 1 and catalog.version == 1
+    assert "Table 'regions' has columns: state, area_name" in first
+    assert catalog.foreign_keys["religion_stats"] == [("state", "regions", "state")]
+
+
+def test_invalidate_reloads_and_bumps_the_version(tmp_path, monkeypatch):
+    engine, catalog, inspections = make_catalog(tmp_path, monkeypatch)
+    catalog.load()
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE tru (id INTEGER, name TEXT)"))
+    assert "tru" not in catalog.tables # still the cached copy
+
+    catalog.invalidate()
+    assert catalog.stale
+    assert "Table 'tru' has columns: id, name" in catalog.get_prompt_text()
+    assert catalog.version == 2 and len(inspections) == 2
+    assert catalog.info()["tables"] == 3
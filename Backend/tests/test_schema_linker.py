@@ -0,0 +1,49 @@
+from schema_linker import SchemaLinker
+
+RELIGION_COLUMNS = ["state", "tru_id", "religion_id"] + [
+    f"{prefix}_{sex}" for prefix in ("tot", "lit", "ill", "work", "non_work", "mainwork", "margwork", "cl", "al")
+    for sex in ("p", "m", "f")
+]
+
+
+class FakeCatalog:
+    version = 1
+    stale = False
+    tables = {
+        "regions": ["state", "area_name"],
+        "tru": ["id", "name"],
+        "religions": ["id", "religion_name"],
+        "languages": ["id", "name"],
+        "religion_stats": RELIGION_COLUMNS,
+        "language_stats": ["state", "tru_id", "language_id", "person", "male", "female"],
+        "crop_stats": ["issue_date", "crop", "season", "area_sown"],
+    }
+    foreign_keys = {
+        "religion_stats": [("state", "regions", "state"), ("tru_id", "tru", "id"), ("religion_id", "religions", "id")],
+        "language_stats": [("state", "regions", "state"), ("tru_id", "tru", "id"), ("language_id", "languages", "id")],
+    }
+
+
+def test_entities_pull_in_the_fact_table_and_its_lookups():
+    linker = SchemaLinker(FakeCatalog(), entity_extractor=lambda q: [("language", "Hindi"), ("state", "Kerala")])
+    selected, joins = linker.link("How many Hindi speakers live in Kerala?")
+
+    assert set(selected) == {"language_stats", "regions", "tru", "languages"}
+    assert "language_stats.language_id = languages.id" in joins
+
+
+def test_wide_tables_keep_keys_and_matching_columns():
+    linker = SchemaLinker(FakeCatalog(), entity_extractor=lambda q: [("religion", "Muslim")])
+    selected, _ = linker.link("Female literacy among Muslims")
+
+    columns = selected["religion_stats"]
+    assert columns[:3] == ["state", "tru_id", "religion_id"]
+    assert "lit_f" in columns and "cl_m" not in columns
+
+
+def test_unmatched_question_gets_the_full_schema():
+    linker = SchemaLinker(FakeCatalog())
+    assert linker.prune("Tell me a joke", "FULL") == "FULL"
+    pruned = linker.prune("Which crop has the largest area sown?", "FULL")
+    assert pruned == "Table 'crop_stats' has columns: issue_date, crop, season, area_sown"
+    assert linker.stats()["fallbacks"] == 1
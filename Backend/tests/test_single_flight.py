@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    async def main():
+        return await asyncio.gather(
+            flight.do("a", lambda: work(1)), flight.do("a", lambda: work(1)), flight.do("b", lambda: work(5))
+        )
+
+    assert asyncio.run(main()) == [2, 2, 10]
+    assert calls == [1, 5]
+    assert flight.stats() == {"calls": 3, "executions": 2, "coalesced": 1, "in_flight": 0}
+
+
+def test_errors_are_shared_and_not_remembered():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        results = await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+        again = await flight.do("k", lambda: asyncio.sleep(0, result="ok"))
+        return results, again
+
+    results, again = asyncio.run(main())
+    assert [str(r) for r in results] == ["boom", "boom"]
+    assert again == "ok" and flight.executions == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight("test")
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("k", lambda: asyncio.sleep(0.02, result="done")))
+        second = asyncio.ensure_future(flight.do("k", lambda: asyncio.sleep(0.02, result="other")))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
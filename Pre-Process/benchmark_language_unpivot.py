@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+from clean_language import unpivot_language_stats
+
+# ==========================================
+# 🔧 CONFIGURATION
+# ==========================================
+BASE_ROWS = 10_400 # source rows behind today's ~31k-row language_stats.csv
+SCALES = [1, 10, 100]
+LEGACY_MAX_SCALE = int(os.getenv("LEGACY_MAX_SCALE", "100")) # iterrows at 100x takes minutes
+
+def make_language_sheet(n_rows, seed=0):
+    """Synthetic frame shaped like the parsed Language.xlsx sheet (strings and blanks included)."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "table_code": "C-16",
+        "state_code": rng.integers(0, 36, n_rows).astype(str),
+        "district_code": "000",
+        "sub_district_code": "00000",
+        "area_name": "State - KERALA (32)",
+        "language_code": rng.integers(1000, 1500, n_rows),
+        "language_name": "001 ASSAMESE",
+    })
+    for prefix in ("tot", "rur", "urb"):
+        for suffix in ("p", "m", "f"):
+            values = rng.integers(0, 5_000_000, n_rows).astype(object)
+            values[rng.random(n_rows) < 0.01] = "-" # the sheet has dashes/blanks for suppressed cells
+            df[f"{prefix}_{suffix}"] = values
+    return df
+
+def legacy_unpivot(df):
+    """The previous iterrows implementation, kept as the reference for equality and timing."""
+    normalized_rows = []
+    for _, row in df.iterrows():
+        base_info = {'state': row['state_code'], 'language_id': row['language_code']}
+        normalized_rows.append({**base_info, 'tru_id': 1, 'person': row['tot_p'], 'male': row['tot_m'], 'female': row['tot_f']})
+        normalized_rows.append({**base_info, 'tru_id': 2, 'person': row['rur_p'], 'male': row['rur_m'], 'female': row['rur_f']})
+        normalized_rows.append({**base_info, 'tru_id': 3, 'person': row['urb_p'], 'male': row['urb_m'], 'female': row['urb_f']})
+    df_norm = pd.DataFrame(normalized_rows)
+    for c in ['person', 'male', 'female']:
+        df_norm[c] = pd.to_numeric(df_norm[c], errors='coerce').fillna(0).astype(int)
+    df_norm['state'] = pd.to_numeric(df_norm['state'], errors='coerce').fillna(0).astype(int)
+    return df_norm
+
+def timed(fn, df):
+    start_time = time.perf_counter()
+    result = fn(df)
+    return result, time.perf_counter() - start_time
+
+def run_benchmark():
+    print(f"{'scale':>6} {'rows in':>10} {'rows out':>10} {'legacy':>10} {'columnar':>10} {'speedup':>9}")
+    for scale in SCALES:
+        df = make_language_sheet(BASE_ROWS * scale)
+        new_result, new_seconds = timed(unpivot_language_stats, df)
+
+        legacy_seconds = None
+        if scale <= LEGACY_MAX_SCALE:
+            legacy_result, legacy_seconds = timed(legacy_unpivot, df)
+            pd.testing.assert_frame_equal(legacy_result, new_result[legacy_result.columns], check_dtype=False)
+
+        legacy = f"{legacy_seconds:9.2f}s" if legacy_seconds is not None else f"{'skipped':>10}"
+        speedup = f"{legacy_seconds / new_seconds:8.1f}x" if legacy_seconds is not None else f"{'-':>9}"
+        print(f"{scale:>5}x {len(df):>10} {len(new_result):>10} {legacy} {new_seconds:9.3f}s {speedup}")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -1,6 +1,11 @@
 import os
+import sys
 import shutil
 import pandas as pd
+from etl_manifest import file_hash
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+from staging import output_files
 
 # ==========================================
 # 🔧 CONFIGURATION
@@ -34,6 +39,9 @@ SOURCES = {
     ],
     "output_normalized_crops": [
         "crops.csv"
+    ],
+    "output_normalized_regions": [
+        "region_hierarchy.csv"
     ]
 }
 
@@ -45,6 +53,7 @@ def consolidate():
     print("-" * 40)
 
     copied_count = 0
+    unchanged_count = 0
     for folder, files in SOURCES.items():
         src_folder_path = os.path.join(BASE_DIR, folder)
         
@@ -57,11 +66,16 @@ def consolidate():
                 print(f"⚠️  Warning: Source folder not found: {folder}")
                 continue
 
-        for filename in files:
+        # Every staged format of each output (e.g. regions.parquet and/or regions.csv)
+        for filename in (name for output in files for name in output_files(output)):
             src_file = os.path.join(src_folder_path, filename)
             dst_file = os.path.join(OUTPUT_DIR, filename)
 
             if os.path.exists(src_file):
+                if os.path.exists(dst_file) and file_hash(src_file) == file_hash(dst_file):
+                    # Identical content: keep the staged file (and its mtime) as is.
+                    unchanged_count += 1
+                    continue
                 shutil.copy2(src_file, dst_file)
                 print(f"✅ Copied: {filename:<25} (from {os.path.basename(src_folder_path)})")
                 copied_count += 1
@@ -73,7 +87,7 @@ def consolidate():
         f.write("UNIFIED CENSUS DATA STAGING AREA\n")
     
     print("-" * 40)
-    print(f"🎉 Success! {copied_count} files consolidated into 'unified_outputs/'.")
+    print(f"🎉 Success! {copied_count} files consolidated into 'unified_outputs/' ({unchanged_count} unchanged).")
 
 if __name__ == "__main__":
     consolidate()
\ No newline at end of file
@@ -0,0 +1,76 @@
+import os
+import json
+import hashlib
+
+# ==========================================
+# 🔧 CONFIGURATION
+# ==========================================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_FILE = os.path.join(BASE_DIR, "etl_manifest.json")
+CHUNK_SIZE = 1024 * 1024
+
+def file_hash(path):
+    """SHA-256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class Manifest:
+    """
+    Content hashes of the files each ETL step last consumed, persisted as JSON.
+
+    `files` caches hash per path keyed on (size, mtime) so unchanged files are never re-read;
+    `sections` (e.g. "stages", "uploaded") record which hashes a step last completed with, so
+    the step can be skipped when they still match.
+    """
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self.data = {"files": {}, "sections": {}}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable manifest {path}: {e}")
+        self.data.setdefault("files", {})
+        self.data.setdefault("sections", {})
+
+    def hash(self, path):
+        """Content hash of `path` (None if missing), reusing the cached one if size/mtime match."""
+        if not os.path.exists(path):
+            return None
+        key = os.path.relpath(os.path.abspath(path), BASE_DIR)
+        stat = os.stat(path)
+        cached = self.data["files"].get(key)
+        if cached and cached["size"] == stat.st_size and cached["mtime"] == stat.st_mtime:
+            return cached["sha256"]
+        sha256 = file_hash(path)
+        self.data["files"][key] = {"sha256": sha256, "size": stat.st_size, "mtime": stat.st_mtime}
+        return sha256
+
+    def signature(self, paths):
+        """{relative path: hash} for a set of files."""
+        return {os.path.relpath(os.path.abspath(p), BASE_DIR): self.hash(p) for p in paths}
+
+    def changed(self, section, key, paths):
+        """True if any of `paths` differs from what `section/key` last completed with."""
+        recorded = self.data["sections"].get(section, {}).get(key)
+        return recorded != self.signature(paths)
+
+    def record(self, section, key, paths):
+        self.data["sections"].setdefault(section, {})[key] = self.signature(paths)
+
+    def forget(self, section, key=None):
+        if key is None:
+            self.data["sections"].pop(section, None)
+        else:
+            self.data["sections"].get(section, {}).pop(key, None)
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -2,6 +2,7 @@ import os
 import json
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, inspect
+from upload_unified_data import physical_table
 
 # Load environment variables
 load_dotenv()
@@ -25,7 +26,7 @@ OUTPUT_FILE = "database_schema.json"
 # List of tables to export
 TARGET_TABLES = [
     # Masters
-    "regions", "tru", "religions", "languages", "age_groups",
+    "regions", "region_hierarchy", "tru", "religions", "languages", "age_groups",
     # Data
     "population_stats", "healthcare_stats", "education_stats", 
     "religion_stats", "occupation_stats", "language_stats", "crop_stats"
@@ -44,19 +45,21 @@ def export_schema_to_json():
         existing_tables = inspector.get_table_names()
         
         for table_name in TARGET_TABLES:
-            if table_name not in existing_tables:
+            # Area-level facts live in <table>_by_area (keys, FKs); <table> is a view over it.
+            source_table = physical_table(table_name)
+            if source_table not in existing_tables:
                 print(f"⚠️  Skipping {table_name} (Not found in DB)")
                 continue
                 
-            print(f"   Processing table: {table_name}...")
+            print(f"   Processing table: {source_table}...")
             
             # 1. Fetch Columns
-            columns = inspector.get_columns(table_name)
+            columns = inspector.get_columns(source_table)
             
             # 2. Fetch Constraints
-            pk_constraint = inspector.get_pk_constraint(table_name)
+            pk_constraint = inspector.get_pk_constraint(source_table)
             primary_keys = pk_constraint.get('constrained_columns', [])
-            fks = inspector.get_foreign_keys(table_name)
+            fks = inspector.get_foreign_keys(source_table)
             
             # 3. Build Column Data
             table_columns = []
@@ -0,0 +1,219 @@
+import os
+import sys
+import time
+import importlib
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from etl_manifest import Manifest
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+# ==========================================
+# 🔧 CONFIGURATION
+# ==========================================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, "scripts")
+sys.path.insert(0, SCRIPTS_DIR)
+from staging import output_files
+OUTPUT_DIR = os.path.join(BASE_DIR, "unified_outputs")
+STAGE_WORKERS = int(os.getenv("STAGE_WORKERS", str(min(7, os.cpu_count() or 1))))
+# Below this much pending input, stages run in this process: spawning workers (each re-importing
+# pandas) costs more than the cleaning itself.
+PARALLEL_MIN_INPUT_MB = float(os.getenv("PARALLEL_MIN_INPUT_MB", "64"))
+
+# Helper modules in scripts/ shared by the stages; editing one re-runs every stage.
+SHARED_MODULES = ["state_resolver.py", "staging.py", "chunked_reader.py", "region_keys.py"]
+
+# Stage module in scripts/ -> its entry point. Each module declares INPUT_FILE (or input_files()) and OUTPUTS.
+STAGES = {
+    "clean_healthcare": "process_healthcare_data",
+    "clean_population": "process_population_data",
+    "clean_education": "process_pca_data",
+    "clean_religion": "process_religion_data",
+    "clean_occupation": "process_occupation_data",
+    "clean_language": "process_language_data",
+    "clean_crops_pdf": "process_crops_data",
+    "clean_regions": "process_region_data",
+}
+
+def import_stage(module_name):
+    return importlib.import_module(module_name)
+
+def stage_declarations():
+    """{stage: (input paths, output paths in unified_outputs)}; stages that can't be imported are reported and left out."""
+    declarations = {}
+    for module_name in STAGES:
+        try:
+            module = import_stage(module_name)
+        except ImportError as e:
+            print(f"   ⚠️  {module_name:<18} unavailable ({e})")
+            continue
+        # The script itself counts as an input: editing a cleaner re-runs it.
+        # Stages reading a directory list its files with input_files(), so adding a file re-runs them too.
+        sources = module.input_files() if hasattr(module, "input_files") else [module.INPUT_FILE]
+        inputs = [os.path.abspath(p) for p in sources] + [os.path.abspath(module.__file__)]
+        inputs += [os.path.join(SCRIPTS_DIR, name) for name in SHARED_MODULES]
+        outputs = [os.path.join(OUTPUT_DIR, name) for output in module.OUTPUTS for name in output_files(output)]
+        declarations[module_name] = (inputs, outputs)
+    return declarations
+
+def build_stage_levels(declarations):
+    """
+    Groups stages so every stage only consumes outputs of stages in earlier levels.
+    Returns (levels, {stage: stages it consumes from}).
+    """
+    producers = {path: stage for stage, (_, outputs) in declarations.items() for path in outputs}
+    depends_on = {
+        stage: {producers[path] for path in inputs if path in producers and producers[path] != stage}
+        for stage, (inputs, _) in declarations.items()
+    }
+    levels, done, remaining = [], set(), list(declarations)
+    while remaining:
+        level = [stage for stage in remaining if depends_on[stage] <= done]
+        if not level:
+            raise ValueError(f"Circular stage dependencies between: {', '.join(remaining)}")
+        levels.append(level)
+        done |= set(level)
+        remaining = [stage for stage in remaining if stage not in level]
+    return levels, depends_on
+
+def reset_peak_memory():
+    """
+    Restarts the process's peak-RSS count (Linux), so the next reading is one stage's own.
+    Returns False where it can't be reset: readings are then the process's cumulative peak.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _status_mb(field):
+    """A memory field of /proc/self/status (Linux) in MB, or None."""
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith(f"{field}:")) / 1024
+    except (OSError, StopIteration):
+        return None
+
+def peak_memory_mb():
+    peak = _status_mb("VmHWM")
+    if peak is not None:
+        return peak
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024 # bytes on macOS, KiB on Linux
+
+def run_stage(module_name, output_dir=OUTPUT_DIR):
+    """
+    Worker: imports the cleaner and runs it, writing straight into `output_dir`.
+    Returns (stage, ok, seconds, peak MB, MB the stage added over what was already resident or
+    None): workers and the in-process runner are reused across stages, so where the peak can't
+    be reset it is the process's cumulative peak and no growth is reported.
+    """
+    module = import_stage(module_name)
+    baseline = _status_mb("VmRSS") if reset_peak_memory() else None
+    start_time = time.perf_counter()
+    started_at = time.time()
+    try:
+        getattr(module, STAGES[module_name])(output_dir=output_dir)
+        # Cleaners print their errors and return; success means every declared output was rewritten.
+        ok = all(
+            os.path.exists(p) and os.path.getmtime(p) >= started_at - 1
+            for p in (os.path.join(output_dir, name) for output in module.OUTPUTS for name in output_files(output))
+        )
+    except Exception as e:
+        print(f"❌ {module_name} failed: {e}")
+        ok = False
+    seconds = time.perf_counter() - start_time
+    peak = peak_memory_mb()
+    growth = peak - baseline if peak is not None and baseline is not None else None
+    return module_name, ok, seconds, peak, growth
+
+class InlinePool:
+    """Runs the stages one after another in this process, with the pool's `map` interface."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def map(self, fn, items):
+        return map(fn, items)
+
+def input_size_mb(stages, declarations):
+    paths = {p for stage in stages for p in declarations[stage][0]}
+    return sum(os.path.getsize(p) for p in paths if os.path.isfile(p)) / (1024 * 1024)
+
+def make_pool(workers, input_mb):
+    if workers <= 1 or input_mb < PARALLEL_MIN_INPUT_MB:
+        return InlinePool()
+    # Workers are reused across stages and levels, so pandas & co. are imported once per worker.
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def run_pipeline(force=False, upload=True, workers=STAGE_WORKERS):
+    """Runs the changed cleaners in parallel straight into unified_outputs, then uploads changed tables."""
+    manifest = Manifest()
+    if force:
+        manifest.forget("stages")
+        manifest.forget("uploaded")
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    print("🔍 Checking stages...")
+    declarations = stage_declarations()
+    pending = set()
+    for stage, (inputs, outputs) in declarations.items():
+        if manifest.changed("stages", stage, inputs) or any(not os.path.exists(p) for p in outputs):
+            pending.add(stage)
+        else:
+            print(f"   ⏭️  {stage:<18} unchanged")
+
+    timings = []
+    run_start = time.perf_counter()
+    levels, depends_on = build_stage_levels(declarations)
+    rerun = set()
+    # Downstream stages may re-run too, but the inputs of the pending ones decide the pool.
+    input_mb = input_size_mb(pending, declarations)
+    with make_pool(max(1, workers), input_mb) as pool:
+        if isinstance(pool, InlinePool):
+            print(f"🧵 Running stages in-process ({input_mb:.1f} MB of input, {max(1, workers)} worker(s) allowed)")
+        for level in levels:
+            # A stage also re-runs when a stage it consumes from just re-ran.
+            level = [stage for stage in level if stage in pending or depends_on[stage] & rerun]
+            if not level:
+                continue
+            print(f"▶️  Running {', '.join(level)}")
+            for stage, ok, seconds, peak_mb, growth_mb in pool.map(run_stage, level):
+                timings.append((stage, ok, seconds, peak_mb, growth_mb))
+                if ok:
+                    rerun.add(stage)
+                    manifest.record("stages", stage, declarations[stage][0])
+                else:
+                    manifest.forget("stages", stage)
+            manifest.save()
+    wall_time = time.perf_counter() - run_start
+
+    if timings:
+        print("\n⏱️  Stage times:")
+        for stage, ok, seconds, peak_mb, growth_mb in sorted(timings, key=lambda t: -t[2]):
+            if peak_mb is None:
+                memory = ""
+            elif growth_mb is None:
+                memory = f"{peak_mb:8.1f} MB process peak so far"
+            else:
+                memory = f"{peak_mb:8.1f} MB peak RSS (+{growth_mb:.1f} MB in stage)"
+            print(f"   {'✅' if ok else '❌'} {stage:<18} {seconds:8.2f}s {memory}")
+        print(f"   Wall time {wall_time:.2f}s vs {sum(t[2] for t in timings):.2f}s sequential.\n")
+
+    if upload:
+        subprocess.run([sys.executable, "upload_unified_data.py", "--changed-only"], cwd=BASE_DIR)
+
+if __name__ == "__main__":
+    run_pipeline(force="--force" in sys.argv, upload="--no-upload" not in sys.argv)
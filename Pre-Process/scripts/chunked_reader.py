@@ -0,0 +1,138 @@
+import os
+import math
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+# ==========================================
+# 🔧 CONFIGURATION
+# ==========================================
+CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "50000")) # rows per DataFrame handed to a cleaner
+
+# Leading bytes -> real format (census downloads are often misnamed)
+MAGIC_BYTES = [
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "xls"), # OLE2 / BIFF
+    (b"PK\x03\x04", "xlsx"),                       # OOXML zip
+    (b"%PDF", "pdf"),
+]
+
+def detect_format(path):
+    """Real format of `path` from its leading bytes: 'xls', 'xlsx', 'pdf', 'html' or 'csv'."""
+    with open(path, "rb") as f:
+        head = f.read(512)
+    for magic, fmt in MAGIC_BYTES:
+        if head.startswith(magic):
+            return fmt
+    if head.lstrip().lower().startswith((b"<!doctype html", b"<html", b"<table")):
+        return "html"
+    return "csv"
+
+# --- Cell conversion (matches pd.read_excel, so chunked output equals a full read) ---
+def _xls_rows(path):
+    import xlrd
+    from xlrd import XL_CELL_BOOLEAN, XL_CELL_DATE, XL_CELL_ERROR, XL_CELL_NUMBER, xldate
+
+    # BIFF can't be streamed, but .xls caps a sheet at 65,536 rows and on_demand loads only this sheet.
+    book = xlrd.open_workbook(path, on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        for i in range(sheet.nrows):
+            row = []
+            for value, typ in zip(sheet.row_values(i), sheet.row_types(i)):
+                if typ == XL_CELL_NUMBER and math.isfinite(value) and int(value) == value:
+                    value = int(value)
+                elif typ == XL_CELL_DATE:
+                    value = xldate.xldate_as_datetime(value, book.datemode)
+                elif typ == XL_CELL_BOOLEAN:
+                    value = bool(value)
+                elif typ == XL_CELL_ERROR:
+                    value = np.nan
+                row.append(value)
+            yield row
+    finally:
+        book.release_resources()
+
+def _xlsx_rows(path):
+    from openpyxl import load_workbook
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    # read_only streams the sheet XML row by row instead of building the whole workbook.
+    # Opened from a file object: given a path, openpyxl rejects a misnamed '.xls' by its extension.
+    with open(path, "rb") as f:
+        book = load_workbook(f, read_only=True, data_only=True)
+        try:
+            sheet = book.worksheets[0]
+            sheet.reset_dimensions()
+            blank_run = 0
+            for cells in sheet.rows:
+                row = []
+                for cell in cells:
+                    value = cell.value
+                    if value is None:
+                        value = ""
+                    elif cell.data_type == TYPE_ERROR:
+                        value = np.nan
+                    elif cell.data_type == TYPE_NUMERIC and int(value) == value:
+                        value = int(value)
+                    row.append(value)
+                while row and row[-1] == "":
+                    row.pop()
+                if not row:
+                    blank_run += 1 # only kept if data follows (trailing blank rows are dropped)
+                    continue
+                for _ in range(blank_run):
+                    yield []
+                blank_run = 0
+                yield row
+        finally:
+            book.close()
+
+def _parse_rows(rows, names, dtype):
+    width = len(names)
+    for row in rows:
+        if len(row) > width:
+            raise ValueError(f"Row has {len(row)} cells but only {width} columns are named")
+    rows = [row + [""] * (width - len(row)) for row in rows]
+    return TextParser(rows, header=None, names=names, dtype=dtype, skip_blank_lines=False).read()
+
+def _excel_chunks(rows, chunksize, skiprows, header, names, dtype):
+    rows = iter(rows)
+    for _ in range(skiprows):
+        next(rows, None)
+    if header is not None:
+        header_row = next(rows, None)
+        if header_row is None:
+            return
+        # Let pandas mangle blank/duplicate headers exactly as read_excel does ('Unnamed: 3', 'x.1').
+        parsed = TextParser([header_row], header=0, skip_blank_lines=False).read().columns
+        names = names or list(parsed)
+    if names is None:
+        raise ValueError("Chunked reads need a header row or explicit column names")
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunksize:
+            yield _parse_rows(batch, names, dtype)
+            batch = []
+    if batch:
+        yield _parse_rows(batch, names, dtype)
+
+def iter_chunks(path, chunksize=None, skiprows=0, header=0, names=None, dtype=None):
+    """
+    Yields `path`'s first sheet as DataFrames of at most `chunksize` rows.
+
+    Dispatches on the real file format (not the extension): .xlsx streams through openpyxl's
+    read-only mode, legacy .xls through xlrd, text through pd.read_csv. Arguments mean what they
+    mean for pd.read_excel, and concatenating the chunks gives the same frame as one full read.
+    """
+    chunksize = chunksize or CHUNK_ROWS
+    fmt = detect_format(path)
+    if fmt == "xls":
+        yield from _excel_chunks(_xls_rows(path), chunksize, skiprows, header, names, dtype)
+    elif fmt == "xlsx":
+        yield from _excel_chunks(_xlsx_rows(path), chunksize, skiprows, header, names, dtype)
+    elif fmt == "csv":
+        yield from pd.read_csv(path, chunksize=chunksize, skiprows=skiprows, header=header, names=names, dtype=dtype)
+    else:
+        raise ValueError(f"{os.path.basename(path)} is {fmt.upper()}, not a spreadsheet")
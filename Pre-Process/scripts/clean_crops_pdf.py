@@ -1,68 +1,234 @@
 import pdfplumber
 import pandas as pd
+import glob
+import re
 import os
+from concurrent.futures import ProcessPoolExecutor
+from staging import write_output
 
 # ==========================================
 # 🔧 CONFIGURATION
 # ==========================================
-INPUT_PDF = "../input/Crops.pdf"
-OUTPUT_DIR = "../output_normalized_crops"
-OUTPUT_CSV = os.path.join(OUTPUT_DIR, "crops.csv")
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_DIR = os.path.join(SCRIPT_DIR, "..", "input", "crops") # one PDF per weekly bulletin
+INPUT_FILE = INPUT_DIR
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "..", "output_normalized_crops")
+OUTPUT_CSV = "crops.csv"
+OUTPUTS = [OUTPUT_CSV]
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+# Header text -> (column name, seasonal); first matching rule wins. A seasonal column's header
+# season (YYYY-YY) becomes the row's `season` key; other headers only cite seasons they compare.
+COLUMN_RULES = [
+    (r'normal', "normal_area_dafw", False),
+    (r'sown', "area_sown", True),
+    (r'difference', "difference_area", False),
+    (r'%|increase|decrease', "pct_increase_decrease", False),
+]
+SEASON_RE = re.compile(r'(\d{4})\s*-\s*(\d{2})(?!\d)')
+ISSUE_DATE_RE = re.compile(
+    r'as\s+on\s+(\d{4}-\d{2}-\d{2}|\d{1,2}[./-]\d{1,2}[./-]\d{4}|\d{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]+,?\s+\d{4})',
+    re.IGNORECASE,
+)
+FILENAME_DATE_RE = re.compile(r'(\d{4}-\d{2}-\d{2}|\d{2}[._-]\d{2}[._-]\d{4})')
 
-def extract_crops_data(pdf_path):
-    print(f"📖 Opening PDF: {pdf_path}")
-    
-    with pdfplumber.open(pdf_path) as pdf:
-        page = pdf.pages[0]
-        table = page.extract_table()
-        
-    if not table:
-        print("❌ No table found.")
-        return None
+def input_files(input_dir=INPUT_DIR):
+    """Every bulletin PDF in `input_dir`, in name order."""
+    return sorted(p for p in glob.glob(os.path.join(input_dir, "*")) if p.lower().endswith(".pdf"))
 
-    df = pd.DataFrame(table)
-    
-    # Select specific columns based on your PDF structure
-    target_indices = [0, 2, 5, 8, 11, 14]
-    
-    if df.shape[1] <= max(target_indices):
-        print(f"⚠️ Table width ({df.shape[1]}) is smaller than expected.")
+def parse_number(text):
+    if text is None: return None
+    s = str(text).replace(',', '').replace('−', '-').strip()
+    try:
+        return float(s)
+    except ValueError:
         return None
 
-    df_clean = df.iloc[:, target_indices].copy()
+def to_date(value):
+    """'2025-09-12', '12.09.2025' or '12th September 2025' -> Timestamp (NaT if unparseable)."""
+    value = re.sub(r'(\d)(st|nd|rd|th)\b', r'\1', value).replace('_', '-')
+    return pd.to_datetime(value, dayfirst=not re.match(r'\d{4}-', value), errors='coerce')
+
+def parse_issue_date(text):
+    """Bulletin date from its title ('... area coverage as on 2025-09-12')."""
+    match = ISSUE_DATE_RE.search(text or "")
+    return to_date(match.group(1)) if match else None
+
+def column_key(header):
+    """
+    'Area Sown 2025- 26' -> ('area_sown', '2025-26'); non-seasonal columns get season None.
+    Unknown headers are snake_cased without their season.
+    """
+    text = re.sub(r'\s+', ' ', header).strip().lower()
+    season = SEASON_RE.search(text)
+    for pattern, name, seasonal in COLUMN_RULES:
+        if re.search(pattern, text):
+            return name, (f"{season.group(1)}-{season.group(2)}" if seasonal and season else None)
+    return re.sub(r'[^a-z0-9]+', '_', SEASON_RE.sub(' ', text)).strip('_')[:60] or "value", None
+
+def unique_names(keys):
+    """(name, season) per column -> names; repeats of the same pair get a _2, _3 ... suffix."""
+    seen = {}
+    result = []
+    for name, season in keys:
+        seen[(name, season)] = seen.get((name, season), 0) + 1
+        count = seen[(name, season)]
+        result.append(name if count == 1 else f"{name}_{count}")
+    return result
 
-    clean_headers = [
-        "crop",
-        "normal_area_dafw",
-        "area_sown_2025_26",
-        "area_sown_2024_25",
-        "difference_area",
-        "pct_increase_decrease"
+def is_data_row(texts, min_values):
+    """A crop label in the first filled cell followed by at least `min_values` numbers."""
+    filled = [t for t in texts if t not in (None, "")]
+    if not filled or parse_number(filled[0]) is not None:
+        return False
+    return sum(parse_number(t) is not None for t in filled[1:]) >= min_values
+
+def detect_layout(texts, boxes):
+    """
+    Finds the header of a pdfplumber table and names its value columns.
+
+    The first row with a label and two or more numbers is the first data row; its numeric cells
+    give each value column's x-range. Every header cell above it is assigned to the columns it
+    overlaps, so merged cells ('Area Sown' over two seasons) label all of them. Cells spanning
+    every column are banners (titles, units) and are ignored.
+    Returns (first data row, [(name, season, x0, x1)]), or (first data row, None) when the page has no header.
+    """
+    first = next((i for i, row in enumerate(texts) if is_data_row(row, min_values=2)), None)
+    if first is None:
+        return None, None
+    groups = [
+        (box[0], box[2]) for box, text in zip(boxes[first], texts[first])
+        if box is not None and parse_number(text) is not None
     ]
-    df_clean.columns = clean_headers
-
-    # Clean Data Rows
-    df_clean = df_clean.iloc[9:].reset_index(drop=True)
-    df_clean = df_clean.replace(r'\n', ' ', regex=True)
-    df_clean = df_clean[df_clean['crop'].notna() & (df_clean['crop'] != "")]
-    
-    # --- FIX: Force Numeric Conversion ---
-    print("🔢 Converting metrics to Numeric (Float)...")
-    numeric_cols = ["normal_area_dafw", "area_sown_2025_26", "area_sown_2024_25", "difference_area", "pct_increase_decrease"]
-    
-    for col in numeric_cols:
-        # Clean up potential commas or spaces in numbers
-        if df_clean[col].dtype == object:
-            df_clean[col] = df_clean[col].astype(str).str.replace(',', '', regex=False)
-        df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(0.0)
-
-    return df_clean
+    labels = [[] for _ in groups]
+    for row_texts, row_boxes in zip(texts[:first], boxes[:first]):
+        for text, box in zip(row_texts, row_boxes):
+            if box is None or not text:
+                continue
+            covered = [
+                g for g, (x0, x1) in enumerate(groups)
+                if min(x1, box[2]) - max(x0, box[0]) >= 0.5 * min(x1 - x0, box[2] - box[0])
+            ]
+            if len(covered) < len(groups):
+                for g in covered:
+                    labels[g].append(text)
+    if not any(labels):
+        return first, None
+    keys = [column_key(" ".join(parts)) for parts in labels]
+    names = unique_names(keys)
+    return first, [(name, season, x0, x1) for name, (_, season), (x0, x1) in zip(names, keys, groups)]
+
+def extract_page(task):
+    """
+    Worker: parses one PDF page.
+    Returns its issue date, detected column layout (None on continuation pages) and data rows as
+    (crop, [(x centre, value)]); the parent applies the layout, so pages can be parsed in any order.
+    """
+    pdf_path, page_number = task
+    with pdfplumber.open(pdf_path) as pdf:
+        page = pdf.pages[page_number]
+        issue_date = parse_issue_date(page.extract_text())
+        tables = page.find_tables()
+        table = max(tables, key=lambda t: len(t.rows)) if tables else None
+        texts = table.extract() if table else []
+        boxes = [row.cells for row in table.rows] if table else []
+
+    first, layout = detect_layout(texts, boxes)
+    rows = []
+    for row_texts, row_boxes in zip(texts[first or 0:], boxes[first or 0:]):
+        if not is_data_row(row_texts, min_values=1):
+            continue
+        label = next(t for t in row_texts if t not in (None, ""))
+        values = [
+            ((box[0] + box[2]) / 2, parse_number(text))
+            for text, box in zip(row_texts, row_boxes)
+            if box is not None and parse_number(text) is not None
+        ]
+        rows.append((label.replace('\n', ' ').strip(), values))
+    return {"path": pdf_path, "page": page_number, "issue_date": issue_date, "layout": layout, "rows": rows}
+
+def page_frame(rows, layout):
+    """
+    Places each numeric cell in the layout column whose x-range holds its centre, one row per
+    (crop, season). Seasonal columns ('Area Sown 2025-26', '... 2024-25') fill the row of their
+    season; the rest (normal area, difference, %) compare the latest season with the one before,
+    so they go on the latest season's row and stay NULL on the earlier one.
+    """
+    seasons = sorted({season for _, season, _, _ in layout if season}, reverse=True) or [None]
+    names = list(dict.fromkeys(name for name, _, _, _ in layout))
+    records = []
+    for crop, values in rows:
+        cells = {}
+        for x, value in values:
+            column = next(((name, season) for name, season, x0, x1 in layout if x0 <= x <= x1), None)
+            if column is not None:
+                cells[column] = value
+        for season in seasons:
+            record = {"crop": crop, "season": season}
+            for name, column_season, _, _ in layout:
+                if column_season == season or (column_season is None and season == seasons[0]):
+                    record[name] = cells.get((name, column_season)) # a blank PDF cell stays NULL, not 0
+            records.append(record)
+    df = pd.DataFrame(records, columns=["crop", "season"] + names)
+    df[names] = df[names].astype(float)
+    return df
+
+def extract_crops_data(pdf_paths, workers=PDF_WORKERS):
+    """Parses every page of every bulletin in a process pool and stacks them into one table."""
+    tasks = []
+    for pdf_path in pdf_paths:
+        with pdfplumber.open(pdf_path) as pdf:
+            tasks += [(pdf_path, n) for n in range(len(pdf.pages))]
+    print(f"📖 Parsing {len(tasks)} pages from {len(pdf_paths)} PDFs ({workers} workers)...")
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pages = list(pool.map(extract_page, tasks))
+    else:
+        pages = [extract_page(task) for task in tasks]
+
+    frames = []
+    issue_date, layout, current_pdf = None, None, None
+    for page in pages: # in (pdf, page) order
+        name = f"{os.path.basename(page['path'])} p{page['page'] + 1}"
+        if page["path"] != current_pdf:
+            current_pdf = page["path"]
+            file_date = FILENAME_DATE_RE.search(os.path.basename(current_pdf))
+            issue_date = to_date(file_date.group(1)) if file_date else None
+            layout = None
+        # Continuation pages reuse the issue date and header of the page before them.
+        issue_date = page["issue_date"] if page["issue_date"] is not None else issue_date
+        layout = page["layout"] or layout
+        if not page["rows"]:
+            continue
+        if layout is None:
+            print(f"⚠️  {name}: no header found; skipping {len(page['rows'])} rows.")
+            continue
+        if issue_date is None or pd.isna(issue_date):
+            print(f"⚠️  {name}: no issue date found.")
+        df = page_frame(page["rows"], layout)
+        df.insert(0, "issue_date", issue_date)
+        frames.append(df)
+
+    if not frames:
+        print("❌ No table found.")
+        return None
+    df = pd.concat(frames, ignore_index=True)
+    df['issue_date'] = pd.to_datetime(df['issue_date'])
+    print(f"🔢 {len(df)} crop rows, {df['issue_date'].nunique()} issues.")
+    return df
+
+def process_crops_data(input_file=INPUT_DIR, output_dir=OUTPUT_DIR):
+    pdf_paths = input_files(input_file) if os.path.isdir(input_file) else [input_file]
+    if not pdf_paths:
+        print(f"❌ No PDFs in: {input_file}")
+        return
+    df_result = extract_crops_data(pdf_paths)
 
-if __name__ == "__main__":
-    df_result = extract_crops_data(INPUT_PDF)
-    
     if df_result is not None:
-        df_result.to_csv(OUTPUT_CSV, index=False)
-        print(f"\n💾 Saved Clean CSV to: {OUTPUT_CSV}")
\ No newline at end of file
+        os.makedirs(output_dir, exist_ok=True)
+        saved = write_output(df_result, output_dir, OUTPUT_CSV)
+        print(f"\n💾 Saved clean data to: {', '.join(saved)}")
+
+if __name__ == "__main__":
+    process_crops_data()
@@ -1,17 +1,20 @@
 import pandas as pd
 import re
 import os
+from region_keys import add_region_keys
+from state_resolver import resolve_codes
+from staging import StagedWriter
+from chunked_reader import iter_chunks
 
 # ==========================================
 # 🔧 CONFIGURATION
 # ==========================================
-INPUT_FILE = "../input/education.xls"
-OUTPUT_DIR = "../output_normalized_education"
-TRU_FILE = os.path.join(OUTPUT_DIR, "tru.csv")
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_FILE = os.path.join(SCRIPT_DIR, "..", "input", "education.xls")
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "..", "output_normalized_education")
 # FIX: Renamed output file
-PCA_STATS_FILE = os.path.join(OUTPUT_DIR, "education_stats.csv")
-
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+PCA_STATS_FILE = "education_stats.csv"
+OUTPUTS = [PCA_STATS_FILE]
 
 def clean_column_name(name):
     if not name: return "col"
@@ -23,45 +26,47 @@ def clean_column_name(name):
     s = s.replace('population_female', 'female')
     return s[:60]
 
-def process_pca_data():
-    print(f"📖 Reading: {INPUT_FILE}")
-    try:
-        df = pd.read_csv(INPUT_FILE)
-    except:
-        try:
-            df = pd.read_excel(INPUT_FILE)
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return
-
+def transform_chunk(df):
+    """Cleans one batch of PCA rows (every step is row-local)."""
     df.columns = [clean_column_name(c) for c in df.columns]
     
     if 'state_code' in df.columns:
         df.rename(columns={'state_code': 'state'}, inplace=True)
     
-    print("   Standardizing TRU...")
     tru_map = {"Total": 1, "Rural": 2, "Urban": 3}
-    pd.DataFrame(list(tru_map.items()), columns=['name', 'id'])[['id', 'name']].to_csv(TRU_FILE, index=False)
 
     df['tru_clean'] = df['tru'].astype(str).str.title()
     df['tru_id'] = df['tru_clean'].map(tru_map)
 
-    print("🔢 Converting metrics to Numeric (Int)...")
     keys = ['state', 'tru_id']
     for col in df.columns:
         if col not in keys and col not in ['tru', 'tru_clean', 'name', 'level']:
-            if col in ['district_code', 'subdistt_code', 'townvillage_code', 'state_code1', 'ward_code', 'eb_code']: 
+            if col in ['district_code', 'subdistt_code', 'townvillage_code', 'state_code1', 'district_code1', 'subdistt_code1', 'townvillage_code1', 'ward_code', 'eb_code']: 
                 continue
             df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
 
-    cols_to_drop = ['district_code', 'subdistt_code', 'townvillage_code', 'state_code1', 'ward_code', 'eb_code', 'level', 'name', 'tru', 'tru_clean']
+    names = df['name'] if 'name' in df.columns else None
+    # The *_code1 columns repeat the location codes; the codes themselves become region keys.
+    cols_to_drop = ['state_code1', 'district_code1', 'subdistt_code1', 'townvillage_code1', 'ward_code', 'eb_code', 'level', 'name', 'tru', 'tru_clean']
     df.drop(columns=[c for c in cols_to_drop if c in df.columns], inplace=True, errors='ignore')
 
     if 'state' in df.columns:
-        df['state'] = df['state'].fillna(0).astype(int)
+        df['state'] = resolve_codes(df['state'], names).fillna(0).astype(int)
+    return add_region_keys(df, 'district_code', 'subdistt_code', 'townvillage_code')
+
+def process_pca_data(input_file=INPUT_FILE, output_dir=OUTPUT_DIR):
+    print(f"📖 Reading: {input_file}")
+    os.makedirs(output_dir, exist_ok=True)
+    print("🔢 Standardizing TRU & converting metrics to Numeric (Int), chunk by chunk...")
+    try:
+        with StagedWriter(output_dir, PCA_STATS_FILE) as writer:
+            for chunk in iter_chunks(input_file):
+                writer.write(transform_chunk(chunk))
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return
 
-    df.to_csv(PCA_STATS_FILE, index=False)
-    print(f"✅ Created '{PCA_STATS_FILE}'")
+    print(f"✅ Created {', '.join(writer.paths)} ({writer.rows} rows)")
 
 if __name__ == "__main__":
     if os.path.exists(INPUT_FILE):
@@ -1,36 +1,25 @@
 import pandas as pd
 import re
 import os
+from region_keys import add_region_keys
+from state_resolver import regions_frame, resolve_names
+from staging import StagedWriter, write_output
+from chunked_reader import iter_chunks
 
 # ==========================================
 # 🔧 CONFIGURATION
 # ==========================================
-INPUT_FILE = "../input/Healthcare.xls"
-OUTPUT_DIR = "../output_normalized_healthcare"
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_FILE = os.path.join(SCRIPT_DIR, "..", "input", "Healthcare.xls")
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "..", "output_normalized_healthcare")
 
 # Master Files
-REGIONS_FILE = os.path.join(OUTPUT_DIR, "regions.csv")
-TRU_FILE = os.path.join(OUTPUT_DIR, "tru.csv")
+REGIONS_FILE = "regions.csv"
+TRU_FILE = "tru.csv"
 
 # Output for this specific dataset
-STATS_FILE = os.path.join(OUTPUT_DIR, "healthcare_stats.csv")
-
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-# ==========================================
-# 🗺️ MASTER STATE MAPPING
-# ==========================================
-MASTER_STATES = {
-    0: "India", 1: "Jammu & Kashmir", 2: "Himachal Pradesh", 3: "Punjab", 4: "Chandigarh",
-    5: "Uttarakhand", 6: "Haryana", 7: "NCT of Delhi", 8: "Rajasthan", 9: "Uttar Pradesh",
-    10: "Bihar", 11: "Sikkim", 12: "Arunachal Pradesh", 13: "Nagaland", 14: "Manipur",
-    15: "Mizoram", 16: "Tripura", 17: "Meghalaya", 18: "Assam", 19: "West Bengal",
-    20: "Jharkhand", 21: "Odisha", 22: "Chhattisgarh", 23: "Madhya Pradesh", 24: "Gujarat",
-    25: "Daman & Diu", 26: "Dadra & Nagar Haveli", 27: "Maharashtra", 28: "Andhra Pradesh",
-    29: "Karnataka", 30: "Goa", 31: "Lakshadweep", 32: "Kerala", 33: "Tamil Nadu",
-    34: "Puducherry", 35: "Andaman & Nicobar Islands",
-    36: "Dadra and Nagar Haveli and Daman and Diu", 37: "Ladakh", 38: "Telangana"
-}
+STATS_FILE = "healthcare_stats.csv"
+OUTPUTS = [REGIONS_FILE, TRU_FILE, STATS_FILE]
 
 def clean_column_name(name):
     if not name: return "col"
@@ -48,19 +37,6 @@ def clean_column_name(name):
     s = re.sub(r'[^a-z0-9_]', '', s)
     return s[:60]
 
-def get_state_id(name):
-    if pd.isna(name): return None
-    name = str(name).strip().lower()
-    name = name.replace('&', 'and').replace(' and ', ' & ')
-    name = name.replace('orissa', 'odisha').replace('chhatisgarh', 'chhattisgarh')
-    
-    for pid, pname in MASTER_STATES.items():
-        if pname.lower() == name: return pid
-        if "dadra" in name and "daman" in name: return 36
-        if "ladakh" in name: return 37
-        if "telangana" in name: return 38
-    return None
-
 def deduplicate_columns(df):
     """Renames duplicate columns by appending .1, .2, etc."""
     cols = pd.Series(df.columns)
@@ -69,48 +45,34 @@ def deduplicate_columns(df):
     df.columns = cols
     return df
 
-def process_healthcare_data():
-    print(f"📖 Reading: {INPUT_FILE}")
-    try:
-        df = pd.read_excel(INPUT_FILE, header=0)
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return
+TRU_MAP = {"Total": 1, "Rural": 2, "Urban": 3}
 
+def transform_chunk(df):
+    """Cleans one batch of NFHS rows: state/TRU ids plus numeric metrics."""
     # 1. Clean Columns & Deduplicate (CRITICAL FIX)
     df.columns = [clean_column_name(c) for c in df.columns]
     df = deduplicate_columns(df)
-    
-    # 2. Generate Master Regions Lookup
-    print("🗺️  Generating Master Regions Lookup...")
-    regions_df = pd.DataFrame(list(MASTER_STATES.items()), columns=['state', 'area_name'])
-    regions_df.to_csv(REGIONS_FILE, index=False)
 
     # 3. Map State IDs
-    print("🔄 Mapping Data...")
     state_col = next((c for c in df.columns if 'state' in c or 'india' in c), df.columns[0])
-    df['state'] = df[state_col].apply(get_state_id)
+    df['state'] = resolve_names(df[state_col])
     df = df.dropna(subset=['state'])
     df['state'] = df['state'].astype(int)
 
     # 4. Map TRU IDs
-    tru_map = {"Total": 1, "Rural": 2, "Urban": 3}
-    pd.DataFrame(list(tru_map.items()), columns=['name', 'id'])[['id', 'name']].to_csv(TRU_FILE, index=False)
-    
     area_col = next((c for c in df.columns if 'area' in c or 'urban' in c), None)
     if area_col:
-        df['tru_id'] = df[area_col].astype(str).str.title().map(tru_map).fillna(1).astype(int)
+        df['tru_id'] = df[area_col].astype(str).str.title().map(TRU_MAP).fillna(1).astype(int)
     else:
         df['tru_id'] = 1
 
     # 5. FORCE NUMERIC CONVERSION
-    print("🔢 Converting metrics to Numeric...")
     for col in df.columns:
         if col not in ['state', 'tru_id', state_col, area_col]:
             # Use loc to avoid SettingWithCopyWarning
             df.loc[:, col] = pd.to_numeric(df[col], errors='coerce')
 
-    # 6. Cleanup & Save
+    # 6. Cleanup
     cols_to_drop = [state_col, area_col] if area_col else [state_col]
     df.drop(columns=[c for c in cols_to_drop if c in df.columns], inplace=True, errors='ignore')
 
@@ -119,10 +81,28 @@ def process_healthcare_data():
     for col in ['tru_id', 'state']:
         if col in cols: cols.insert(0, cols.pop(cols.index(col)))
     
-    df = df[cols]
+    # NFHS reports states only: district/sub-district codes are 0.
+    return add_region_keys(df[cols])
+
+def process_healthcare_data(input_file=INPUT_FILE, output_dir=OUTPUT_DIR):
+    print(f"📖 Reading: {input_file}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    # 2. Generate Master Regions Lookup
+    print("🗺️  Generating Master Regions Lookup...")
+    write_output(regions_frame(), output_dir, REGIONS_FILE)
+    write_output(pd.DataFrame(list(TRU_MAP.items()), columns=['name', 'id'])[['id', 'name']], output_dir, TRU_FILE)
+
+    print("🔄 Mapping Data & converting metrics to Numeric, chunk by chunk...")
+    try:
+        with StagedWriter(output_dir, STATS_FILE) as writer:
+            for chunk in iter_chunks(input_file, header=0):
+                writer.write(transform_chunk(chunk))
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return
 
-    df.to_csv(STATS_FILE, index=False)
-    print(f"✅ Created '{STATS_FILE}' (Numeric)")
+    print(f"✅ Created {', '.join(writer.paths)} ({writer.rows} rows, Numeric)")
 
 if __name__ == "__main__":
     if os.path.exists(INPUT_FILE):
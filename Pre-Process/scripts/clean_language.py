@@ -1,85 +1,86 @@
+import numpy as np
 import pandas as pd
 import re
 import os
+from region_keys import REGION_CODE_COLUMNS, add_region_keys
+from state_resolver import resolve_codes
+from staging import StagedWriter, write_output
+from chunked_reader import iter_chunks
 
 # ==========================================
 # 🔧 CONFIGURATION
 # ==========================================
-INPUT_FILE = "../input/Language.xlsx"
-OUTPUT_DIR = "../output_normalized_language"
-LANGUAGES_FILE = os.path.join(OUTPUT_DIR, "languages.csv")
-TRU_FILE = os.path.join(OUTPUT_DIR, "tru.csv")
-LANGUAGE_STATS_FILE = os.path.join(OUTPUT_DIR, "language_stats.csv")
-REGIONS_FILE = os.path.join(OUTPUT_DIR, "regions.csv")
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_FILE = os.path.join(SCRIPT_DIR, "..", "input", "Language.xlsx")
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "..", "output_normalized_language")
+LANGUAGES_FILE = "languages.csv"
+LANGUAGE_STATS_FILE = "language_stats.csv"
+OUTPUTS = [LANGUAGES_FILE, LANGUAGE_STATS_FILE]
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-def clean_area_name(text):
-    if not isinstance(text, str): return text
-    text = str(text).replace('State - ', '')
-    text = re.sub(r'\s*\(\d+\)', '', text)
-    return text.strip()
+# tru_id -> column prefix of its person/male/female block in the source sheet
+TRU_BLOCKS = [(1, 'tot'), (2, 'rur'), (3, 'urb')]
 
 def clean_language_name(text):
     if not isinstance(text, str): return text
     text = re.sub(r'^\d+\s+', '', text)
     return text.strip().title()
 
-def process_language_data():
-    print(f"📖 Reading: {INPUT_FILE}")
-    column_names = [
-        "table_code", "state_code", "district_code", "sub_district_code", "area_name",
-        "language_code", "language_name",
-        "tot_p", "tot_m", "tot_f", "rur_p", "rur_m", "rur_f", "urb_p", "urb_m", "urb_f"
-    ]
+def unpivot_language_stats(df):
+    """
+    Wide (tot/rur/urb x p/m/f) -> long rows keyed by (state, language_id, tru_id).
+    Columnar: each metric is converted to int once, then the three TRU blocks are interleaved
+    with numpy so every source row becomes its Total, Rural, Urban rows in order.
+    """
+    # --- FIX: Force Numeric Conversion ---
+    def to_int(col):
+        return pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int).to_numpy()
+
+    n_blocks = len(TRU_BLOCKS)
+    regions = add_region_keys(pd.DataFrame({
+        'state': resolve_codes(df['state_code'], df.get('area_name')).fillna(0).astype(int),
+        'district': df.get('district_code'), 'subdistt': df.get('sub_district_code'),
+    }), 'district', 'subdistt')
+    long = {col: np.repeat(regions[col].to_numpy(), n_blocks) for col in ['state'] + REGION_CODE_COLUMNS + ['region_id']}
+    long.update({
+        'language_id': np.repeat(df['language_code'].to_numpy(), n_blocks),
+        'tru_id': np.tile([tru_id for tru_id, _ in TRU_BLOCKS], len(df)),
+    })
+    for measure, suffix in (('person', 'p'), ('male', 'm'), ('female', 'f')):
+        long[measure] = np.column_stack([to_int(f"{prefix}_{suffix}") for _, prefix in TRU_BLOCKS]).ravel()
+    return pd.DataFrame(long)
 
+COLUMN_NAMES = [
+    "table_code", "state_code", "district_code", "sub_district_code", "area_name",
+    "language_code", "language_name",
+    "tot_p", "tot_m", "tot_f", "rur_p", "rur_m", "rur_f", "urb_p", "urb_m", "urb_f"
+]
+
+def process_language_data(input_file=INPUT_FILE, output_dir=OUTPUT_DIR):
+    print(f"📖 Reading: {input_file}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    print("🔄 Unpivoting Data & converting metrics to Numeric (Int), chunk by chunk...")
+    languages_df = None
     try:
-        df = pd.read_excel(INPUT_FILE, skiprows=6, header=None, names=column_names, dtype={'state_code': str})
+        with StagedWriter(output_dir, LANGUAGE_STATS_FILE) as writer:
+            chunks = iter_chunks(input_file, skiprows=6, header=None, names=COLUMN_NAMES, dtype={'state_code': str})
+            for df in chunks:
+                df = df.dropna(subset=['state_code'])
+                df['language_name_clean'] = df['language_name'].apply(clean_language_name)
+                # Only the distinct (code, name) pairs are kept across chunks.
+                pairs = df[['language_code', 'language_name_clean']]
+                languages_df = (pairs if languages_df is None else pd.concat([languages_df, pairs])).drop_duplicates()
+                writer.write(unpivot_language_stats(df))
     except Exception as e:
         print(f"❌ Error: {e}")
         return
 
-    df = df.dropna(subset=['state_code'])
-    df['area_name'] = df['area_name'].apply(clean_area_name)
-    df['language_name_clean'] = df['language_name'].apply(clean_language_name)
-
-    languages_df = df[['language_code', 'language_name_clean']].drop_duplicates()
+    if languages_df is None:
+        print(f"❌ Error: no rows in {input_file}")
+        return
     languages_df.rename(columns={'language_name_clean': 'name', 'language_code': 'id'}, inplace=True)
-    languages_df.to_csv(LANGUAGES_FILE, index=False)
-    
-    regions_df = df[['state_code', 'area_name']].drop_duplicates()
-    regions_df.to_csv(REGIONS_FILE, index=False)
-
-    print("   Standardizing TRU...")
-    tru_data = [{'id': 1, 'name': 'Total'}, {'id': 2, 'name': 'Rural'}, {'id': 3, 'name': 'Urban'}]
-    pd.DataFrame(tru_data).to_csv(TRU_FILE, index=False)
-
-    print("🔄 Unpivoting Data...")
-    normalized_rows = []
-    for _, row in df.iterrows():
-        base_info = {'state': row['state_code'], 'language_id': row['language_code']}
-        
-        # Get raw values (might be string or int)
-        t_p, t_m, t_f = row['tot_p'], row['tot_m'], row['tot_f']
-        r_p, r_m, r_f = row['rur_p'], row['rur_m'], row['rur_f']
-        u_p, u_m, u_f = row['urb_p'], row['urb_m'], row['urb_f']
-
-        normalized_rows.append({**base_info, 'tru_id': 1, 'person': t_p, 'male': t_m, 'female': t_f})
-        normalized_rows.append({**base_info, 'tru_id': 2, 'person': r_p, 'male': r_m, 'female': r_f})
-        normalized_rows.append({**base_info, 'tru_id': 3, 'person': u_p, 'male': u_m, 'female': u_f})
-
-    df_norm = pd.DataFrame(normalized_rows)
-    
-    # --- FIX: Force Numeric Conversion ---
-    print("🔢 Converting metrics to Numeric (Int)...")
-    for c in ['person', 'male', 'female']:
-        df_norm[c] = pd.to_numeric(df_norm[c], errors='coerce').fillna(0).astype(int)
-        
-    # Ensure keys are int
-    df_norm['state'] = pd.to_numeric(df_norm['state'], errors='coerce').fillna(0).astype(int)
-
-    df_norm.to_csv(LANGUAGE_STATS_FILE, index=False)
-    print(f"✅ Created '{LANGUAGE_STATS_FILE}'")
+    write_output(languages_df, output_dir, LANGUAGES_FILE)
+    print(f"✅ Created {', '.join(writer.paths)} ({writer.rows} rows, {len(languages_df)} languages)")
 
 if __name__ == "__main__":
     if os.path.exists(INPUT_FILE):
@@ -1,68 +1,50 @@
 import pandas as pd
-import re
 import os
+from region_keys import add_region_keys
+from state_resolver import resolve_codes
+from staging import StagedWriter, write_output
+from chunked_reader import iter_chunks
 
 # ==========================================
 # 🔧 CONFIGURATION
 # ==========================================
-INPUT_FILE = "../input/Occupation.xls"
-OUTPUT_DIR = "../output_normalized_occupation"
-TRU_FILE = os.path.join(OUTPUT_DIR, "tru.csv")
-REGIONS_FILE = os.path.join(OUTPUT_DIR, "regions.csv")
-AGE_GROUPS_FILE = os.path.join(OUTPUT_DIR, "age_groups.csv")
-OCCUPATION_STATS_FILE = os.path.join(OUTPUT_DIR, "occupation_stats.csv")
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_FILE = os.path.join(SCRIPT_DIR, "..", "input", "Occupation.xls")
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "..", "output_normalized_occupation")
+AGE_GROUPS_FILE = "age_groups.csv"
+OCCUPATION_STATS_FILE = "occupation_stats.csv"
+OUTPUTS = [OCCUPATION_STATS_FILE, AGE_GROUPS_FILE]
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-def clean_text(text):
-    if not isinstance(text, str): return text
-    text = str(text).replace('State - ', '')
-    text = re.sub(r'\s*\(\d+\)', '', text)
-    return text.strip()
-
-def process_occupation_data():
-    print(f"📖 Reading: {INPUT_FILE}")
-    column_names = [
-        "table_code", "state_code", "district_code", "area_name", "tru", "age_group",
-        "population_total", "population_male", "population_female",
-        "main_workers_total", "main_workers_male", "main_workers_female",
-        "marginal_workers_total", "marginal_workers_male", "marginal_workers_female",
-        "marg_3_6mo_total", "marg_3_6mo_male", "marg_3_6mo_female",
-        "marg_less_3mo_total", "marg_less_3mo_male", "marg_less_3mo_female",
-        "non_workers_total", "non_workers_male", "non_workers_female",
-        "seeking_work_total", "seeking_work_male", "seeking_work_female"
-    ]
-
-    try:
-        df = pd.read_excel(INPUT_FILE, skiprows=9, header=None, names=column_names, dtype={'state_code': str})
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return
+COLUMN_NAMES = [
+    "table_code", "state_code", "district_code", "area_name", "tru", "age_group",
+    "population_total", "population_male", "population_female",
+    "main_workers_total", "main_workers_male", "main_workers_female",
+    "marginal_workers_total", "marginal_workers_male", "marginal_workers_female",
+    "marg_3_6mo_total", "marg_3_6mo_male", "marg_3_6mo_female",
+    "marg_less_3mo_total", "marg_less_3mo_male", "marg_less_3mo_female",
+    "non_workers_total", "non_workers_male", "non_workers_female",
+    "seeking_work_total", "seeking_work_male", "seeking_work_female"
+]
 
+def transform_chunk(df, age_group_ids):
+    """Cleans one batch of rows; age groups seen for the first time get the next id in `age_group_ids`."""
     df = df.dropna(subset=['state_code'])
-    df['area_name'] = df['area_name'].apply(clean_text)
+    df['state_code'] = resolve_codes(df['state_code'], df['area_name'])
     df['age_group'] = df['age_group'].replace('Total', 'All Ages')
     
-    print("   Standardizing TRU...")
     tru_map = {"Total": 1, "Rural": 2, "Urban": 3}
-    pd.DataFrame(list(tru_map.items()), columns=['name', 'id'])[['id', 'name']].to_csv(TRU_FILE, index=False)
     df['tru_id'] = df['tru'].map(tru_map)
 
-    regions_df = df[['state_code', 'district_code', 'area_name']].drop_duplicates()
-    regions_df.to_csv(REGIONS_FILE, index=False)
+    for age_group in df['age_group'].unique():
+        age_group_ids.setdefault(age_group, len(age_group_ids) + 1)
+    df['age_group_id'] = df['age_group'].map(age_group_ids)
 
-    unique_ages = df['age_group'].unique()
-    age_df = pd.DataFrame({'id': range(1, len(unique_ages) + 1), 'name': unique_ages})
-    age_df.to_csv(AGE_GROUPS_FILE, index=False)
-    df['age_group_id'] = df['age_group'].map(dict(zip(age_df['name'], age_df['id'])))
-
-    cols_to_drop = ['area_name', 'tru', 'age_group', 'district_code', 'table_code']
+    cols_to_drop = ['area_name', 'tru', 'age_group', 'table_code']
     df.drop(columns=[c for c in cols_to_drop if c in df.columns], inplace=True)
 
     df.rename(columns={'state_code': 'state'}, inplace=True)
 
     # --- FIX: Force Numeric Conversion ---
-    print("🔢 Converting metrics to Numeric (Int)...")
     for col in df.columns:
         # Explicitly ignore keys
         if col not in ['state', 'tru_id', 'age_group_id']:
@@ -73,10 +55,25 @@ def process_occupation_data():
 
     keys = ['state', 'tru_id', 'age_group_id']
     metrics = [c for c in df.columns if c not in keys]
-    df = df[keys + metrics]
+    return add_region_keys(df[keys + metrics], 'district_code')
+
+def process_occupation_data(input_file=INPUT_FILE, output_dir=OUTPUT_DIR):
+    print(f"📖 Reading: {input_file}")
+    os.makedirs(output_dir, exist_ok=True)
+    print("🔢 Standardizing TRU, extracting age groups & converting metrics, chunk by chunk...")
+    age_group_ids = {}
+    try:
+        with StagedWriter(output_dir, OCCUPATION_STATS_FILE) as writer:
+            chunks = iter_chunks(input_file, skiprows=9, header=None, names=COLUMN_NAMES, dtype={'state_code': str})
+            for chunk in chunks:
+                writer.write(transform_chunk(chunk, age_group_ids))
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return
 
-    df.to_csv(OCCUPATION_STATS_FILE, index=False)
-    print(f"✅ Created '{OCCUPATION_STATS_FILE}'")
+    age_df = pd.DataFrame({'id': list(age_group_ids.values()), 'name': list(age_group_ids)})
+    write_output(age_df, output_dir, AGE_GROUPS_FILE)
+    print(f"✅ Created {', '.join(writer.paths)} ({writer.rows} rows, {len(age_df)} age groups)")
 
 if __name__ == "__main__":
     if os.path.exists(INPUT_FILE):
@@ -1,15 +1,19 @@
 import pandas as pd
 import re
 import os
+from region_keys import REGION_CODE_COLUMNS, add_region_keys
+from state_resolver import resolve_codes
+from staging import StagedWriter
+from chunked_reader import iter_chunks
 
 # ==========================================
 # 🔧 CONFIGURATION
 # ==========================================
-INPUT_FILE = "../input/population.xls"
-OUTPUT_DIR = "../output_normalized_population"
-OUTPUT_CSV = os.path.join(OUTPUT_DIR, "population_stats.csv")
-
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_FILE = os.path.join(SCRIPT_DIR, "..", "input", "population.xls")
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "..", "output_normalized_population")
+OUTPUT_CSV = "population_stats.csv"
+OUTPUTS = [OUTPUT_CSV]
 
 def clean_column_name(name):
     if not name: return "col"
@@ -18,17 +22,8 @@ def clean_column_name(name):
     s = re.sub(r'[^a-z0-9_]', '', s)
     return s[:60]
 
-def process_population_data():
-    print(f"📖 Reading: {INPUT_FILE}")
-    try:
-        df = pd.read_excel(INPUT_FILE)
-    except Exception:
-        try:
-            df = pd.read_csv(INPUT_FILE)
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return
-
+def transform_chunk(df):
+    """Cleans and unpivots one batch of rows into (state, tru_id, age) rows."""
     df.columns = [clean_column_name(c) for c in df.columns]
     
     if 'table' in df.columns:
@@ -37,35 +32,45 @@ def process_population_data():
         df['age'] = df['age'].astype(str).str.replace('.0', '', regex=False)
 
     # --- FIX: Force Numeric on Raw Data ---
-    print("🔢 Converting raw metrics to Numeric...")
     pop_cols = [c for c in df.columns if 'persons' in c or 'males' in c or 'females' in c]
     for col in pop_cols:
         df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
 
-    print("🔄 Unpivoting Data (Wide -> Long)...")
-    
+    df['state'] = resolve_codes(df['state'], df.get('area_name')).fillna(0).astype(int)
+    df = add_region_keys(df, 'distt')
+    keys = ['state'] + REGION_CODE_COLUMNS + ['region_id', 'age']
+
     # Total (1)
-    df_tot = df[['state', 'age', 'total_persons', 'total_males', 'total_females']].copy()
-    df_tot.columns = ['state', 'age', 'persons', 'males', 'females']
+    df_tot = df[keys + ['total_persons', 'total_males', 'total_females']].copy()
+    df_tot.columns = keys + ['persons', 'males', 'females']
     df_tot['tru_id'] = 1
 
     # Rural (2)
-    df_rur = df[['state', 'age', 'rural_persons', 'rural_males', 'rural_females']].copy()
-    df_rur.columns = ['state', 'age', 'persons', 'males', 'females']
+    df_rur = df[keys + ['rural_persons', 'rural_males', 'rural_females']].copy()
+    df_rur.columns = keys + ['persons', 'males', 'females']
     df_rur['tru_id'] = 2
 
     # Urban (3)
-    df_urb = df[['state', 'age', 'urban_persons', 'urban_males', 'urban_females']].copy()
-    df_urb.columns = ['state', 'age', 'persons', 'males', 'females']
+    df_urb = df[keys + ['urban_persons', 'urban_males', 'urban_females']].copy()
+    df_urb.columns = keys + ['persons', 'males', 'females']
     df_urb['tru_id'] = 3
 
     df_norm = pd.concat([df_tot, df_rur, df_urb], ignore_index=True)
-    df_norm['state'] = df_norm['state'].fillna(0).astype(int)
-    
-    # Save
-    df_norm = df_norm[['state', 'tru_id', 'age', 'persons', 'males', 'females']]
-    df_norm.to_csv(OUTPUT_CSV, index=False)
-    print(f"✅ Created '{OUTPUT_CSV}' ({len(df_norm)} rows)")
+    return df_norm[['state'] + REGION_CODE_COLUMNS + ['region_id', 'tru_id', 'age', 'persons', 'males', 'females']]
+
+def process_population_data(input_file=INPUT_FILE, output_dir=OUTPUT_DIR):
+    print(f"📖 Reading: {input_file}")
+    os.makedirs(output_dir, exist_ok=True)
+    print("🔄 Converting raw metrics & unpivoting Data (Wide -> Long), chunk by chunk...")
+    try:
+        with StagedWriter(output_dir, OUTPUT_CSV) as writer:
+            for chunk in iter_chunks(input_file):
+                writer.write(transform_chunk(chunk))
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return
+
+    print(f"✅ Created {', '.join(writer.paths)} ({writer.rows} rows)")
 
 if __name__ == "__main__":
     if os.path.exists(INPUT_FILE):
@@ -0,0 +1,87 @@
+import pandas as pd
+import re
+import os
+import clean_education
+import clean_language
+import clean_occupation
+import clean_population
+import clean_religion
+from chunked_reader import iter_chunks
+from region_keys import REGION_CODE_COLUMNS, add_region_keys, parent_ids, region_levels
+from state_resolver import regions_frame, resolve_codes
+from staging import write_output
+
+# ==========================================
+# 🔧 CONFIGURATION
+# ==========================================
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "..", "output_normalized_regions")
+HIERARCHY_FILE = "region_hierarchy.csv"
+OUTPUTS = [HIERARCHY_FILE]
+
+# Census files whose areas make up the hierarchy, first one wins for names (PCA lists every area).
+# (cleaner module, reader arguments, header cleaner, {source column: role})
+REGION_SOURCES = [
+    (clean_education, {}, clean_education.clean_column_name,
+     {'state_code': 'state', 'district_code': 'district', 'subdistt_code': 'subdistt', 'townvillage_code': 'townvillage', 'name': 'name'}),
+    (clean_religion, {}, clean_religion.clean_column_name,
+     {'state': 'state', 'district': 'district', 'subdistt': 'subdistt', 'townvillage': 'townvillage', 'name': 'name'}),
+    (clean_population, {}, clean_population.clean_column_name,
+     {'state': 'state', 'distt': 'district', 'area_name': 'name'}),
+    (clean_occupation, dict(skiprows=9, header=None, names=clean_occupation.COLUMN_NAMES, dtype={'state_code': str}), None,
+     {'state_code': 'state', 'district_code': 'district', 'area_name': 'name'}),
+    (clean_language, dict(skiprows=6, header=None, names=clean_language.COLUMN_NAMES, dtype={'state_code': str}), None,
+     {'state_code': 'state', 'district_code': 'district', 'sub_district_code': 'subdistt', 'area_name': 'name'}),
+]
+
+def input_files():
+    return [module.INPUT_FILE for module, _, _, _ in REGION_SOURCES]
+
+def clean_area_name(name):
+    """'District - PUNE (25)' -> 'Pune'."""
+    if not isinstance(name, str): return None
+    s = re.sub(r'^\s*(state|district|sub-district|town|village)\s*-\s*', '', name, flags=re.IGNORECASE)
+    s = re.sub(r'\(\d+\)\s*$', '', s).strip()
+    return s.title() if s.isupper() else s
+
+def source_areas(module, reader_args, clean_header, roles):
+    """Distinct (codes, name) rows of one census file, read chunk by chunk."""
+    areas = None
+    for chunk in iter_chunks(module.INPUT_FILE, **reader_args):
+        if clean_header:
+            chunk.columns = [clean_header(c) for c in chunk.columns]
+        chunk = chunk[[c for c in roles if c in chunk.columns]].rename(columns=roles)
+        chunk['state'] = resolve_codes(chunk['state'], chunk.get('name')).fillna(0).astype(int)
+        chunk = add_region_keys(chunk, 'district', 'subdistt', 'townvillage')
+        chunk = chunk.drop_duplicates('region_id')
+        areas = chunk if areas is None else pd.concat([areas, chunk]).drop_duplicates('region_id')
+    return areas
+
+def process_region_data(input_file=None, output_dir=OUTPUT_DIR):
+    print("🗺️  Building Region Hierarchy...")
+    os.makedirs(output_dir, exist_ok=True)
+
+    # States and India always come from the master list, whatever the files call them.
+    states = regions_frame().rename(columns={'area_name': 'name'})
+    frames = [add_region_keys(states)]
+    for module, reader_args, clean_header, roles in REGION_SOURCES:
+        try:
+            areas = source_areas(module, reader_args, clean_header, roles)
+        except Exception as e:
+            print(f"❌ Error reading {module.INPUT_FILE}: {e}")
+            return
+        if areas is not None:
+            areas['name'] = areas['name'].map(clean_area_name)
+            frames.append(areas)
+            print(f"   {os.path.basename(module.INPUT_FILE):<16} {len(areas)} areas")
+
+    df = pd.concat(frames, ignore_index=True).drop_duplicates('region_id').sort_values('region_id')
+    df['level'] = region_levels(df)
+    df['parent_id'] = parent_ids(df)
+    df = df[['region_id', 'state'] + REGION_CODE_COLUMNS + ['level', 'name', 'parent_id']]
+
+    saved = write_output(df, output_dir, HIERARCHY_FILE)
+    print(f"✅ Created {', '.join(saved)} ({len(df)} regions, {df['level'].value_counts().to_dict()})")
+
+if __name__ == "__main__":
+    process_region_data()
@@ -1,17 +1,20 @@
 import pandas as pd
 import re
 import os
+from region_keys import add_region_keys
+from state_resolver import resolve_codes
+from staging import StagedWriter, write_output
+from chunked_reader import iter_chunks
 
 # ==========================================
 # 🔧 CONFIGURATION
 # ==========================================
-INPUT_FILE = "../input/religion.xlsx"
-OUTPUT_DIR = "../output_normalized_religion"
-RELIGIONS_FILE = os.path.join(OUTPUT_DIR, "religions.csv")
-TRU_FILE = os.path.join(OUTPUT_DIR, "tru.csv")
-STATS_FILE = os.path.join(OUTPUT_DIR, "religion_stats.csv")
-
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_FILE = os.path.join(SCRIPT_DIR, "..", "input", "religion.xlsx")
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, "..", "output_normalized_religion")
+RELIGIONS_FILE = "religions.csv"
+STATS_FILE = "religion_stats.csv"
+OUTPUTS = [STATS_FILE, RELIGIONS_FILE]
 
 def clean_column_name(name):
     if not name: return "col"
@@ -20,53 +23,53 @@ def clean_column_name(name):
     s = re.sub(r'[^a-z0-9_]', '', s)
     return s[:60]
 
-def process_religion_data():
-    print(f"📖 Reading: {INPUT_FILE}")
-    try:
-        df = pd.read_csv(INPUT_FILE)
-    except:
-        try:
-            df = pd.read_excel(INPUT_FILE)
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return
-
+def transform_chunk(df, religion_ids):
+    """Cleans one batch of rows; religions seen for the first time get the next id in `religion_ids`."""
     df.columns = [clean_column_name(c) for c in df.columns]
     
-    print("   Standardizing TRU...")
     tru_map = {"Total": 1, "Rural": 2, "Urban": 3}
-    pd.DataFrame(list(tru_map.items()), columns=['name', 'id'])[['id', 'name']].to_csv(TRU_FILE, index=False)
     df['tru_id'] = df['tru'].map(tru_map)
 
-    print("   Extracting Religions...")
-    unique_rel = df['religion'].unique()
-    rel_df = pd.DataFrame({'id': range(1, len(unique_rel) + 1), 'religion_name': unique_rel})
-    rel_df.to_csv(RELIGIONS_FILE, index=False)
-    
-    df['religion_id'] = df['religion'].map(dict(zip(rel_df['religion_name'], rel_df['id'])))
+    for religion in df['religion'].unique():
+        religion_ids.setdefault(religion, len(religion_ids) + 1)
+    df['religion_id'] = df['religion'].map(religion_ids)
 
     # --- FIX: Force Numeric Conversion ---
-    print("🔢 Converting metrics to Numeric (Int)...")
     keys = ['state', 'tru_id', 'religion_id']
     for col in df.columns:
         if col not in keys and col not in ['religion', 'tru', 'district', 'subdistt', 'townvillage', 'name']:
              df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
 
-    cols_to_drop = ['religion', 'tru', 'district', 'subdistt', 'townvillage', 'name']
+    names = df['name'] if 'name' in df.columns else None
+    cols_to_drop = ['religion', 'tru', 'name']
     df.drop(columns=[c for c in cols_to_drop if c in df.columns], inplace=True)
     
     if 'state' in df.columns:
-        df['state'] = df['state'].fillna(0).astype(int)
+        df['state'] = resolve_codes(df['state'], names).fillna(0).astype(int)
 
     cols = list(df.columns)
     priority = ['state', 'tru_id', 'religion_id']
     for col in reversed(priority):
         if col in cols:
             cols.insert(0, cols.pop(cols.index(col)))
-    df = df[cols]
+    return add_region_keys(df[cols], 'district', 'subdistt', 'townvillage')
+
+def process_religion_data(input_file=INPUT_FILE, output_dir=OUTPUT_DIR):
+    print(f"📖 Reading: {input_file}")
+    os.makedirs(output_dir, exist_ok=True)
+    print("🔢 Standardizing TRU, extracting religions & converting metrics, chunk by chunk...")
+    religion_ids = {}
+    try:
+        with StagedWriter(output_dir, STATS_FILE) as writer:
+            for chunk in iter_chunks(input_file):
+                writer.write(transform_chunk(chunk, religion_ids))
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return
 
-    df.to_csv(STATS_FILE, index=False)
-    print(f"✅ Created '{STATS_FILE}'")
+    rel_df = pd.DataFrame({'id': list(religion_ids.values()), 'religion_name': list(religion_ids)})
+    write_output(rel_df, output_dir, RELIGIONS_FILE)
+    print(f"✅ Created {', '.join(writer.paths)} ({writer.rows} rows, {len(rel_df)} religions)")
 
 if __name__ == "__main__":
     if os.path.exists(INPUT_FILE):
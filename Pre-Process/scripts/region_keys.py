@@ -0,0 +1,57 @@
+import pandas as pd
+
+# ==========================================
+# 🗺️ HIERARCHICAL REGION KEYS
+# ==========================================
+# Census 2011 location codes: state (2 digits) > district (3) > sub-district (5) > town/village (6).
+# 0 below a level means "the whole area above", e.g. (27, 0, 0, 0) is Maharashtra's state total.
+REGION_CODE_COLUMNS = ['district_code', 'subdistt_code', 'townvillage_code']
+CODE_WIDTHS = {'district_code': 10**3, 'subdistt_code': 10**5, 'townvillage_code': 10**6}
+LEVELS = ["INDIA", "STATE", "DISTRICT", "SUB-DISTRICT", "TOWN/VILLAGE"]
+
+def region_ids(df):
+    """
+    Packs (state, district, sub-district, town/village) into one BIGINT, e.g. 27_517_00000_000000 for Pune.
+    Ids sort in hierarchy order, so every area under a region falls in one id range.
+    """
+    ids = df['state'].astype('int64')
+    for col in REGION_CODE_COLUMNS:
+        ids = ids * CODE_WIDTHS[col] + df[col].astype('int64')
+    return ids
+
+def region_levels(df):
+    """Level of each row's area, from the deepest non-zero code."""
+    depth = (df['state'] > 0).astype(int)
+    for i, col in enumerate(REGION_CODE_COLUMNS):
+        depth = depth.where(df[col] == 0, 2 + i)
+    return depth.map(dict(enumerate(LEVELS)))
+
+def parent_ids(df):
+    """region_id of the area one level up: the deepest non-zero code is zeroed (states -> India, India -> None)."""
+    parent = df[['state'] + REGION_CODE_COLUMNS].astype('int64')
+    cleared = pd.Series(False, index=df.index)
+    for col in reversed(REGION_CODE_COLUMNS):
+        deepest = ~cleared & (parent[col] != 0)
+        parent.loc[deepest, col] = 0
+        cleared |= deepest
+    is_india = ~cleared & (parent['state'] == 0)
+    parent.loc[~cleared, 'state'] = 0
+    return region_ids(parent).astype('Int64').mask(is_india)
+
+def add_region_keys(df, district=None, subdistt=None, townvillage=None):
+    """
+    Adds district_code, subdistt_code, townvillage_code (0 where the source has no such column)
+    and the packed region_id right after 'state'. Arguments name the source's code columns,
+    which are replaced.
+    """
+    keys = pd.DataFrame(index=df.index)
+    for col, source in zip(REGION_CODE_COLUMNS, (district, subdistt, townvillage)):
+        present = source is not None and source in df.columns
+        keys[col] = pd.to_numeric(df[source], errors='coerce').fillna(0).astype(int) if present else 0
+    keys['region_id'] = region_ids(pd.concat([df[['state']], keys], axis=1))
+
+    # Built apart and joined once: inserting column by column fragments wide census frames.
+    rest = df.drop(columns=[c for c in (district, subdistt, townvillage) if c is not None and c in df.columns])
+    rest = rest.drop(columns=[c for c in keys.columns if c in rest.columns])
+    at = list(rest.columns).index('state') + 1
+    return pd.concat([rest.iloc[:, :at], keys, rest.iloc[:, at:]], axis=1)
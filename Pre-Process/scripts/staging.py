@@ -0,0 +1,154 @@
+import os
+import json
+import pandas as pd
+
+# ==========================================
+# 🔧 CONFIGURATION
+# ==========================================
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_FILE = os.path.join(SCRIPT_DIR, "..", "database_schema.json")
+
+# Formats written for every staged table: "parquet" (typed, default) and/or "csv" (export)
+STAGING_FORMATS = [f.strip() for f in os.getenv("STAGING_FORMATS", "parquet").lower().split(",") if f.strip()]
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+
+# Staged file stem -> table, where they differ
+TABLE_FOR_FILE = {"crops": "crop_stats"}
+
+# database_schema.json type -> pandas dtype
+SQL_DTYPES = {
+    "BIGINT": "Int64", "INTEGER": "Int64", "SMALLINT": "Int64",
+    "DOUBLE PRECISION": "float64", "FLOAT": "float64", "REAL": "float64", "NUMERIC": "float64",
+    "TEXT": "string", "VARCHAR": "string",
+    "DATE": "datetime64[ms]", "TIMESTAMP": "datetime64[ms]",
+}
+
+_schema_dtypes = None
+
+def schema_dtypes():
+    """{table: {column: pandas dtype}} from database_schema.json (empty if missing)."""
+    global _schema_dtypes
+    if _schema_dtypes is None:
+        _schema_dtypes = {}
+        if os.path.exists(SCHEMA_FILE):
+            with open(SCHEMA_FILE, "r") as f:
+                schema = json.load(f)
+            _schema_dtypes = {
+                table: {col["name"]: SQL_DTYPES.get(col["type"].upper(), "string") for col in info.get("columns", [])}
+                for table, info in schema.items()
+            }
+    return _schema_dtypes
+
+def table_for(filename):
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return TABLE_FOR_FILE.get(stem, stem)
+
+def output_files(filename, formats=None):
+    """Staged file names for a logical output such as 'regions.csv'."""
+    stem = os.path.splitext(filename)[0]
+    return [f"{stem}.{fmt}" for fmt in (formats or STAGING_FORMATS)]
+
+def apply_schema(df, table_name, report=True):
+    """
+    Casts every column to its type in database_schema.json.
+    A value that doesn't fit (e.g. 2.5 in a BIGINT column) raises instead of drifting;
+    columns the schema doesn't know keep their inferred dtype and are reported.
+    """
+    dtypes = schema_dtypes().get(table_name)
+    if not dtypes:
+        if report:
+            print(f"⚠️  No schema for '{table_name}'; staging inferred dtypes.")
+        return df
+
+    df = df.copy()
+    df.columns = [str(c).lower() for c in df.columns]
+    unknown = [c for c in df.columns if c not in dtypes]
+    if unknown and report:
+        print(f"⚠️  {table_name}: {len(unknown)} columns not in {os.path.basename(SCHEMA_FILE)} (e.g. {unknown[:3]})")
+    for col in df.columns:
+        dtype = dtypes.get(col)
+        if dtype is None:
+            continue
+        try:
+            if dtype == "string" and df[col].dtype.kind == "f":
+                # Keep the CSV spelling (82.51, not 82.51000000000001) for numeric columns stored as TEXT.
+                df[col] = df[col].map(lambda v: None if pd.isna(v) else repr(v)).astype("string")
+            else:
+                df[col] = df[col].astype(dtype)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{table_name}.{col} does not fit {dtype}: {e}") from e
+    return df
+
+class StagedWriter:
+    """
+    Appends chunks of one cleaned table to its staged files, so a cleaner never holds the
+    whole table: CSV is appended to, Parquet gets one row group per chunk.
+
+        with StagedWriter(output_dir, "religion_stats.csv") as writer:
+            for chunk in chunks:
+                writer.write(transform(chunk))
+        writer.paths # files written
+    """
+
+    def __init__(self, output_dir, filename, formats=None):
+        self.table_name = table_for(filename)
+        self.paths = [os.path.join(output_dir, name) for name in output_files(filename, formats)]
+        self.rows = 0
+        self._parquet_writer = None
+        self._arrow_schema = None
+        self._started = False
+
+    def write(self, df):
+        df = apply_schema(df, self.table_name, report=not self._started)
+        for path in self.paths:
+            if path.endswith(".parquet"):
+                self._write_parquet(path, df)
+            else:
+                df.to_csv(path, index=False, mode="a" if self._started else "w", header=not self._started)
+        self._started = True
+        self.rows += len(df)
+
+    def _write_parquet(self, path, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Later chunks are cast to the first chunk's schema (columns outside the schema file included).
+        table = pa.Table.from_pandas(df, schema=self._arrow_schema, preserve_index=False)
+        if self._parquet_writer is None:
+            self._arrow_schema = table.schema
+            self._parquet_writer = pq.ParquetWriter(path, table.schema, compression=PARQUET_COMPRESSION)
+        self._parquet_writer.write_table(table)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        if not self._started:
+            print(f"⚠️  {self.table_name}: no rows to stage.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        if exc_type is not None:
+            # Don't leave a half-written table where the loader would pick it up.
+            for path in self.paths:
+                if os.path.exists(path):
+                    os.remove(path)
+        return False
+
+def write_output(df, output_dir, filename, formats=None):
+    """Stages a cleaned table in every configured format; returns the written paths."""
+    with StagedWriter(output_dir, filename, formats) as writer:
+        writer.write(df)
+    return writer.paths
+
+def staged_path(directory, filename):
+    """Path of the staged file to read for 'x.csv': x.parquet if present, else the CSV."""
+    parquet_path = os.path.join(directory, output_files(filename, ["parquet"])[0])
+    return parquet_path if os.path.exists(parquet_path) else os.path.join(directory, filename)
+
+def read_output(directory, filename):
+    path = staged_path(directory, filename)
+    return pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
@@ -0,0 +1,97 @@
+import re
+import pandas as pd
+
+# ==========================================
+# 🗺️ MASTER STATE MAPPING
+# ==========================================
+# Census 2011 state codes, plus ids for the UTs/states created since.
+MASTER_STATES = {
+    0: "India", 1: "Jammu & Kashmir", 2: "Himachal Pradesh", 3: "Punjab", 4: "Chandigarh",
+    5: "Uttarakhand", 6: "Haryana", 7: "NCT of Delhi", 8: "Rajasthan", 9: "Uttar Pradesh",
+    10: "Bihar", 11: "Sikkim", 12: "Arunachal Pradesh", 13: "Nagaland", 14: "Manipur",
+    15: "Mizoram", 16: "Tripura", 17: "Meghalaya", 18: "Assam", 19: "West Bengal",
+    20: "Jharkhand", 21: "Odisha", 22: "Chhattisgarh", 23: "Madhya Pradesh", 24: "Gujarat",
+    25: "Daman & Diu", 26: "Dadra & Nagar Haveli", 27: "Maharashtra", 28: "Andhra Pradesh",
+    29: "Karnataka", 30: "Goa", 31: "Lakshadweep", 32: "Kerala", 33: "Tamil Nadu",
+    34: "Puducherry", 35: "Andaman & Nicobar Islands",
+    36: "Dadra and Nagar Haveli and Daman and Diu", 37: "Ladakh", 38: "Telangana"
+}
+
+# Other spellings found in the source files
+STATE_ALIASES = {
+    "orissa": 21, "chhatisgarh": 22, "chattisgarh": 22, "uttaranchal": 5, "pondicherry": 34,
+    "delhi": 7, "nct delhi": 7, "andaman and nicobar": 35, "a and n islands": 35,
+    "jammu kashmir": 1, "dadra nagar haveli": 26, "daman diu": 25,
+}
+
+# (words that must all appear, id) for names that vary too much to list
+STATE_KEYWORDS = [
+    (("dadra", "daman"), 36),
+    (("ladakh",), 37),
+    (("telangana",), 38),
+]
+
+def normalize_state_name(name):
+    """'State - JAMMU & KASHMIR (01)' -> 'jammu and kashmir'."""
+    if pd.isna(name): return None
+    s = str(name).lower()
+    s = re.sub(r'^\s*state\s*-\s*', '', s)
+    s = re.sub(r'\(\d+\)', '', s)
+    s = s.replace('&', ' and ')
+    return re.sub(r'[^a-z0-9]+', ' ', s).strip()
+
+# Precomputed normalized name -> id
+STATE_IDS = {normalize_state_name(name): state_id for state_id, name in MASTER_STATES.items()}
+STATE_IDS.update(STATE_ALIASES)
+
+def _keyword_match(key):
+    words = set(key.split())
+    for keywords, state_id in STATE_KEYWORDS:
+        if all(k in words for k in keywords):
+            return state_id
+    return None
+
+def resolve_state(name):
+    """Single name -> state id (None if unknown)."""
+    key = normalize_state_name(name)
+    if key is None: return None
+    state_id = STATE_IDS.get(key)
+    return state_id if state_id is not None else _keyword_match(key)
+
+def resolve_names(names):
+    """
+    Vectorized: Series of state names -> nullable Int64 Series of state ids.
+    Normalization runs as string ops over the column; the keyword fallback only sees the
+    distinct names the hash map missed.
+    """
+    keys = (
+        names.astype("string").str.lower()
+        .str.replace(r'^\s*state\s*-\s*', '', regex=True)
+        .str.replace(r'\(\d+\)', '', regex=True)
+        .str.replace('&', ' and ', regex=False)
+        .str.replace(r'[^a-z0-9]+', ' ', regex=True)
+        .str.strip()
+    )
+    ids = keys.map(STATE_IDS)
+    missing = keys[ids.isna() & keys.notna()].unique()
+    if len(missing):
+        fallback = {key: _keyword_match(key) for key in missing}
+        ids = ids.fillna(keys.map(fallback))
+    return ids.astype("Int64")
+
+def resolve_codes(codes, names=None):
+    """
+    Vectorized: Series of census state codes -> nullable Int64 state ids.
+    Rows without a usable code are resolved from `names`, if given; unknown codes are reported.
+    """
+    ids = pd.to_numeric(codes, errors='coerce').astype("Int64")
+    if names is not None and ids.isna().any():
+        ids = ids.fillna(resolve_names(names))
+    unknown = ids.notna() & ~ids.isin(list(MASTER_STATES))
+    if unknown.any():
+        print(f"⚠️  {int(unknown.sum())} rows with unknown state codes: {sorted(ids[unknown].unique().tolist())[:10]}")
+    return ids
+
+def regions_frame():
+    """The master regions lookup (state, area_name)."""
+    return pd.DataFrame(list(MASTER_STATES.items()), columns=['state', 'area_name'])
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The ETL scripts import each other as top-level modules, as run_pipeline.py does from Pre-Process/.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, "scripts"))
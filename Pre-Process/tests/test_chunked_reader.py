@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from chunked_reader import detect_format, iter_chunks
+
+ROWS = [["Census table C-16", None, None], [None, None, None],
+        ["state", "name", "persons"], ["32", "Kerala", 10], ["33", "Tamil Nadu", 20], ["34", "Puducherry", 30]]
+
+
+@pytest.fixture
+def xlsx_path(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    book = openpyxl.Workbook()
+    for row in ROWS:
+        book.active.append(row)
+    path = tmp_path / "census.xls" # misnamed, as census downloads often are
+    book.save(path)
+    return str(path)
+
+
+def test_format_comes_from_the_leading_bytes(xlsx_path, tmp_path):
+    assert detect_format(xlsx_path) == "xlsx"
+    html = tmp_path / "table.xls"
+    html.write_text("<html><table></table></html>")
+    assert detect_format(str(html)) == "html"
+    with pytest.raises(ValueError, match="is HTML, not a spreadsheet"):
+        next(iter_chunks(str(html)))
+
+
+def test_xlsx_chunks_equal_one_full_read(xlsx_path):
+    chunks = list(iter_chunks(xlsx_path, chunksize=2, skiprows=2, dtype={"state": str}))
+
+    assert [len(c) for c in chunks] == [2, 1]
+    full = pd.read_excel(xlsx_path, engine="openpyxl", skiprows=2, dtype={"state": str})
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), full)
+
+
+def test_explicit_names_without_header(xlsx_path):
+    chunks = iter_chunks(xlsx_path, skiprows=3, header=None, names=["code", "area", "people"])
+    assert next(chunks)["people"].tolist() == [10, 20, 30]
+
+
+def test_csv_is_read_in_chunks(tmp_path):
+    path = tmp_path / "rows.csv"
+    path.write_text("a,b\n1,2\n3,4\n5,6\n")
+    assert [c["a"].tolist() for c in iter_chunks(str(path), chunksize=2)] == [[1, 3], [5]]
@@ -0,0 +1,37 @@
+import pandas as pd
+
+from clean_crops_pdf import column_key, page_frame
+
+# x-ranges of: Normal Area | Area Sown 2025-26 | Area Sown 2024-25 | Difference | % Increase/Decrease
+LAYOUT = [
+    ("normal_area_dafw", None, 0, 10),
+    ("area_sown", "2025-26", 10, 20),
+    ("area_sown", "2024-25", 20, 30),
+    ("difference_area", None, 30, 40),
+    ("pct_increase_decrease", None, 40, 50),
+]
+
+
+def test_season_is_a_key_not_part_of_the_name():
+    assert column_key("Area Sown 2025- 26") == ("area_sown", "2025-26")
+    assert column_key("Difference in area 2025-26 over 2024-25") == ("difference_area", None)
+    assert column_key("Normal Area (DAFW)") == ("normal_area_dafw", None)
+
+
+def test_one_row_per_crop_and_season():
+    df = page_frame([("Rice", [(5, 403.09), (15, 438.51), (25, 430.06), (35, 8.45), (45, 1.97)])], LAYOUT)
+
+    assert list(df.columns) == ["crop", "season", "normal_area_dafw", "area_sown", "difference_area",
+                                "pct_increase_decrease"]
+    latest, earlier = df.iloc[0], df.iloc[1]
+    assert (latest["season"], latest["area_sown"], latest["difference_area"]) == ("2025-26", 438.51, 8.45)
+    assert (earlier["season"], earlier["area_sown"]) == ("2024-25", 430.06)
+    # Comparisons belong to the latest season only, so sums over seasons don't double count them.
+    assert earlier[["normal_area_dafw", "difference_area", "pct_increase_decrease"]].isna().all()
+
+
+def test_blank_cell_stays_null():
+    df = page_frame([("Mesta", [(15, 0.2), (25, 0.21), (35, -0.01), (45, -4.76)])], LAYOUT)
+
+    assert pd.isna(df.loc[0, "normal_area_dafw"])
+    assert df.loc[0, "area_sown"] == 0.2
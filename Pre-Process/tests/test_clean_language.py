@@ -0,0 +1,21 @@
+import pandas as pd
+
+from clean_language import unpivot_language_stats
+
+
+def test_each_row_becomes_its_total_rural_urban_rows():
+    wide = pd.DataFrame({
+        "state_code": ["32", "32"], "district_code": ["000", "593"], "sub_district_code": ["00000", "00000"],
+        "area_name": ["KERALA", "Kasaragod"], "language_code": [22, 6],
+        "tot_p": [100, 50], "tot_m": [60, 20], "tot_f": [40, 30],
+        "rur_p": [70, 45], "rur_m": [40, 18], "rur_f": [30, 27],
+        "urb_p": [30, 5], "urb_m": [20, 2], "urb_f": ["10", "-"],
+    })
+
+    long = unpivot_language_stats(wide)
+
+    assert long[["state", "district_code", "language_id", "tru_id", "person", "male", "female"]].values.tolist() == [
+        [32, 0, 22, 1, 100, 60, 40], [32, 0, 22, 2, 70, 40, 30], [32, 0, 22, 3, 30, 20, 10],
+        [32, 593, 6, 1, 50, 20, 30], [32, 593, 6, 2, 45, 18, 27], [32, 593, 6, 3, 5, 2, 0],
+    ]
+    assert long["region_id"].tolist()[::3] == [32_000_00000_000000, 32_593_00000_000000]
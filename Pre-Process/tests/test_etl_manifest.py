@@ -0,0 +1,69 @@
+import os
+
+import etl_manifest
+from etl_manifest import Manifest
+
+
+def test_recorded_inputs_are_skipped_until_they_change(tmp_path):
+    source = tmp_path / "religion.xlsx"
+    source.write_text("v1")
+    manifest = Manifest(str(tmp_path / "manifest.json"))
+
+    assert manifest.changed("stages", "religion", [source])
+    manifest.record("stages", "religion", [source])
+    assert not manifest.changed("stages", "religion", [source])
+
+    source.write_text("v2 with another size")
+    assert manifest.changed("stages", "religion", [source])
+
+
+def test_missing_input_counts_as_changed(tmp_path):
+    source = tmp_path / "crops.pdf"
+    source.write_text("pdf")
+    manifest = Manifest(str(tmp_path / "manifest.json"))
+    manifest.record("stages", "crops", [source])
+
+    source.unlink()
+    assert manifest.changed("stages", "crops", [source])
+
+
+def test_forget_invalidates_one_key_or_a_whole_section(tmp_path):
+    source = tmp_path / "a.csv"
+    source.write_text("a")
+    manifest = Manifest(str(tmp_path / "manifest.json"))
+    for section, key in [("stages", "a"), ("stages", "b"), ("uploaded", "a")]:
+        manifest.record(section, key, [source])
+
+    manifest.forget("stages", "a")
+    assert manifest.changed("stages", "a", [source]) and not manifest.changed("stages", "b", [source])
+    manifest.forget("uploaded")
+    assert manifest.changed("uploaded", "a", [source])
+
+
+def test_saved_manifest_is_reloaded(tmp_path):
+    source = tmp_path / "a.csv"
+    source.write_text("a")
+    path = str(tmp_path / "manifest.json")
+    manifest = Manifest(path)
+    manifest.record("uploaded", "regions", [source])
+    manifest.save()
+
+    assert not Manifest(path).changed("uploaded", "regions", [source])
+    assert not os.path.exists(f"{path}.tmp")
+
+
+def test_unreadable_manifest_starts_empty(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text("{not json")
+    assert Manifest(str(path)).data == {"files": {}, "sections": {}}
+
+
+def test_unchanged_file_is_not_rehashed(tmp_path, monkeypatch):
+    source = tmp_path / "a.csv"
+    source.write_text("a")
+    manifest = Manifest(str(tmp_path / "manifest.json"))
+    first = manifest.hash(source)
+
+    calls = []
+    monkeypatch.setattr(etl_manifest, "file_hash", lambda path: calls.append(path))
+    assert manifest.hash(source) == first and calls == []
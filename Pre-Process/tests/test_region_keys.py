@@ -0,0 +1,22 @@
+import pandas as pd
+
+from region_keys import add_region_keys, parent_ids, region_levels
+
+
+def test_codes_are_packed_after_state():
+    df = pd.DataFrame({"state": [0, 27, 27, 27], "District": ["000", "000", "521", "521"],
+                       "Subdistt": [0, 0, 0, 4148], "persons": [1, 2, 3, 4]})
+
+    keyed = add_region_keys(df, district="District", subdistt="Subdistt")
+
+    assert list(keyed.columns) == ["state", "district_code", "subdistt_code", "townvillage_code", "region_id", "persons"]
+    assert keyed["region_id"].tolist() == [0, 27_000_00000_000000, 27_521_00000_000000, 27_521_04148_000000]
+    assert keyed["townvillage_code"].tolist() == [0, 0, 0, 0]
+
+
+def test_levels_and_parents_follow_the_deepest_code():
+    keyed = add_region_keys(pd.DataFrame({"state": [0, 27, 27, 27], "district": [0, 0, 521, 521],
+                                          "subdistt": [0, 0, 0, 4148]}), "district", "subdistt")
+
+    assert region_levels(keyed).tolist() == ["INDIA", "STATE", "DISTRICT", "SUB-DISTRICT"]
+    assert parent_ids(keyed).tolist() == [pd.NA, 0, 27_000_00000_000000, 27_521_00000_000000]
@@ -0,0 +1,31 @@
+import pytest
+
+import run_pipeline
+from run_pipeline import InlinePool, build_stage_levels, make_pool
+
+
+def test_stages_run_after_the_stages_they_consume():
+    declarations = {
+        "clean_regions": (["regions.xlsx", "out/population_stats.parquet"], ["out/regions.parquet"]),
+        "clean_population": (["population.xlsx"], ["out/population_stats.parquet"]),
+        "clean_language": (["language.xlsx"], ["out/language_stats.parquet"]),
+    }
+    levels, depends_on = build_stage_levels(declarations)
+
+    assert levels == [["clean_population", "clean_language"], ["clean_regions"]]
+    assert depends_on["clean_regions"] == {"clean_population"}
+
+
+def test_circular_stages_are_rejected():
+    declarations = {"a": (["out/b"], ["out/a"]), "b": (["out/a"], ["out/b"])}
+    with pytest.raises(ValueError, match="Circular"):
+        build_stage_levels(declarations)
+
+
+def test_small_inputs_run_in_process(monkeypatch):
+    monkeypatch.setattr(run_pipeline, "PARALLEL_MIN_INPUT_MB", 64)
+    assert isinstance(make_pool(4, input_mb=3), InlinePool)
+    assert isinstance(make_pool(1, input_mb=500), InlinePool)
+    with make_pool(2, input_mb=500) as pool:
+        assert not isinstance(pool, InlinePool)
+    assert list(InlinePool().map(len, ["ab", "c"])) == [2, 1]
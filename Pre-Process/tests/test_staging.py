@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from staging import StagedWriter, apply_schema, output_files, read_output, staged_path, write_output
+
+
+def test_output_files_follow_the_staging_formats():
+    assert output_files("crops.csv", ["parquet", "csv"]) == ["crops.parquet", "crops.csv"]
+
+
+def test_apply_schema_casts_to_the_schema_types():
+    df = apply_schema(pd.DataFrame({"ID": [1.0, 2.0], "Name": ["Total", "Rural"]}), "tru")
+
+    assert list(df.columns) == ["id", "name"]
+    assert str(df["id"].dtype) == "Int64" and str(df["name"].dtype) == "string"
+
+
+def test_apply_schema_rejects_values_that_do_not_fit():
+    with pytest.raises(ValueError, match="tru.id does not fit Int64"):
+        apply_schema(pd.DataFrame({"id": [2.5]}), "tru")
+
+
+def test_chunks_are_staged_as_one_typed_table(tmp_path):
+    with StagedWriter(str(tmp_path), "regions.csv", ["parquet", "csv"]) as writer:
+        writer.write(pd.DataFrame({"state": [32], "area_name": ["Kerala"]}))
+        writer.write(pd.DataFrame({"state": [33], "area_name": ["Tamil Nadu"]}))
+
+    assert writer.rows == 2
+    staged = read_output(str(tmp_path), "regions.csv")
+    assert staged["state"].tolist() == [32, 33] and str(staged["state"].dtype) == "Int64"
+    assert pd.read_csv(tmp_path / "regions.csv")["area_name"].tolist() == ["Kerala", "Tamil Nadu"]
+
+
+def test_failed_staging_leaves_no_files(tmp_path):
+    with pytest.raises(RuntimeError):
+        with StagedWriter(str(tmp_path), "regions.csv", ["parquet", "csv"]) as writer:
+            writer.write(pd.DataFrame({"state": [32], "area_name": ["Kerala"]}))
+            raise RuntimeError("cleaner failed")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_staged_path_prefers_parquet(tmp_path):
+    assert staged_path(str(tmp_path), "tru.csv") == str(tmp_path / "tru.csv")
+    write_output(pd.DataFrame({"id": [1], "name": ["Total"]}), str(tmp_path), "tru.csv", ["parquet"])
+    assert staged_path(str(tmp_path), "tru.csv") == str(tmp_path / "tru.parquet")
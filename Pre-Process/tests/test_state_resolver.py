@@ -0,0 +1,23 @@
+import pandas as pd
+
+from state_resolver import resolve_codes, resolve_names, resolve_state
+
+
+def test_names_resolve_through_spellings_and_aliases():
+    assert resolve_state("State - JAMMU & KASHMIR (01)") == 1
+    assert resolve_state("Orissa") == 21
+    assert resolve_state("THE DADRA AND NAGAR HAVELI AND DAMAN AND DIU") == 36
+    assert resolve_state("Atlantis") is None and resolve_state(None) is None
+
+
+def test_vectorized_names_match_the_scalar_resolver():
+    names = pd.Series(["Kerala", "State - TAMIL NADU (33)", "Telangana State", "Atlantis", None])
+    assert resolve_names(names).tolist() == [32, 33, 38, pd.NA, pd.NA]
+    assert [resolve_state(n) for n in names[:3]] == [32, 33, 38]
+
+
+def test_missing_codes_fall_back_to_names(capsys):
+    ids = resolve_codes(pd.Series(["32", None, "99"]), pd.Series(["Kerala", "Orissa", "Goa"]))
+
+    assert ids.tolist() == [32, 21, 99]
+    assert "1 rows with unknown state codes: [99]" in capsys.readouterr().out
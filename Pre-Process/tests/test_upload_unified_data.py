@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+
+from upload_unified_data import (
+    FOREIGN_KEYS, ParquetCSVStream, assign_view_rebuilds, build_load_levels, column_definitions,
+    create_table_statements, cube_query, index_definitions, materialized_view_statements, physical_table, view_sources,
+)
+
+
+def test_area_tables_are_partitioned_by_state():
+    statements = create_table_statements("religion_stats_by_area", '"state" BIGINT', partitioned=True)
+
+    assert statements[0] == 'CREATE TABLE religion_stats_by_area ("state" BIGINT) PARTITION BY LIST (state);'
+    assert any("PARTITION OF religion_stats_by_area FOR VALUES IN (32)" in s for s in statements)
+    assert statements[-1].endswith("PARTITION OF religion_stats_by_area DEFAULT;")
+
+
+def test_lookup_tables_are_plain():
+    assert create_table_statements("regions", '"state" BIGINT', partitioned=False) == [
+        'CREATE TABLE regions ("state" BIGINT);'
+    ]
+    assert physical_table("regions") == "regions"
+    assert physical_table("religion_stats") == "religion_stats_by_area"
+
+
+def test_area_tables_get_district_indexes():
+    indexes = index_definitions("religion_stats")
+    assert ["state", "tru_id", "religion_id"] in indexes
+    assert ["religion_id", "tru_id", "state"] in indexes
+    assert ["district_code", "tru_id"] in indexes and ["region_id", "tru_id"] in indexes
+
+
+def test_cube_query_covers_every_proper_grouping_set():
+    query, keys = cube_query("language_stats", "language_id", ["person"])
+
+    assert keys == ["grouping_id", "state", "tru_id", "language_id"]
+    assert "GROUPING(state, tru_id, language_id) AS grouping_id" in query
+    assert ("GROUPING SETS ((state, tru_id), (state, language_id), (tru_id, language_id), "
+            "(state), (tru_id), (language_id), ())") in query
+
+
+def test_view_sources_are_the_tables_a_view_reads():
+    assert view_sources("mv_religion_rates") == {"religion_stats", "regions", "tru", "religions"}
+    assert view_sources("cube_language_stats") == {"language_stats"}
+
+
+def test_materialized_view_is_created_populated_with_its_unique_key():
+    statements = materialized_view_statements("mv_population_totals")
+
+    assert statements[0].startswith("CREATE MATERIALIZED VIEW IF NOT EXISTS mv_population_totals AS")
+    assert statements[0].endswith("WITH DATA;")
+    assert statements[1] == ("CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_population_totals_key "
+                             "ON mv_population_totals (state, tru_id);")
+
+
+def test_parquet_stream_renders_headerless_csv_in_small_reads(tmp_path):
+    path = tmp_path / "tru.parquet"
+    pd.DataFrame({"id": [1, 2, 3], "name": ["Total", "Rural", "Urban, ward"]}).to_parquet(path)
+
+    stream = ParquetCSVStream(str(path), batch_rows=1)
+    chunks = iter(lambda: stream.read(5), b"")
+    assert b"".join(chunks) == b'1,"Total"\n2,"Rural"\n3,"Urban, ward"\n'
+    stream.close()
+
+
+def test_column_definitions_prefer_schema_types():
+    header = pd.DataFrame({"State": pd.Series([], dtype="int64"), "val": pd.Series([], dtype="float64"),
+                           "issue_date": pd.Series([], dtype="datetime64[ns]")})
+    assert column_definitions(header, {"state": "INTEGER"}) == (
+        '"state" INTEGER, "val" DOUBLE PRECISION, "issue_date" DATE'
+    )
+
+
+def test_load_levels_follow_the_foreign_keys():
+    levels = [[table_name for _, table_name, _ in level] for level in build_load_levels()]
+
+    assert levels[0] == ["regions", "tru", "religions", "languages", "age_groups", "crop_stats"]
+    assert levels[1] == ["region_hierarchy"]
+    assert "religion_stats" in levels[2] and "language_stats" in levels[2]
+
+
+def test_each_view_is_rebuilt_with_its_last_loaded_source():
+    levels = build_load_levels()
+    owners = assign_view_rebuilds(["mv_religion_rates", "cube_language_stats"], levels)
+    assert owners == {"religion_stats": ["mv_religion_rates"], "language_stats": ["cube_language_stats"]}
+
+    # Two reloaded sources in the same level: left to create_materialized_views
+    lookups = [[e for e in levels[0] if e[1] in ("regions", "religions")]]
+    assert assign_view_rebuilds(["mv_religion_rates"], lookups) == {}
+    assert assign_view_rebuilds(["mv_religion_rates"], [lookups[0][:1]]) == {"regions": ["mv_religion_rates"]}
+
+
+def test_circular_foreign_keys_are_rejected(monkeypatch):
+    monkeypatch.setitem(FOREIGN_KEYS, "regions", [("state", "region_hierarchy(state)")])
+    with pytest.raises(ValueError, match="Circular foreign keys"):
+        build_load_levels()
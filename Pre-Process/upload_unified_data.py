@@ -1,8 +1,22 @@
+import io
 import os
+import re
+import sys
+import json
+import time
 import pandas as pd
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
 from sqlalchemy.pool import NullPool
+from etl_manifest import Manifest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+from staging import staged_path, read_output
+from state_resolver import MASTER_STATES
 
 load_dotenv()
 
@@ -10,6 +24,9 @@ load_dotenv()
 # 🔧 CONFIGURATION
 # ==========================================
 INPUT_DIR = "unified_outputs"
+SCHEMA_FILE = "database_schema.json" # column types for the COPY loader
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4")) # tables loaded concurrently (and pooled connections)
+COPY_BATCH_ROWS = int(os.getenv("COPY_BATCH_ROWS", "50000")) # Parquet rows rendered to CSV at a time for COPY
 
 USER = os.getenv("user")
 PASSWORD = os.getenv("password")
@@ -25,6 +42,7 @@ DB_CONNECTION_STRING = f"postgresql+psycopg2://{USER}:{PASSWORD}@{HOST}:{PORT}/{
 UPLOAD_SEQUENCE = [
     # --- 1. Master Tables (Lookups) ---
     ("regions.csv", "regions", ["state"]),
+    ("region_hierarchy.csv", "region_hierarchy", ["region_id"]),
     ("tru.csv", "tru", ["id"]),
     ("religions.csv", "religions", ["id"]),
     ("languages.csv", "languages", ["id"]),
@@ -41,36 +59,257 @@ UPLOAD_SEQUENCE = [
 ]
 
 FOREIGN_KEYS = {
-    "population_stats": [("state", "regions(state)"), ("tru_id", "tru(id)")],
-    "healthcare_stats": [("state", "regions(state)"), ("tru_id", "tru(id)")],
-    "education_stats":  [("state", "regions(state)"), ("tru_id", "tru(id)")], # FIX: Renamed key
-    "religion_stats":   [("state", "regions(state)"), ("tru_id", "tru(id)"), ("religion_id", "religions(id)")],
-    "occupation_stats": [("state", "regions(state)"), ("tru_id", "tru(id)"), ("age_group_id", "age_groups(id)")],
-    "language_stats":   [("state", "regions(state)"), ("tru_id", "tru(id)"), ("language_id", "languages(id)")],
+    "region_hierarchy": [("state", "regions(state)")],
+    "population_stats": [("state", "regions(state)"), ("tru_id", "tru(id)"), ("region_id", "region_hierarchy(region_id)")],
+    "healthcare_stats": [("state", "regions(state)"), ("tru_id", "tru(id)"), ("region_id", "region_hierarchy(region_id)")],
+    "education_stats":  [("state", "regions(state)"), ("tru_id", "tru(id)"), ("region_id", "region_hierarchy(region_id)")], # FIX: Renamed key
+    "religion_stats":   [("state", "regions(state)"), ("tru_id", "tru(id)"), ("religion_id", "religions(id)"), ("region_id", "region_hierarchy(region_id)")],
+    "occupation_stats": [("state", "regions(state)"), ("tru_id", "tru(id)"), ("age_group_id", "age_groups(id)"), ("region_id", "region_hierarchy(region_id)")],
+    "language_stats":   [("state", "regions(state)"), ("tru_id", "tru(id)"), ("language_id", "languages(id)"), ("region_id", "region_hierarchy(region_id)")],
+}
+
+# ==========================================
+# 🗺️ AREA-LEVEL FACT TABLES
+# ==========================================
+# These hold every area level (India, state, district, ...) in `<table>_by_area`, list-partitioned
+# by state. `<table>` itself becomes a view of the India/state rows (district_code = 0), so existing
+# queries keep their meaning; district-level questions join `<table>_by_area` to region_hierarchy.
+AREA_TABLE_SUFFIX = "_by_area"
+PARTITIONED_TABLES = [
+    "population_stats", "healthcare_stats", "education_stats",
+    "religion_stats", "occupation_stats", "language_stats",
+]
+
+def physical_table(table_name):
+    """Table the rows of `table_name` are stored in."""
+    return f"{table_name}{AREA_TABLE_SUFFIX}" if table_name in PARTITIONED_TABLES else table_name
+
+def partition_statements(parent):
+    """One LIST partition per state (India included), plus a default for codes outside the master list."""
+    for state in sorted(MASTER_STATES):
+        yield f"CREATE TABLE {parent}_s{state} PARTITION OF {parent} FOR VALUES IN ({state});"
+    yield f"CREATE TABLE {parent}_default PARTITION OF {parent} DEFAULT;"
+
+def create_table_statements(table, column_defs, partitioned):
+    """CREATE TABLE for `table`; area-level tables are list-partitioned by state."""
+    if not partitioned:
+        return [f"CREATE TABLE {table} ({column_defs});"]
+    return [f"CREATE TABLE {table} ({column_defs}) PARTITION BY LIST (state);"] + list(partition_statements(table))
+
+def partition_names(parent):
+    return [f"{parent}_s{state}" for state in sorted(MASTER_STATES)] + [f"{parent}_default"]
+
+def state_view_statements(table_name, conn):
+    """Replaces `table_name` (a plain table before area levels existed) with the India/state-level view."""
+    kind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {"t": table_name}).scalar()
+    statements = []
+    if kind in ("r", "p"):
+        statements.append(f"DROP TABLE {table_name} CASCADE;")
+    statements.append(
+        f"CREATE OR REPLACE VIEW {table_name} AS SELECT * FROM {physical_table(table_name)} WHERE district_code = 0;"
+    )
+    return statements
+
+# ==========================================
+# ⚡ INDEXES & MATERIALIZED VIEWS
+# ==========================================
+# Non-FK columns that queries filter on alongside the FK columns
+EXTRA_INDEX_COLUMNS = {
+    "population_stats": ["age"],
 }
 
+# Pre-joined, pre-computed versions of the most common template query shapes.
+# name -> (SELECT statement, unique key columns used for REFRESH ... CONCURRENTLY)
+MATERIALIZED_VIEWS = {
+    "mv_religion_rates": ("""
+        SELECT rs.state, r.area_name, rs.tru_id, t.name AS tru_name, rs.religion_id, rel.religion_name,
+               rs.tot_p, rs.tot_m, rs.tot_f, rs.p_lit, rs.m_lit, rs.f_lit, rs.tot_work_p,
+               rs.p_lit * 100.0 / NULLIF(rs.tot_p, 0) AS literacy_rate,
+               rs.m_lit * 100.0 / NULLIF(rs.tot_m, 0) AS male_literacy_rate,
+               rs.f_lit * 100.0 / NULLIF(rs.tot_f, 0) AS female_literacy_rate,
+               rs.tot_work_p * 100.0 / NULLIF(rs.tot_p, 0) AS work_participation_rate
+        FROM religion_stats rs
+        JOIN regions r ON rs.state = r.state
+        JOIN tru t ON rs.tru_id = t.id
+        JOIN religions rel ON rs.religion_id = rel.id
+    """, ["state", "tru_id", "religion_id"]),
+    "mv_language_ranks": ("""
+        SELECT ls.state, r.area_name, ls.tru_id, t.name AS tru_name, ls.language_id, l.name AS language_name,
+               ls.person, ls.male, ls.female,
+               RANK() OVER (PARTITION BY ls.state, ls.tru_id ORDER BY ls.person DESC) AS state_rank
+        FROM language_stats ls
+        JOIN regions r ON ls.state = r.state
+        JOIN tru t ON ls.tru_id = t.id
+        JOIN languages l ON ls.language_id = l.id
+    """, ["state", "tru_id", "language_id"]),
+    "mv_population_totals": ("""
+        SELECT p.state, r.area_name, p.tru_id, t.name AS tru_name,
+               p.persons, p.males, p.females,
+               p.females * 1000.0 / NULLIF(p.males, 0) AS sex_ratio
+        FROM population_stats p
+        JOIN regions r ON p.state = r.state
+        JOIN tru t ON p.tru_id = t.id
+        WHERE p.age = 'All ages'
+    """, ["state", "tru_id"]),
+}
+
+# ==========================================
+# 🧊 ROLLUP CUBES
+# ==========================================
+# Fact table -> (dimension key, core measures). Each gets a `cube_<table>` materialized view with
+# the SUM of every measure for each proper subset of (state, tru_id, dimension), tagged with
+# grouping_id = GROUPING(state, tru_id, dimension). The backend rewrites aggregate queries that
+# leave a key unused (e.g. all religions per state) to read the matching grouping set instead.
+ROLLUP_CUBES = {
+    "religion_stats": ("religion_id", [
+        "tot_p", "tot_m", "tot_f", "p_06", "m_06", "f_06", "p_lit", "m_lit", "f_lit", "p_ill", "m_ill", "f_ill",
+        "tot_work_p", "tot_work_m", "tot_work_f", "mainwork_p", "mainwork_m", "mainwork_f",
+        "margwork_p", "margwork_m", "margwork_f", "non_work_p", "non_work_m", "non_work_f",
+    ]),
+    "language_stats": ("language_id", ["person", "male", "female"]),
+    "occupation_stats": ("age_group_id", [
+        "population_total", "population_male", "population_female",
+        "main_workers_total", "main_workers_male", "main_workers_female",
+        "marginal_workers_total", "marginal_workers_male", "marginal_workers_female",
+        "non_workers_total", "non_workers_male", "non_workers_female",
+        "seeking_work_total", "seeking_work_male", "seeking_work_female",
+    ]),
+    "population_stats": ("age", ["persons", "males", "females"]),
+}
+
+def cube_query(table_name, dimension, measures):
+    """(SELECT ... GROUP BY GROUPING SETS, key columns) of one rollup cube, built from the state-level view."""
+    keys = ["state", "tru_id", dimension]
+    grouping_sets = [
+        f"({', '.join(subset)})" for size in range(len(keys) - 1, -1, -1) for subset in combinations(keys, size)
+    ]
+    query = f"""
+        SELECT GROUPING({', '.join(keys)}) AS grouping_id, {', '.join(keys)},
+               {', '.join(f"SUM({m}) AS {m}" for m in measures)}
+        FROM {table_name}
+        GROUP BY GROUPING SETS ({', '.join(grouping_sets)})
+    """
+    return query, ["grouping_id"] + keys
+
+MATERIALIZED_VIEWS.update({
+    f"cube_{table_name}": cube_query(table_name, dimension, measures)
+    for table_name, (dimension, measures) in ROLLUP_CUBES.items()
+})
+
+def index_definitions(table_name):
+    """
+    Composite indexes over a fact table's FK columns: (state, tru_id, dim) and (dim, tru_id, state).
+    Area-level tables also get (district_code, tru_id) for the state-level view and
+    (region_id, tru_id) for district lookups; each lands in every state partition.
+    """
+    fk_columns = [fk_col for fk_col, _ in FOREIGN_KEYS.get(table_name, []) if fk_col != "region_id"]
+    if not fk_columns:
+        return []
+    indexes = [fk_columns + EXTRA_INDEX_COLUMNS.get(table_name, [])]
+    dimensions = [col for col in fk_columns if col not in ("state", "tru_id")]
+    for dim in dimensions:
+        # "Dimension across states" lookups (e.g. Hindi speakers in every state) lead with the dimension.
+        indexes.append([dim, "tru_id", "state"])
+    if table_name in PARTITIONED_TABLES:
+        indexes += [["district_code", "tru_id"], ["region_id", "tru_id"]]
+    return indexes
+
+def index_statements(table_name):
+    physical = physical_table(table_name)
+    for columns in index_definitions(table_name):
+        index_name = f"idx_{physical}_{'_'.join(columns)}"
+        yield columns, f"CREATE INDEX IF NOT EXISTS {index_name} ON {physical} ({', '.join(columns)});"
+
+def create_indexes(table_name, engine):
+    indexes = list(index_statements(table_name))
+    if not indexes:
+        return
+
+    with engine.begin() as conn:
+        for columns, statement in indexes:
+            try:
+                conn.execute(text(statement))
+                print(f"   📇 Indexed {table_name}({', '.join(columns)})")
+            except Exception as e:
+                print(f"   ❌ Index Error on {table_name} ({', '.join(columns)}): {e}")
+        # Fresh statistics so the planner actually picks the new indexes.
+        conn.execute(text(f"ANALYZE {physical_table(table_name)};"))
+
+def view_sources(view_name):
+    """Tables (or state-level views) a materialized view reads."""
+    query, _ = MATERIALIZED_VIEWS[view_name]
+    return {t.lower() for t in re.findall(r"\b(?:FROM|JOIN)\s+(\w+)", query, re.IGNORECASE)}
+
+def materialized_view_statements(view_name):
+    """Creates a view populated (readable as soon as it commits), with its unique key."""
+    query, key_columns = MATERIALIZED_VIEWS[view_name]
+    return [
+        f"CREATE MATERIALIZED VIEW IF NOT EXISTS {view_name} AS {query} WITH DATA;",
+        f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{view_name}_key ON {view_name} ({', '.join(key_columns)});",
+        f"ANALYZE {view_name};",
+    ]
+
+def create_materialized_views(engine):
+    """Creates (populated) any view that doesn't exist yet; existing views are left as they are."""
+    print("🧮 Creating materialized views...")
+    for view_name in MATERIALIZED_VIEWS:
+        try:
+            with engine.begin() as conn:
+                for statement in materialized_view_statements(view_name):
+                    conn.execute(text(statement))
+            print(f"   ✅ {view_name}")
+        except Exception as e:
+            print(f"   ❌ View Error on {view_name}: {e}")
+
+def refresh_materialized_views(engine, concurrently=False):
+    """Recomputes every view; run after each load. CONCURRENTLY keeps them readable meanwhile."""
+    print("🔄 Refreshing materialized views...")
+    for view_name in MATERIALIZED_VIEWS:
+        try:
+            with engine.begin() as conn:
+                populated = conn.execute(
+                    text("SELECT ispopulated FROM pg_matviews WHERE matviewname = :name"), {"name": view_name}
+                ).scalar()
+                # A never-populated view can't be refreshed concurrently.
+                mode = "CONCURRENTLY " if concurrently and populated else ""
+                conn.execute(text(f"REFRESH MATERIALIZED VIEW {mode}{view_name};"))
+                conn.execute(text(f"ANALYZE {view_name};"))
+            print(f"   ✅ Refreshed {view_name}")
+        except Exception as e:
+            print(f"   ❌ Refresh Error on {view_name}: {e}")
+
 def clean_database(engine):
     print("\n🧹 Cleaning Database (dropping old tables)...")
     # Added education_stats to drop list
     tables_to_drop = [
         "population_stats", "healthcare_stats", "education_stats", "pca_stats", 
         "religion_stats", "occupation_stats", "language_stats", "crop_stats",
-        "regions", "tru", "religions", "languages", "age_groups"
+        "regions", "region_hierarchy", "tru", "religions", "languages", "age_groups"
     ]
     
     with engine.begin() as conn:
         for table in tables_to_drop:
+            if table in PARTITIONED_TABLES:
+                conn.execute(text(f"DROP VIEW IF EXISTS {table} CASCADE;"))
+                table = physical_table(table)
             conn.execute(text(f"DROP TABLE IF EXISTS {table} CASCADE;"))
             print(f"   🗑️  Dropped {table}")
     print("✨ Database is clean.\n")
 
+def rls_statements(table_name):
+    table_name = physical_table(table_name)
+    return [
+        f"ALTER TABLE {table_name} ENABLE ROW LEVEL SECURITY;",
+        f"DROP POLICY IF EXISTS \"Public Read\" ON {table_name};",
+        f"CREATE POLICY \"Public Read\" ON {table_name} FOR SELECT USING (true);",
+    ]
+
 def enable_rls(table_name, engine):
     try:
         with engine.begin() as conn:
-            conn.execute(text(f"ALTER TABLE {table_name} ENABLE ROW LEVEL SECURITY;"))
-            conn.execute(text(f"DROP POLICY IF EXISTS \"Public Read\" ON {table_name};"))
-            conn.execute(text(f"CREATE POLICY \"Public Read\" ON {table_name} FOR SELECT USING (true);"))
-        print(f"   🔒 RLS enabled for {table_name}.")
+            for statement in rls_statements(table_name):
+                conn.execute(text(statement))
+        print(f"   🔒 RLS enabled for {physical_table(table_name)}.")
     except Exception as e:
         print(f"   ⚠️  Warning setting RLS for {table_name}: {e}")
 
@@ -82,54 +321,350 @@ def add_primary_key(table_name, pk_column, engine):
     except Exception as e:
         print(f"   ⚠️  PK Error (might already exist): {e}")
 
+def foreign_key_statements(table_name):
+    physical = physical_table(table_name)
+    for fk_col, ref_def in FOREIGN_KEYS.get(table_name, []):
+        ref_table, ref_col = ref_def.replace(')', '').split('(')
+        constraint_name = f"fk_{physical}_{fk_col}"
+        query = f"""
+            ALTER TABLE {physical} 
+            DROP CONSTRAINT IF EXISTS {constraint_name};
+            
+            ALTER TABLE {physical} 
+            ADD CONSTRAINT {constraint_name} 
+            FOREIGN KEY ({fk_col}) REFERENCES {ref_table}({ref_col});
+        """
+        yield fk_col, ref_table, ref_col, query
+
 def add_foreign_keys(table_name, engine):
     if table_name not in FOREIGN_KEYS:
         return
 
     with engine.begin() as conn:
-        for fk_col, ref_def in FOREIGN_KEYS[table_name]:
-            ref_table, ref_col = ref_def.replace(')', '').split('(')
-            constraint_name = f"fk_{table_name}_{fk_col}"
+        for fk_col, ref_table, ref_col, query in foreign_key_statements(table_name):
             try:
-                query = f"""
-                    ALTER TABLE {table_name} 
-                    DROP CONSTRAINT IF EXISTS {constraint_name};
-                    
-                    ALTER TABLE {table_name} 
-                    ADD CONSTRAINT {constraint_name} 
-                    FOREIGN KEY ({fk_col}) REFERENCES {ref_table}({ref_col});
-                """
                 conn.execute(text(query))
                 print(f"   🔗 Linked {fk_col} -> {ref_table}({ref_col})")
             except Exception as e:
                 print(f"   ❌ FK Error on {table_name} ({fk_col}): {e}")
 
-def upload_file(filename, table_name, pk_columns, engine):
-    file_path = os.path.join(INPUT_DIR, filename)
+def upload_file(filename, table_name, pk_columns, engine, column_types=None):
+    """
+    pandas `to_sql` path (--to-sql): rows are appended into a table created with the same DDL
+    as the COPY path, so area-level tables get the same state partitions and view either way.
+    """
+    file_path = staged_path(INPUT_DIR, filename)
     
     if not os.path.exists(file_path):
         print(f"⏭️  Skipping {filename} (File not found)")
-        return
+        return False
 
-    print(f"📤 Uploading: {filename} -> Table: {table_name}")
+    print(f"📤 Uploading: {os.path.basename(file_path)} -> Table: {table_name}")
     
     try:
-        df = pd.read_csv(file_path)
+        df = read_output(INPUT_DIR, filename)
         df.columns = df.columns.str.lower()
-        
-        df.to_sql(table_name, engine, if_exists='replace', index=False, chunksize=10000)
+        physical = physical_table(table_name)
+
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {physical} CASCADE;"))
+            column_defs = column_definitions(df, (column_types or {}).get(table_name, {}))
+            for statement in create_table_statements(physical, column_defs, table_name in PARTITIONED_TABLES):
+                conn.execute(text(statement))
+        df.to_sql(physical, engine, if_exists='append', index=False, chunksize=10000)
         print(f"   ✅ Uploaded {len(df)} rows.")
+        if table_name in PARTITIONED_TABLES:
+            with engine.begin() as conn:
+                for statement in state_view_statements(table_name, conn):
+                    conn.execute(text(statement))
         
         if pk_columns:
             for pk in pk_columns:
                 add_primary_key(table_name, pk, engine)
 
         add_foreign_keys(table_name, engine)
+        create_indexes(table_name, engine)
         enable_rls(table_name, engine)
         print("") 
+        return True
 
     except Exception as e:
         print(f"   ❌ FAILED: {e}")
+        return False
+
+# ==========================================
+# 🚚 COPY BULK LOADER
+# ==========================================
+def load_column_types(schema_file=SCHEMA_FILE):
+    """Reads {table: {column: SQL type}} from the exported schema (empty if missing)."""
+    if not os.path.exists(schema_file):
+        print(f"⚠️  {schema_file} not found; column types will be inferred from the CSVs.")
+        return {}
+    with open(schema_file, "r") as f:
+        schema = json.load(f)
+    return {
+        table: {col["name"]: col["type"] for col in info.get("columns", [])}
+        for table, info in schema.items()
+    }
+
+def infer_sql_type(series):
+    if pd.api.types.is_integer_dtype(series):
+        return "BIGINT"
+    if pd.api.types.is_float_dtype(series):
+        return "DOUBLE PRECISION"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "DATE"
+    return "TEXT"
+
+class ParquetCSVStream(io.RawIOBase):
+    """
+    Read-only file over a Parquet file rendered as headerless CSV, for COPY FROM STDIN.
+    Record batches are converted one at a time as COPY reads, so only one batch of rows
+    (plus its CSV text) is in memory, whatever the table size.
+    """
+
+    def __init__(self, path, batch_rows=COPY_BATCH_ROWS):
+        self._parquet = pq.ParquetFile(path)
+        self._batches = self._parquet.iter_batches(batch_size=batch_rows)
+        self._buffer = bytearray()
+        self.schema = self._parquet.schema_arrow
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            batch = next(self._batches, None)
+            if batch is None:
+                break
+            sink = io.BytesIO()
+            pa_csv.write_csv(batch, sink, write_options=pa_csv.WriteOptions(include_header=False))
+            self._buffer += sink.getbuffer()
+        size = len(self._buffer) if size < 0 else min(size, len(self._buffer))
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return chunk
+
+    def close(self):
+        self._parquet.close()
+        super().close()
+
+def column_definitions(header, known_types):
+    """`"col" TYPE, ...` for a frame's (lower-cased) columns: schema types first, else inferred."""
+    return ", ".join(
+        f'"{col.lower()}" {known_types.get(col.lower()) or infer_sql_type(header[col])}' for col in header.columns
+    )
+
+def copy_upload_file(filename, table_name, pk_columns, engine, column_types, restore_dependents=True, views=()):
+    """
+    Streams a staged table into Postgres with COPY FROM STDIN.
+    Parquet (already typed by the cleaners) is preferred; CSV is streamed from disk as is.
+
+    Rows go into a `<table>__staging` table which gets its keys, indexes and RLS policy and
+    is then renamed over the live table, all in one transaction: readers see either the old
+    table or the complete new one. Area-level fact tables are staged list-partitioned by state
+    and their state-level view is recreated in the same transaction, as are the materialized
+    `views` (populated) built on this table.
+    """
+    file_path = staged_path(INPUT_DIR, filename)
+    
+    if not os.path.exists(file_path):
+        print(f"⏭️  Skipping {filename} (File not found)")
+        return False
+
+    print(f"📤 Copying: {os.path.basename(file_path)} -> Table: {table_name}")
+    start_time = time.perf_counter()
+    physical = physical_table(table_name)
+    partitioned = table_name in PARTITIONED_TABLES
+    staging = f"{physical}__staging"
+
+    try:
+        parquet = file_path.endswith(".parquet")
+        if parquet:
+            # Only the schema is read up front; rows are streamed into COPY batch by batch.
+            header = pq.read_schema(file_path).empty_table().to_pandas()
+        else:
+            header = pd.read_csv(file_path, nrows=1000)
+        columns = [c.lower() for c in header.columns]
+        column_defs = column_definitions(header, column_types.get(table_name, {}))
+        column_list = ", ".join(f'"{col}"' for col in columns)
+
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {staging};"))
+            for statement in create_table_statements(staging, column_defs, partitioned):
+                conn.execute(text(statement))
+            if parquet:
+                # pyarrow quotes every string, so "" must still load as NULL (as an empty CSV field does).
+                text_columns = [f'"{col}"' for col, original in zip(columns, header.columns)
+                                if pd.api.types.is_string_dtype(header[original]) or header[original].dtype == object]
+                force_null = f", FORCE_NULL ({', '.join(text_columns)})" if text_columns else ""
+                copy_sql = f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv{force_null})"
+            else:
+                copy_sql = f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv, HEADER true)"
+            with (ParquetCSVStream(file_path) if parquet else open(file_path, "r", encoding="utf-8")) as f:
+                cursor = conn.connection.cursor()
+                cursor.copy_expert(copy_sql, f)
+                row_count = cursor.rowcount
+            if pk_columns:
+                conn.execute(text(f"ALTER TABLE {staging} ADD CONSTRAINT {staging}_pkey PRIMARY KEY ({', '.join(pk_columns)});"))
+
+            # --- Swap (the old table stays readable until here) ---
+            conn.execute(text(f"DROP TABLE IF EXISTS {physical} CASCADE;"))
+            conn.execute(text(f"ALTER TABLE {staging} RENAME TO {physical};"))
+            if partitioned:
+                for old, new in zip(partition_names(staging), partition_names(physical)):
+                    conn.execute(text(f"ALTER TABLE {old} RENAME TO {new};"))
+                for statement in state_view_statements(table_name, conn):
+                    conn.execute(text(statement))
+            if pk_columns:
+                conn.execute(text(f"ALTER TABLE {physical} RENAME CONSTRAINT {staging}_pkey TO {physical}_pkey;"))
+            for _, _, _, query in foreign_key_statements(table_name):
+                conn.execute(text(query))
+            # CASCADE dropped the FKs of already-loaded tables referencing this one; restore them.
+            for dependent, fks in (FOREIGN_KEYS.items() if restore_dependents else ()):
+                if any(ref_def.startswith(f"{table_name}(") for _, ref_def in fks):
+                    if conn.execute(text("SELECT to_regclass(:t)"), {"t": physical_table(dependent)}).scalar():
+                        for _, ref_table, _, query in foreign_key_statements(dependent):
+                            if ref_table == table_name:
+                                conn.execute(text(query))
+            for _, statement in index_statements(table_name):
+                conn.execute(text(statement))
+            for statement in rls_statements(table_name):
+                conn.execute(text(statement))
+            conn.execute(text(f"ANALYZE {physical};"))
+            for view_name in views:
+                try:
+                    # Savepoint: a view that can't be built yet must not undo the swap.
+                    with conn.begin_nested():
+                        for statement in materialized_view_statements(view_name):
+                            conn.execute(text(statement))
+                    print(f"   🧮 {table_name}: rebuilt {view_name}")
+                except Exception as e:
+                    print(f"   ⚠️  {table_name}: {view_name} left for after the load: {e}")
+
+        print(f"   ✅ {table_name}: copied {row_count} rows in {time.perf_counter() - start_time:.2f}s (keys, indexes, RLS included).")
+        print("")
+        return True
+
+    except Exception as e:
+        print(f"   ❌ {table_name}: FAILED (live table left untouched): {e}")
+        return False
+
+# ==========================================
+# 🧵 PARALLEL LOAD (FK DEPENDENCY DAG)
+# ==========================================
+def referenced_table(ref_def):
+    return ref_def.split('(')[0]
+
+def build_load_levels(sequence=UPLOAD_SEQUENCE):
+    """
+    Groups the upload sequence into levels using the FOREIGN_KEYS DAG.
+    Every table only references tables in earlier levels, so each level can load concurrently.
+    """
+    entries, seen = [], set()
+    for entry in sequence:
+        if entry[0] not in seen:
+            entries.append(entry)
+            seen.add(entry[0])
+    tables = {table_name for _, table_name, _ in entries}
+    depends_on = {
+        table_name: {referenced_table(ref_def) for _, ref_def in FOREIGN_KEYS.get(table_name, [])} & tables
+        for table_name in tables
+    }
+
+    levels, loaded = [], set()
+    while entries:
+        level = [entry for entry in entries if depends_on[entry[1]] <= loaded]
+        if not level:
+            raise ValueError(f"Circular foreign keys between: {', '.join(e[1] for e in entries)}")
+        levels.append(level)
+        loaded |= {table_name for _, table_name, _ in level}
+        entries = [entry for entry in entries if entry not in level]
+    return levels
+
+def detach_dependents(table_names, engine):
+    """
+    Drops the materialized views built on, and the FKs pointing at, tables about to be swapped.
+    Otherwise concurrent swaps would each CASCADE into the same dependents and deadlock.
+    Views over other tables stay untouched. Returns the dropped views.
+    """
+    dropped = [view_name for view_name in MATERIALIZED_VIEWS if view_sources(view_name) & set(table_names)]
+    with engine.begin() as conn:
+        for view_name in dropped:
+            conn.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {view_name};"))
+        for dependent, fks in FOREIGN_KEYS.items():
+            physical = physical_table(dependent)
+            if not conn.execute(text("SELECT to_regclass(:t)"), {"t": physical}).scalar():
+                continue
+            for fk_col, ref_def in fks:
+                if referenced_table(ref_def) in table_names:
+                    conn.execute(text(f"ALTER TABLE {physical} DROP CONSTRAINT IF EXISTS fk_{physical}_{fk_col};"))
+    return dropped
+
+def assign_view_rebuilds(views, levels):
+    """
+    {table: views rebuilt in its swap transaction}. A view goes to the one reloaded source in
+    the latest level, so every other reloaded source is already committed when it's built.
+    Views with several sources in that level are left to create_materialized_views.
+    """
+    level_of = {table_name: i for i, level in enumerate(levels) for _, table_name, _ in level}
+    owners = {}
+    for view_name in views:
+        sources = [t for t in view_sources(view_name) if t in level_of]
+        last = max(level_of[t] for t in sources)
+        latest = [t for t in sources if level_of[t] == last]
+        if len(latest) == 1:
+            owners.setdefault(latest[0], []).append(view_name)
+    return owners
+
+def parallel_upload(engine, use_copy=True, column_types=None, workers=UPLOAD_WORKERS, tables=None):
+    """Loads each DAG level concurrently (only `tables`, if given) and prints per-table timings."""
+    sequence = [entry for entry in UPLOAD_SEQUENCE if tables is None or entry[1] in tables]
+    levels = build_load_levels(sequence)
+    reloading = {table_name for level in levels for _, table_name, _ in level}
+    view_owners = {}
+    if use_copy:
+        view_owners = assign_view_rebuilds(detach_dependents(reloading, engine), levels)
+
+    def load(entry):
+        filename, table_name, pk_cols = entry
+        start_time = time.perf_counter()
+        if use_copy:
+            ok = copy_upload_file(filename, table_name, pk_cols, engine, column_types or {},
+                                  restore_dependents=False, views=view_owners.get(table_name, ()))
+        else:
+            ok = upload_file(filename, table_name, pk_cols, engine, column_types)
+        return table_name, ok, time.perf_counter() - start_time
+
+    timings, failed = [], []
+    run_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for i, level in enumerate(levels, 1):
+            print(f"🧵 Level {i}: loading {', '.join(t for _, t, _ in level)} ({min(workers, len(level))} at a time)")
+            for table_name, ok, seconds in pool.map(load, level):
+                timings.append((table_name, ok, seconds))
+                if not ok:
+                    failed.append(table_name)
+    wall_time = time.perf_counter() - run_start
+
+    if use_copy:
+        # Tables that weren't (successfully) reloaded keep their old data; give them their FKs back.
+        reloaded = reloading - set(failed)
+        with engine.connect() as conn:
+            existing = {
+                t for t in FOREIGN_KEYS
+                if conn.execute(text("SELECT to_regclass(:t)"), {"t": physical_table(t)}).scalar()
+            }
+        for dependent, fks in FOREIGN_KEYS.items():
+            if dependent in existing and dependent not in reloaded and \
+                    any(referenced_table(ref_def) in reloading for _, ref_def in fks):
+                add_foreign_keys(dependent, engine)
+
+    print("\n⏱️  Per-table load times:")
+    for table_name, ok, seconds in sorted(timings, key=lambda t: -t[2]):
+        print(f"   {'✅' if ok else '❌'} {table_name:<20} {seconds:8.2f}s")
+    print(f"   Wall time {wall_time:.2f}s vs {sum(t[2] for t in timings):.2f}s sequential.\n")
+    return failed
 
 if __name__ == "__main__":
     print("🚀 Starting Unified Database Upload...")
@@ -139,18 +674,45 @@ if __name__ == "__main__":
         exit()
 
     try:
-        engine = create_engine(DB_CONNECTION_STRING, poolclass=NullPool)
+        if UPLOAD_WORKERS > 1:
+            engine = create_engine(DB_CONNECTION_STRING, pool_size=UPLOAD_WORKERS, max_overflow=0)
+        else:
+            engine = create_engine(DB_CONNECTION_STRING, poolclass=NullPool)
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
         print("✅ Database Connection Successful.")
+
+        if "--refresh-views" in sys.argv:
+            # Data changed in place (no reload): just recompute the aggregates.
+            refresh_materialized_views(engine, concurrently=True)
+            exit()
         
-        clean_database(engine)
+        # COPY + atomic swap by default; --to-sql keeps the old drop-everything pandas path.
+        # --changed-only reloads just the tables whose staged file hash differs from the last upload.
+        changed_only = "--changed-only" in sys.argv
+        use_copy = "--to-sql" not in sys.argv or changed_only
+        column_types = load_column_types()
+        manifest = Manifest()
+        staged_paths = {table_name: staged_path(INPUT_DIR, filename) for filename, table_name, _ in UPLOAD_SEQUENCE}
+
+        tables = None
+        if changed_only:
+            tables = {t for t, path in staged_paths.items() if manifest.changed("uploaded", t, [path])}
+            if not tables:
+                print("✨ No table changed since the last upload. Nothing to do.")
+                exit()
+            print(f"🔍 Changed tables: {', '.join(sorted(tables))}")
+        if not use_copy:
+            clean_database(engine)
         
-        processed_files = set()
-        for filename, table_name, pk_cols in UPLOAD_SEQUENCE:
-            if filename not in processed_files:
-                upload_file(filename, table_name, pk_cols, engine)
-                processed_files.add(filename)
+        failed = parallel_upload(engine, use_copy=use_copy, column_types=column_types, tables=tables)
+        for table_name, path in staged_paths.items():
+            if (tables is None or table_name in tables) and table_name not in failed and os.path.exists(path):
+                manifest.record("uploaded", table_name, [path])
+        manifest.save()
+
+        # Views rebuilt during the swaps already exist; this creates whatever is still missing.
+        create_materialized_views(engine)
             
         print("🎉 All tasks completed successfully!")
 
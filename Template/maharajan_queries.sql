@@ -131,16 +131,16 @@ SELECT r.area_name FROM population_stats p JOIN regions r ON p.state=r.state WHE
 SELECT r.area_name FROM population_stats p JOIN regions r ON p.state=r.state WHERE p.age IN ('60+','65+') GROUP BY r.area_name ORDER BY SUM(p.persons) DESC;
 SELECT r.area_name, ABS(SUM(p.males)-SUM(p.females)) AS gender_gap FROM population_stats p JOIN regions r ON p.state=r.state GROUP BY r.area_name ORDER BY gender_gap ASC;
 SELECT r.area_name, ABS(SUM(p.males)-SUM(p.females)) AS gender_gap FROM population_stats p JOIN regions r ON p.state=r.state GROUP BY r.area_name ORDER BY gender_gap DESC;
-SELECT c.crop, c.area_sown_2025_26 FROM crop_stats c ORDER BY c.area_sown_2025_26 DESC;
-SELECT c.crop, c.area_sown_2025_26 FROM crop_stats c ORDER BY c.area_sown_2025_26 ASC;
-SELECT c.crop, c.difference_area FROM crop_stats c ORDER BY c.difference_area DESC;
-SELECT c.crop, c.difference_area FROM crop_stats c ORDER BY c.difference_area ASC;
-SELECT c.crop FROM crop_stats c WHERE ABS(c.difference_area) < 10 ORDER BY c.crop;
-SELECT c.crop FROM crop_stats c WHERE c.difference_area > 500 ORDER BY c.difference_area DESC;
-SELECT c.crop FROM crop_stats c WHERE c.difference_area < -500 ORDER BY c.difference_area ASC;
-SELECT c.crop, c.area_sown_2025_26 FROM crop_stats c ORDER BY c.area_sown_2025_26 DESC;
-SELECT c.crop, c.area_sown_2025_26 FROM crop_stats c ORDER BY c.area_sown_2025_26 ASC;
-SELECT c.crop FROM crop_stats c WHERE ABS(c.difference_area) < 50 ORDER BY c.crop;
+SELECT c.crop, c.area_sown FROM crop_stats c WHERE c.issue_date = (SELECT MAX(issue_date) FROM crop_stats) AND c.season = '2025-26' ORDER BY c.area_sown DESC;
+SELECT c.crop, c.area_sown FROM crop_stats c WHERE c.issue_date = (SELECT MAX(issue_date) FROM crop_stats) AND c.season = '2025-26' ORDER BY c.area_sown ASC;
+SELECT c.crop, c.difference_area FROM crop_stats c WHERE c.issue_date = (SELECT MAX(issue_date) FROM crop_stats) AND c.difference_area IS NOT NULL ORDER BY c.difference_area DESC;
+SELECT c.crop, c.difference_area FROM crop_stats c WHERE c.issue_date = (SELECT MAX(issue_date) FROM crop_stats) AND c.difference_area IS NOT NULL ORDER BY c.difference_area ASC;
+SELECT c.crop FROM crop_stats c WHERE c.issue_date = (SELECT MAX(issue_date) FROM crop_stats) AND ABS(c.difference_area) < 10 ORDER BY c.crop;
+SELECT c.crop FROM crop_stats c WHERE c.issue_date = (SELECT MAX(issue_date) FROM crop_stats) AND c.difference_area > 500 ORDER BY c.difference_area DESC;
+SELECT c.crop FROM crop_stats c WHERE c.issue_date = (SELECT MAX(issue_date) FROM crop_stats) AND c.difference_area < -500 ORDER BY c.difference_area ASC;
+SELECT c.crop, c.area_sown FROM crop_stats c WHERE c.issue_date = (SELECT MAX(issue_date) FROM crop_stats) AND c.season = '2025-26' ORDER BY c.area_sown DESC;
+SELECT c.crop, c.area_sown FROM crop_stats c WHERE c.issue_date = (SELECT MAX(issue_date) FROM crop_stats) AND c.season = '2025-26' ORDER BY c.area_sown ASC;
+SELECT c.crop FROM crop_stats c WHERE c.issue_date = (SELECT MAX(issue_date) FROM crop_stats) AND ABS(c.difference_area) < 50 ORDER BY c.crop;
 SELECT r.area_name, SUM(p.females) AS total_females FROM population_stats p JOIN regions r ON p.state=r.state JOIN tru t ON p.tru_id=t.id WHERE t.name='Total' GROUP BY r.area_name ORDER BY total_females DESC;
 SELECT r.area_name, SUM(p.males) AS total_males FROM population_stats p JOIN regions r ON p.state=r.state JOIN tru t ON p.tru_id=t.id WHERE t.name='Total' GROUP BY r.area_name ORDER BY total_males DESC;
 SELECT r.area_name, SUM(p.persons) AS total_population FROM population_stats p JOIN regions r ON p.state=r.state JOIN tru t ON p.tru_id=t.id WHERE t.name='Total' GROUP BY r.area_name ORDER BY total_population ASC;